@@ -0,0 +1,66 @@
+"""对比每次新建 boto3 客户端与复用 voice_outbound.clients.get_client 的单次调用开销
+
+    python benchmarks/bench_clients.py --calls 200
+
+对本地桩服务（HTTP）测量，结果不含真实 endpoint 上的 TLS 握手，实际节省更多。
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from connect_stub import start_stub
+from voice_outbound.clients import get_client
+from voice_outbound.stats import percentile
+
+PARAMS = {
+    'DestinationPhoneNumber': '+12285332612',
+    'ContactFlowId': '9168f50a-d81e-4060-a2cb-a127fe3d9198',
+    'InstanceId': 'b7e4b4ed-1bdf-4b14-b624-d9328f08725a',
+    'Attributes': {'UserName': '康先生', 'Language': 'ZH'},
+}
+
+
+def measure(make_client, calls):
+    samples = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        make_client().start_outbound_voice_contact(**PARAMS)
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return {
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 2),
+        'p50_ms': round(percentile(samples, 50) * 1000, 2),
+        'p95_ms': round(percentile(samples, 95) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=200)
+    args = parser.parse_args()
+
+    # 桩服务不校验签名，使用占位凭证
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+    import boto3
+
+    server = start_stub()
+    url = server.endpoint_url
+    fresh = measure(lambda: boto3.client('connect', endpoint_url=url), args.calls)
+    cached = measure(lambda: get_client('connect', endpoint_url=url), args.calls)
+    server.shutdown()
+
+    print(f"每次新建 boto3.client: {fresh}")
+    print(f"复用 get_client:       {cached}")
+    print(f"单次调用节省: {fresh['mean_ms'] - cached['mean_ms']:.2f} ms ({fresh['mean_ms'] / cached['mean_ms']:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
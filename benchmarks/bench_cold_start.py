@@ -0,0 +1,78 @@
+"""冷启动基准：从启动进程到第一次 StartOutboundVoiceContact 请求到达本地桩服务的耗时
+
+对比三种方式（每种启动 --runs 次，取中位数）:
+    page     旧页面的导入路径：streamlit + pandas + boto3 客户端后外呼
+    boto3    python -m voice_outbound call
+    lite     python -m voice_outbound call --lite（静态凭证，标准库客户端）
+
+    python benchmarks/bench_cold_start.py --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from connect_stub import start_stub
+
+PAGE_SCRIPT = """
+import streamlit, pandas
+from voice_outbound.clients import get_client
+get_client('connect', endpoint_url=%r).start_outbound_voice_contact(
+    DestinationPhoneNumber='+12285332612', ContactFlowId='flow', InstanceId='instance', Attributes={'UserName': 'x'})
+"""
+
+
+def measure(command, server, env):
+    """返回 (到第一次请求的毫秒数, 进程总耗时毫秒数)"""
+    arrivals = []
+    start_contact = server.start_contact
+
+    def record(body):
+        arrivals.append(time.perf_counter())
+        return start_contact(body)
+
+    server.start_contact = record
+    try:
+        started = time.perf_counter()
+        subprocess.run(command, env=env, check=True, stdout=subprocess.DEVNULL)
+        finished = time.perf_counter()
+    finally:
+        server.start_contact = start_contact
+    return (arrivals[0] - started) * 1000, (finished - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    server = start_stub()
+    env = dict(os.environ, PYTHONPATH=str(ROOT), AWS_ACCESS_KEY_ID='testing', AWS_SECRET_ACCESS_KEY='testing',
+               AWS_REGION='us-east-1', AWS_DEFAULT_REGION='us-east-1')
+    call = [sys.executable, '-m', 'voice_outbound', 'call', '+12285332612', '--endpoint-url', server.endpoint_url]
+    commands = {
+        'page': [sys.executable, '-c', PAGE_SCRIPT % server.endpoint_url],
+        'boto3': call,
+        'lite': call + ['--lite'],
+    }
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], env=env, check=True)
+    interpreter = (time.perf_counter() - started) * 1000
+    print(f"空解释器启动: {interpreter:.0f}ms")
+    for name, command in commands.items():
+        # 第一次运行预热 .pyc 与文件系统缓存，不计入结果
+        measure(command, server, env)
+        samples = [measure(command, server, env) for _ in range(args.runs)]
+        first_call = statistics.median(s[0] for s in samples)
+        total = statistics.median(s[1] for s in samples)
+        print(f"{name:6s} 到第一次 API 请求 {first_call:6.0f}ms，进程总耗时 {total:6.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""联系事件消费吞吐测试：生成合成的 EventBridge 联系事件与 CTR，离线回放
+
+    python benchmarks/bench_events.py --contacts 50000
+"""
+import argparse
+import json
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from voice_outbound.events import ContactEventConsumer, drain_queue, replay_file
+
+AMD_RESULTS = ['HUMAN', 'VOICEMAIL_BEEP', 'VOICEMAIL_NO_BEEP', 'SIT_TONE']
+DISCONNECT_REASONS = ['CUSTOMER_DISCONNECT', 'CONTACT_FLOW_DISCONNECT', 'TELECOM_PROBLEM']
+
+
+def _iso(dt):
+    return dt.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+def synthetic_events(contacts, seed=0):
+    """每个联系生成 INITIATED / CONNECTED_TO_SYSTEM / DISCONNECTED 三个事件与一条 CTR"""
+    rng = random.Random(seed)
+    start = datetime(2025, 8, 1, tzinfo=timezone.utc)
+    for _ in range(contacts):
+        contact_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        initiated = start + timedelta(seconds=rng.randint(0, 86400))
+        connected = initiated + timedelta(seconds=rng.randint(3, 30))
+        disconnected = connected + timedelta(seconds=rng.randint(10, 300))
+        reason = rng.choice(DISCONNECT_REASONS)
+        for event_type, key, ts in (
+            ('INITIATED', 'initiationTimestamp', initiated),
+            ('CONNECTED_TO_SYSTEM', 'connectedToSystemTimestamp', connected),
+            ('DISCONNECTED', 'disconnectTimestamp', disconnected),
+        ):
+            detail = {'eventType': event_type, 'contactId': contact_id, 'channel': 'VOICE', 'initiationMethod': 'API', key: _iso(ts)}
+            if event_type == 'DISCONNECTED':
+                detail['disconnectReason'] = reason
+            yield {'version': '0', 'detail-type': 'Amazon Connect Contact Event', 'source': 'aws.connect', 'time': _iso(ts), 'detail': detail}
+        yield {
+            'ContactId': contact_id,
+            'InitiationTimestamp': _iso(initiated),
+            'ConnectedToSystemTimestamp': _iso(connected),
+            'DisconnectTimestamp': _iso(disconnected),
+            'DisconnectReason': reason,
+            'Attributes': {'UserName': '康先生', 'amd_result': rng.choice(AMD_RESULTS)},
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--contacts', type=int, default=50000)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix='.jsonl')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        for event in synthetic_events(args.contacts):
+            f.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+    try:
+        consumer = ContactEventConsumer()
+        started = time.perf_counter()
+        processed = replay_file(path, consumer)
+        elapsed = time.perf_counter() - started
+        print(f"文件回放: {processed} 条, {processed / elapsed:,.0f} events/s, 状态 {consumer.store.counts()}")
+
+        with open(path, 'rb') as f:
+            lines = f.readlines()
+    finally:
+        os.unlink(path)
+
+    q = queue.Queue(maxsize=10000)
+
+    def produce():
+        for line in lines:
+            q.put(line)
+        q.put(None)
+
+    consumer = ContactEventConsumer()
+    producer = threading.Thread(target=produce)
+    started = time.perf_counter()
+    producer.start()
+    processed = drain_queue(q, consumer)
+    producer.join()
+    elapsed = time.perf_counter() - started
+    print(f"队列消费: {processed} 条, {processed / elapsed:,.0f} events/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""联系流模拟器吞吐基准：枚举仓库中两个联系流的全部路径，并用随机按键 / 意图做模糊测试
+
+    python benchmarks/bench_flowsim.py --fuzz 20000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from voice_outbound.flowsim import Flow, FlowSimulator, summarize
+from voice_outbound.ssml import MESSAGE_ATTRIBUTE, ivr_demo_template
+
+ATTRIBUTES = {'UserName': '康先生', 'Language': 'ZH', 'LanguageCode': 'zh_CN'}
+ATTRIBUTES[MESSAGE_ATTRIBUTE] = ivr_demo_template().render(ATTRIBUTES)
+EXTERNAL = {'OpeningSSML': '<speak><break time="1s"/>您好，请问您是康先生吗？</speak>', 'LastReplyId': 'x'}
+FLOWS = [ROOT / 'ivr' / 'voice_outbound_ivr_flow.json', ROOT / 'llm' / 'voice_outbound_llm_flow.json']
+# 随机输入：按键、Lex 意图与超时
+RANDOM_INPUTS = list('0123456789') + ['TransferToAgentIntent', 'CloseIntent', 'FallbackIntent', 'timeout']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=50, help='全路径枚举的重复次数')
+    parser.add_argument('--fuzz', type=int, default=20000, help='每个联系流的随机输入路径数')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for path in FLOWS:
+        simulator = FlowSimulator(Flow.load(str(path)), attributes=ATTRIBUTES, external=EXTERNAL)
+        summary = summarize(simulator.paths())
+        print(f"{path.relative_to(ROOT)}: {summary['paths']} 条路径，结束方式 {summary['ends']}，"
+              f"通话时长 {summary['talk_seconds_min']} / {summary['talk_seconds_mean']} / {summary['talk_seconds_max']} 秒"
+              f"（最短 / 平均 / 最长），问题 {len(summary['problems'])} 个，不可达动作 {len(simulator.unreachable())} 个")
+
+        for include_errors in (False, True):
+            started = time.perf_counter()
+            count = 0
+            for _ in range(args.rounds):
+                count += len(simulator.paths(include_errors=include_errors))
+            elapsed = time.perf_counter() - started
+            label = '含错误分支' if include_errors else '正常分支'
+            print(f"  枚举（{label}）: {count / elapsed:,.0f} 条路径/秒")
+
+        lambda_ids = [node.id for node in simulator.flow.nodes.values() if node.type == 'InvokeLambdaFunction']
+        started = time.perf_counter()
+        for _ in range(args.fuzz):
+            inputs = [rng.choice(RANDOM_INPUTS) for _ in range(rng.randint(0, 6))]
+            outcomes = {action_id: rng.choice(['Success', 'NoMatchingError']) for action_id in lambda_ids}
+            simulator.run(inputs, outcomes)
+        elapsed = time.perf_counter() - started
+        print(f"  随机输入: {args.fuzz / elapsed:,.0f} 条路径/秒")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""名单清洗基准：数百万条格式各异的号码做 E.164 规范化、去重，并与千万级免打扰名单（内存映射）比对
+
+对照组为逐行调用 normalize_e164 + Python set 的实现（在子样本上计时后按行数折算），
+同时校验两种实现在子样本上的结果一致。
+
+    python benchmarks/bench_hygiene.py --rows 5000000 --dnc 20000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from voice_outbound.hygiene import KEPT, SuppressionList, clean, main as hygiene_main, normalize_e164
+
+
+def nanp_numbers(rng, size):
+    """随机的合法北美 10 位号码（区号、局号首位 2~9）"""
+    area = rng.integers(200, 1000, size)
+    exchange = rng.integers(200, 1000, size)
+    line = rng.integers(0, 10000, size)
+    return area * 10 ** 7 + exchange * 10 ** 4 + line
+
+
+def raw_numbers(rng, rows):
+    """按常见录入格式生成号码字符串，约 20% 重复、约 3% 无效"""
+    pool = nanp_numbers(rng, int(rows * 0.8))
+    numbers = pool[rng.integers(0, len(pool), rows)]
+    digits = pc.cast(pa.array(numbers), pa.string())
+    area = pc.utf8_slice_codeunits(digits, 0, 3)
+    exchange = pc.utf8_slice_codeunits(digits, 3, 6)
+    line = pc.utf8_slice_codeunits(digits, 6, 10)
+    formats = [
+        pc.binary_join_element_wise('+1', digits, ''),
+        digits,
+        pc.binary_join_element_wise('(', area, ') ', exchange, '-', line, ''),
+        pc.binary_join_element_wise('1-', area, '-', exchange, '-', line, ''),
+        pc.binary_join_element_wise('+1 ', area, ' ', exchange, ' ', line, ''),
+        pc.binary_join_element_wise(area, exchange, pc.utf8_slice_codeunits(line, 0, 3), ''),
+        pc.binary_join_element_wise(digits, ' ext 12', ''),
+    ]
+    weights = np.array([0.35, 0.25, 0.15, 0.1, 0.12, 0.015, 0.015])
+    choice = rng.choice(len(formats), rows, p=weights / weights.sum()).astype(np.int8)
+    return pc.choose(pa.array(choice), *formats), pool
+
+
+def python_baseline(raw, dnc, recent, since):
+    """逐行实现：normalize_e164 + set"""
+    seen = set()
+    status = []
+    for value in raw:
+        e164 = normalize_e164(value)
+        if e164 is None:
+            status.append('invalid')
+            continue
+        number = int(e164[1:])
+        if number in dnc:
+            status.append('dnc')
+        elif recent.get(number, -1) >= since:
+            status.append('recent')
+        elif number in seen:
+            status.append('duplicate')
+        else:
+            status.append('kept')
+        seen.add(number)
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5000000, help='联系人行数')
+    parser.add_argument('--dnc', type=int, default=20000000, help='免打扰名单规模')
+    parser.add_argument('--recent', type=int, default=1000000, help='近期已联系名单规模')
+    parser.add_argument('--sample', type=int, default=200000, help='对照组与一致性校验的子样本行数')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    started = time.perf_counter()
+    raw, pool = raw_numbers(rng, args.rows)
+    now = int(time.time())
+    since = now - 7 * 86400
+    workdir = tempfile.mkdtemp()
+    dnc_numbers = np.concatenate([nanp_numbers(rng, args.dnc), rng.choice(pool, len(pool) // 20)]) + 10 ** 10
+    SuppressionList.build(dnc_numbers).save(os.path.join(workdir, 'dnc'))
+    recent_numbers = rng.choice(pool, args.recent) + 10 ** 10
+    recent_times = now - rng.integers(0, 30 * 86400, args.recent)
+    SuppressionList.build(recent_numbers, recent_times).save(os.path.join(workdir, 'recent'))
+    print(f"生成 {args.rows:,} 行号码、{args.dnc:,} 条免打扰名单: {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    dnc = SuppressionList.open(os.path.join(workdir, 'dnc'))
+    recent = SuppressionList.open(os.path.join(workdir, 'recent'))
+    opened = time.perf_counter() - started
+    print(f"内存映射打开屏蔽名单: {opened * 1000:.1f}ms（{len(dnc):,} + {len(recent):,} 条）")
+
+    started = time.perf_counter()
+    result = clean(raw, dnc=dnc, recent=recent, recent_since=since)
+    elapsed = time.perf_counter() - started
+    timings = '，'.join(f"{name} {seconds:.2f}s" for name, seconds in result.timings.items())
+    print(f"向量化清洗 {args.rows:,} 行: {elapsed:.2f}s（{timings}），{args.rows / elapsed / 1e6:.1f}M 行/秒，结果 {result.counts()}")
+
+    sample = raw.slice(0, args.sample)
+    dnc_set = set(dnc.numbers.tolist())
+    recent_map = dict(zip(recent.numbers.tolist(), recent.last_contact.tolist()))
+    started = time.perf_counter()
+    expected = python_baseline(sample.to_pylist(), dnc_set, recent_map, since)
+    baseline = (time.perf_counter() - started) / args.sample * args.rows
+    actual = clean(sample, dnc=dnc, recent=recent, recent_since=since)
+    names = ('kept', 'invalid', 'dnc', 'recent', 'duplicate')
+    mismatches = sum(names[s] != e for s, e in zip(actual.status.tolist(), expected))
+    print(f"逐行实现（子样本折算）: {baseline:.1f}s，加速 {baseline / elapsed:.0f}x；子样本 {args.sample:,} 行结果不一致 {mismatches} 行")
+
+    contacts = os.path.join(workdir, 'contacts.csv')
+    import pyarrow.csv as pcsv
+    pcsv.write_csv(pa.table({'phone': raw, 'UserName': pa.array(['康先生'] * args.rows)}), contacts)
+    started = time.perf_counter()
+    hygiene_main(['clean', contacts, '--dnc', os.path.join(workdir, 'dnc'), '--recent', os.path.join(workdir, 'recent'),
+                  '--output', os.path.join(workdir, 'clean.csv')])
+    print(f"命令行端到端（读 CSV、清洗、写 CSV）: {time.perf_counter() - started:.2f}s")
+    assert int((result.status == KEPT).sum()) > 0
+
+
+if __name__ == '__main__':
+    main()
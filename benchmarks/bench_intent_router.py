@@ -0,0 +1,67 @@
+"""意图快速路由评测：在标注语料上统计准确率、误路由与无需调用 Bedrock 的轮次占比
+
+语料每行 {"locale", "text", "label", "stage"}，label 为 null 表示应交给模型处理的含糊话术；
+stage 为对话阶段（IDENTITY / PAYMENT / CLOSING，缺省为无法确定阶段）。
+
+    python benchmarks/bench_intent_router.py --repeat 2000
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'llm' / 'lambda'))
+
+from intent_router import IntentRouter
+
+CORPUS = Path(__file__).resolve().parent / 'intent_corpus.jsonl'
+
+
+def load_corpus(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', default=str(CORPUS))
+    parser.add_argument('--repeat', type=int, default=2000, help='计时的重复轮数')
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    router = IntentRouter()
+
+    outcomes = Counter()
+    errors = []
+    for sample in corpus:
+        predicted = router.classify(sample['text'], sample['locale'], sample.get('stage'))
+        expected = sample['label']
+        if predicted == expected:
+            outcomes['correct'] += 1
+        elif predicted is None:
+            # 漏判只多一次模型调用
+            outcomes['missed'] += 1
+        else:
+            # 误路由直接影响通话（错误转人工或挂机），应为 0
+            outcomes['misrouted'] += 1
+            errors.append((sample['text'], expected, predicted))
+    routed = sum(1 for sample in corpus if router.classify(sample['text'], sample['locale'], sample.get('stage')))
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        for sample in corpus:
+            router.classify(sample['text'], sample['locale'], sample.get('stage'))
+    per_call_us = (time.perf_counter() - started) / (args.repeat * len(corpus)) * 1e6
+
+    print(f"语料 {len(corpus)} 条: 正确 {outcomes['correct']}, 漏判 {outcomes['missed']}, 误路由 {outcomes['misrouted']}")
+    print(f"无需调用 Bedrock 的轮次占比: {routed / len(corpus):.1%}")
+    print(f"分类耗时: {per_call_us:.2f} µs/次")
+    for text, expected, predicted in errors:
+        print(f"  误路由: {text!r} 期望 {expected} 实际 {predicted}")
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
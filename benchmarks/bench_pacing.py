@@ -0,0 +1,75 @@
+"""预测式节奏模拟：同一随机种子下对比固定速率与按队列指标调速，场景覆盖坐席规模、先验偏差与客户耐心
+
+固定速率对照组取「放弃率不超过目标的最高固定速率」（二分搜索，事后才能知道的最优值）
+以及按坐席容量估算的名义速率。
+
+    python benchmarks/bench_pacing.py --duration 7200
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from voice_outbound.pacing import PacingEngine, QueueSimulator
+
+# (场景, 坐席数, AHT, 真实接通率, 真实转人工率, 耐心, 先验接通率, 先验转人工率, 坐席变化)
+SCENARIOS = [
+    ('20 坐席', 20, 180.0, 0.3, 0.2, 20.0, 0.3, 0.2, None),
+    ('50 坐席', 50, 180.0, 0.3, 0.2, 20.0, 0.3, 0.2, None),
+    ('先验偏高', 20, 180.0, 0.15, 0.2, 20.0, 0.3, 0.3, None),
+    ('先验偏低', 20, 180.0, 0.4, 0.3, 20.0, 0.2, 0.1, None),
+    ('耐心 60 秒', 20, 240.0, 0.3, 0.2, 60.0, 0.3, 0.2, None),
+    # 换班：每 30 分钟坐席数在 30 与 15 之间切换
+    ('换班 30/15', 30, 180.0, 0.3, 0.2, 20.0, 0.3, 0.2, [(t * 1800.0, 15 if t % 2 else 30) for t in range(8)]),
+]
+
+
+def run(scenario, policy, duration, seed, engine=None):
+    _, agents, aht, answer, transfer, patience, _, _, staffing = scenario
+    simulator = QueueSimulator(agents, aht, answer, transfer, patience=patience, staffing=staffing, seed=seed)
+    return simulator.run(policy, duration, engine=engine)
+
+
+def best_fixed_rate(scenario, target, duration, seed, nominal):
+    """放弃率不超过 target 的最高固定速率（从名义速率按 2% 步长向下扫描）"""
+    for step in range(50):
+        rate = round(nominal * (1 - 0.02 * step), 3)
+        if run(scenario, lambda metrics: rate, duration, seed)['abandon_rate'] <= target:
+            return rate
+    return rate
+
+
+def describe(label, result):
+    print(f"  {label:<14} 平均速率 {result['avg_rate']:.2f}/s，转人工 {result['transferred']}，"
+          f"放弃率 {result['abandon_rate']:.1%}，坐席占用率 {result['occupancy']:.1%}，平均排队 {result['avg_wait_s']:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--duration', type=float, default=7200.0, help='模拟时长 (秒)')
+    parser.add_argument('--target-abandon', type=float, default=0.03)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for scenario in SCENARIOS:
+        name, agents, aht, answer, transfer, patience, prior_answer, prior_transfer, _ = scenario
+        print(f"{name}（接通率 {answer}，转人工率 {transfer}，先验 {prior_answer} / {prior_transfer}）")
+        nominal = round(agents / aht / (answer * transfer), 3)
+        describe(f"名义 {nominal}/s", run(scenario, lambda metrics: nominal, args.duration, args.seed))
+        best = best_fixed_rate(scenario, args.target_abandon, args.duration, args.seed, nominal)
+        describe(f"最优固定 {best}/s", run(scenario, lambda metrics: best, args.duration, args.seed))
+
+        engine = PacingEngine(args.target_abandon, patience, prior_answer, prior_transfer)
+        started = time.perf_counter()
+        result = run(scenario, engine.update, args.duration, args.seed, engine)
+        elapsed = time.perf_counter() - started
+        describe('预测式节奏', result)
+        print(f"    学到的接通率 {engine.snapshot()['answer_rate']}，转人工率 {engine.snapshot()['transfer_rate']}，"
+              f"安全系数 {engine.snapshot()['safety']}（模拟 {elapsed:.2f}s）")
+
+
+if __name__ == '__main__':
+    main()
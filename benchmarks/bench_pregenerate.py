@@ -0,0 +1,194 @@
+"""振铃期间预生成的本地测试：桩 Bedrock + 模拟振铃时间，对比开场白与首轮回复的延迟
+
+每个联系: 发起外呼 -> （预生成模式下）异步调用 Lambda 预生成 -> 振铃 -> 联系流调用 Lambda 取开场白
+-> 客户说出第一句话 -> Lex 首轮。
+
+    python benchmarks/bench_pregenerate.py --contacts 20 --ring 4 --ttft 0.6
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'llm' / 'lambda'))
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('Prompt', '你是一个信用卡还款提醒中心的AI助手，正在进行外呼服务。')
+os.environ['RESPONSE_CACHE_TABLE'] = ''
+
+import lambda_function
+from model_invoker import HedgedInvoker
+from response_cache import ResponseCache
+from voice_outbound.stats import percentile
+
+ATTRIBUTES = {'Amount': '5000元', 'DueDate': '2025年8月4日', 'LanguageCode': 'zh_CN'}
+# 不在预生成列表中的首句，按模型实时生成
+UNEXPECTED_UTTERANCES = ['我在开车', '你们怎么有我电话']
+
+
+class StubStream:
+    def __init__(self, text, ttft, chars_per_second):
+        self.text = text
+        self.ttft = ttft
+        self.interval = 3 / chars_per_second
+
+    def __iter__(self):
+        time.sleep(self.ttft)
+        for i in range(0, len(self.text), 3):
+            chunk = {'type': 'content_block_delta', 'delta': {'type': 'text_delta', 'text': self.text[i:i + 3]}}
+            yield {'chunk': {'bytes': json.dumps(chunk).encode('utf-8')}}
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+class StubBody:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def read(self):
+        return json.dumps(self.payload).encode('utf-8')
+
+
+class StubBedrock:
+    """按首 token 延迟与生成速度模拟 Bedrock 的响应时间"""
+
+    def __init__(self, ttft, chars_per_second):
+        self.ttft = ttft
+        self.chars_per_second = chars_per_second
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _reply(self, body):
+        with self._lock:
+            self.calls += 1
+        utterance = json.loads(body)['messages'][-1]['content'][-20:]
+        return f"好的，关于“{utterance}”。您有一笔5000元的账单将于8月4日到期，请问您能按时还款吗？"
+
+    def invoke_model_with_response_stream(self, body, modelId):
+        return {'body': StubStream(self._reply(body), self.ttft, self.chars_per_second)}
+
+    def invoke_model(self, body, modelId):
+        text = self._reply(body)
+        time.sleep(self.ttft + len(text) / self.chars_per_second)
+        return {'body': StubBody({'content': [{'text': text}]})}
+
+
+class SharedBackend:
+    """进程内字典，代替多个 Lambda 实例共享的 DynamoDB 表（未配置共享后端时不预生成）"""
+
+    def __init__(self):
+        self.items = {}
+
+    def get(self, key):
+        return self.items.get(key)
+
+    def put(self, key, text, latency_ms):
+        self.items[key] = (text, latency_ms)
+
+
+def simulate_contact(rng, ring_seconds, pregenerate, results, background):
+    contact_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    # 每个联系的客户不同，开场白与首轮缓存键互不相同
+    attributes = dict(ATTRIBUTES, UserName=f"客户{contact_id[:6]}")
+    utterance = rng.choice(lambda_function.FIRST_TURN_UTTERANCES + UNEXPECTED_UTTERANCES)
+    ring = rng.uniform(0.5, 1.5) * ring_seconds
+    if pregenerate:
+        # 对应外呼页面在 StartOutboundVoiceContact 成功后的异步调用
+        thread = threading.Thread(
+            target=lambda_function.lambda_handler,
+            args=({'Pregenerate': {'ContactId': contact_id, 'Attributes': attributes}}, None)
+        )
+        thread.start()
+        background.append(thread)
+    time.sleep(ring)
+
+    started = time.perf_counter()
+    opening = lambda_function.lambda_handler({
+        'Name': 'ContactFlowEvent',
+        'Details': {'ContactData': {'ContactId': contact_id, 'Attributes': attributes}, 'Parameters': {}}
+    }, None)
+    opening_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    lambda_function.lambda_handler({
+        'sessionId': contact_id,
+        'inputTranscript': utterance,
+        'bot': {'localeId': 'zh_CN', 'name': 'StartOutboundVoiceContact_DebtCollection_Bot'},
+        'sessionState': {
+            'sessionAttributes': {'last_reply_id': opening['LastReplyId']},
+            'intent': {'name': 'FallbackIntent', 'state': 'InProgress', 'slots': {}}
+        }
+    }, None)
+    first_turn_ms = (time.perf_counter() - started) * 1000
+    results.append((opening_ms, first_turn_ms, utterance in lambda_function.FIRST_TURN_UTTERANCES))
+
+
+def run(contacts, ring_seconds, pregenerate, seed):
+    lambda_function.response_cache = ResponseCache(backend=SharedBackend())
+    # 所有联系在同一进程中模拟（对应多个 Lambda 实例），按并发量放大线程池
+    invoker = lambda_function.model_invoker = HedgedInvoker(
+        lambda_function.TURN_DEADLINE_MS,
+        lambda_function.HEDGE_AFTER_MS,
+        max_workers=contacts * 2 * (len(lambda_function.FIRST_TURN_UTTERANCES) + 1)
+    )
+    rng = random.Random(seed)
+    results = []
+    background = []
+    threads = [
+        threading.Thread(
+            target=simulate_contact,
+            args=(random.Random(rng.getrandbits(64)), ring_seconds, pregenerate, results, background)
+        )
+        for _ in range(contacts)
+    ]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # 等待仍在进行的预生成结束
+        for thread in background:
+            thread.join()
+        invoker.close()
+    return results
+
+
+def report(label, results):
+    opening = sorted(r[0] for r in results)
+    expected = sorted(r[1] for r in results if r[2])
+    unexpected = sorted(r[1] for r in results if not r[2])
+    print(f"{label}: 开场白 p50 {percentile(opening, 50):.0f} ms / p95 {percentile(opening, 95):.0f} ms")
+    if expected:
+        print(f"  首句在预生成列表中（{len(expected)} 个）: 首轮回复 p50 {percentile(expected, 50):.0f} ms / p95 {percentile(expected, 95):.0f} ms")
+    if unexpected:
+        print(f"  其他首句（{len(unexpected)} 个）: 首轮回复 p50 {percentile(unexpected, 50):.0f} ms / p95 {percentile(unexpected, 95):.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--contacts', type=int, default=20)
+    parser.add_argument('--ring', type=float, default=4.0, help='平均振铃时间（秒）')
+    parser.add_argument('--ttft', type=float, default=0.6, help='桩 Bedrock 首 token 延迟（秒）')
+    parser.add_argument('--chars-per-second', type=float, default=60.0, help='桩 Bedrock 生成速度')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    lambda_function.bedrock = StubBedrock(args.ttft, args.chars_per_second)
+    report('实时生成', run(args.contacts, args.ring, False, args.seed))
+    report('振铃期间预生成', run(args.contacts, args.ring, True, args.seed))
+    print(f"桩 Bedrock 调用次数: {lambda_function.bedrock.calls}")
+
+
+if __name__ == '__main__':
+    main()
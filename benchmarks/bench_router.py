@@ -0,0 +1,85 @@
+"""多实例外呼路由模拟：每个桩实例按 TPS 配额限流，对比 1 / 2 / 4 / 8 个实例时的外呼吞吐，
+以及其中一个实例持续返回服务端错误时的熔断与分流
+
+    python benchmarks/bench_router.py --tps 20 --seconds 4
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from connect_stub import start_stub
+from voice_outbound.clients import get_client
+from voice_outbound.dialer import BulkDialer
+from voice_outbound.router import DialRouter, DialTarget
+
+# 按目标国家码轮换的主叫号码池
+SOURCE_NUMBERS = {'+1': ['+13072633584', '+13072633585', '+13072633586'], '+44': ['+442071838750'], '*': ['+13072633587']}
+PREFIXES = ['+1', '+1', '+1', '+44', '+86']
+
+
+def contacts(count):
+    for i in range(count):
+        yield i, {'phone': f"{PREFIXES[i % len(PREFIXES)]}{5550000000 + i}", 'UserName': f"u{i}"}, None
+
+
+def run(instances, tps, seconds, latency, error_rates=None):
+    servers = [start_stub(tps=tps, latency=latency, error_rate=(error_rates or {}).get(i, 0.0)) for i in range(instances)]
+    targets = [
+        DialTarget(
+            f"instance-{i}",
+            get_client('connect', endpoint_url=server.endpoint_url, max_attempts=1),
+            f"instance-{i}",
+            'flow',
+            source_numbers=SOURCE_NUMBERS,
+            rate=tps,
+            failure_threshold=3,
+            cooldown=seconds
+        )
+        for i, server in enumerate(servers)
+    ]
+    dialer = BulkDialer(None, None, None, max_workers=max(8, int(tps * instances * latency * 4)), router=DialRouter(targets))
+    count = int(tps * instances * seconds)
+    started = time.perf_counter()
+    summary = dialer.run(contacts(count))
+    elapsed = time.perf_counter() - started
+    sources = {}
+    for server in servers:
+        for request in server.requests:
+            sources[request.get('SourcePhoneNumber')] = sources.get(request.get('SourcePhoneNumber'), 0) + 1
+        server.shutdown()
+    return count / elapsed, summary, sources
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tps', type=float, default=20.0, help='每个桩实例的 TPS 配额')
+    parser.add_argument('--seconds', type=float, default=4.0, help='每轮按配额计算的外呼时长')
+    parser.add_argument('--latency', type=float, default=0.05, help='桩实例的响应延迟 (秒)')
+    args = parser.parse_args()
+
+    # 桩服务不校验签名，使用占位凭证
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+    baseline = None
+    for instances in (1, 2, 4, 8):
+        rate, summary, _ = run(instances, args.tps, args.seconds, args.latency)
+        baseline = baseline or rate
+        print(f"{instances} 个实例: {rate:.1f} calls/s（{rate / baseline:.2f}x），"
+              f"失败 {summary['failed']}，限流 {sum(t['rate_control']['throttles'] for t in summary['targets'].values())}")
+
+    rate, summary, sources = run(4, args.tps, args.seconds, args.latency, error_rates={0: 1.0})
+    print(f"4 个实例（instance-0 持续返回 503）: {rate:.1f} calls/s")
+    for name, target in summary['targets'].items():
+        print(f"  {name}: 成功 {target['dialed']}，失败 {target['failed']}，健康 {target['healthy']}")
+    print(f"主叫号码分布: {dict(sorted(sources.items()))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""本地 Amazon Connect 桩服务，用于离线压测与联调
+
+实现 StartOutboundVoiceContact (PUT /contact/outbound-voice) 与
+DescribeContact (GET /contacts/{InstanceId}/{ContactId})，可选按 TPS 返回限流错误、按比例返回服务端错误。
+
+用法:
+    python benchmarks/connect_stub.py --port 8765 --tps 50
+    python -m voice_outbound.dialer contacts.csv --endpoint-url http://127.0.0.1:8765
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class ConnectStubHandler(BaseHTTPRequestHandler):
+    # 支持 keep-alive，才能体现客户端连接复用的效果
+    protocol_version = 'HTTP/1.1'
+    # 响应头与响应体合并为一次写出，避免 Nagle 与延迟 ACK 叠加造成 40ms 停顿
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_PUT(self):
+        body = self._read_body()
+        if self.path != '/contact/outbound-voice':
+            self._send(404, {'Message': 'not found'})
+            return
+        if not self.server.allow():
+            self._send(429, {'Message': 'Rate exceeded'}, {'x-amzn-ErrorType': 'ThrottlingException'})
+            return
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            self._send(503, {'Message': 'Service unavailable'}, {'x-amzn-ErrorType': 'ServiceUnavailableException'})
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        contact_id = self.server.start_contact(body)
+        self._send(200, {'ContactId': contact_id})
+
+    def do_GET(self):
+        parts = self.path.strip('/').split('/')
+        if len(parts) == 3 and parts[0] == 'contacts':
+            contact = self.server.contacts.get(parts[2])
+            if contact:
+                self._send(200, {'Contact': contact})
+                return
+        self._send(404, {'Message': 'Contact not found'}, {'x-amzn-ErrorType': 'ResourceNotFoundException'})
+
+
+class ConnectStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, tps=None, latency=0.0, error_rate=0.0):
+        super().__init__(address, ConnectStubHandler)
+        self.tps = tps
+        self.latency = latency
+        self.error_rate = error_rate
+        self.contacts = {}
+        self.requests = []
+        self._lock = threading.Lock()
+        self._window = []
+
+    def allow(self):
+        """滑动 1 秒窗口内超过 tps 的请求返回限流"""
+        if not self.tps:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.tps:
+                return False
+            self._window.append(now)
+            return True
+
+    def start_contact(self, body):
+        # 与 Connect 一致: 相同 ClientToken 返回同一个 ContactId
+        with self._lock:
+            token = body.get('ClientToken')
+            if token and token in self.contacts:
+                return self.contacts[token]['Id']
+            contact_id = str(uuid.uuid4())
+            contact = {
+                'Id': contact_id,
+                'InitiationMethod': 'API',
+                'Channel': 'VOICE',
+                'InitiationTimestamp': datetime.now(timezone.utc).timestamp(),
+                'Attributes': body.get('Attributes', {}),
+            }
+            self.contacts[contact_id] = contact
+            if token:
+                self.contacts[token] = contact
+            self.requests.append(body)
+            return contact_id
+
+    @property
+    def endpoint_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+def start_stub(port=0, tps=None, latency=0.0, error_rate=0.0):
+    """在后台线程启动桩服务并返回 server，port=0 时随机分配端口"""
+    server = ConnectStubServer(('127.0.0.1', port), tps=tps, latency=latency, error_rate=error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='本地 Amazon Connect 桩服务')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--tps', type=float, default=None, help='超过该 TPS 返回 ThrottlingException')
+    parser.add_argument('--latency', type=float, default=0.0, help='每次外呼附加的延迟 (秒)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回 ServiceUnavailableException 的比例')
+    args = parser.parse_args()
+    server = ConnectStubServer(('127.0.0.1', args.port), tps=args.tps, latency=args.latency, error_rate=args.error_rate)
+    print(f"Connect 桩服务已启动: {server.endpoint_url}")
+    server.serve_forever()
@@ -0,0 +1,409 @@
+// 批量外呼: 从 CSV/JSONL 文件或标准输入流式读取联系人, 经有界 goroutine 工作池并发外呼,
+// 所有 worker 共享同一个限速器与同一个 SDK 客户端. 结果逐行写出为 JSONL, 结束时输出吞吐与延迟百分位.
+//
+// 输入输出格式与 voice_outbound/dialer.py 保持一致: 号码列为 phone / phone_number /
+// DestinationPhoneNumber, 其余列作为联系流属性; 结果行包含 row, phone, status, contact_id, error.
+//
+// 本文件不依赖 AWS SDK, 实际外呼由 main.go 中构造的 dialFunc 完成, 测试见 bulk_test.go.
+package main
+
+import (
+	"bufio"
+	"bytes"
+	"context"
+	"encoding/csv"
+	"encoding/json"
+	"errors"
+	"fmt"
+	"io"
+	"log"
+	"math"
+	"os"
+	"sort"
+	"strings"
+	"sync"
+	"time"
+)
+
+// 识别为目标号码的列名, 其余列作为联系流属性.
+var phoneFields = map[string]bool{"phone": true, "phone_number": true, "DestinationPhoneNumber": true}
+
+// 结果写出缓冲的最长驻留时间; 结果通道暂时为空时也立即写出.
+const flushInterval = time.Second
+
+// 结果状态, 与 voice_outbound/journal.py 一致.
+const (
+	statusDialed = "dialed"
+	statusFailed = "failed"
+	// 中断时已读取但未外呼的联系人, 可按 row 重新外呼
+	statusCancelled = "cancelled"
+)
+
+type contact struct {
+	Row        int
+	Phone      string
+	Attributes map[string]string
+}
+
+type result struct {
+	Row       int     `json:"row"`
+	Phone     string  `json:"phone"`
+	Status    string  `json:"status"`
+	ContactID string  `json:"contact_id,omitempty"`
+	Error     string  `json:"error,omitempty"`
+	LatencyMs float64 `json:"latency_ms"`
+}
+
+// dialFunc 发起一通外呼并返回 ContactId.
+type dialFunc func(ctx context.Context, c contact) (string, error)
+
+// readContacts 逐行读取联系人并发送到 out, 读完或 ctx 取消后返回已发送的行数; 不会一次性载入整个文件.
+// format 为 csv, jsonl 或 auto (按第一个非空白字符判断, '{' 为 JSONL).
+func readContacts(ctx context.Context, r io.Reader, format string, defaults map[string]string, out chan<- contact) (int, error) {
+	br := bufio.NewReaderSize(r, 1<<20)
+	// 跳过 UTF-8 BOM
+	if head, err := br.Peek(3); err == nil && bytes.Equal(head, []byte{0xEF, 0xBB, 0xBF}) {
+		br.Discard(3)
+	}
+	if format == "auto" {
+		format = "csv"
+		for i := 1; ; i++ {
+			head, err := br.Peek(i)
+			if err != nil {
+				break
+			}
+			if c := head[i-1]; c != ' ' && c != '\t' && c != '\r' && c != '\n' {
+				if c == '{' {
+					format = "jsonl"
+				}
+				break
+			}
+		}
+	}
+
+	row := 0
+	emit := func(fields map[string]string) error {
+		c := contact{Row: row, Attributes: make(map[string]string, len(defaults)+len(fields))}
+		for k, v := range defaults {
+			c.Attributes[k] = v
+		}
+		for k, v := range fields {
+			if phoneFields[k] {
+				c.Phone = strings.TrimSpace(v)
+			} else if v != "" {
+				c.Attributes[k] = v
+			}
+		}
+		select {
+		case out <- c:
+			row++
+			return nil
+		case <-ctx.Done():
+			return ctx.Err()
+		}
+	}
+
+	switch format {
+	case "jsonl":
+		dec := json.NewDecoder(br)
+		// 保留号码等数字列的原始写法
+		dec.UseNumber()
+		for {
+			var fields map[string]any
+			if err := dec.Decode(&fields); err == io.EOF {
+				return row, nil
+			} else if err != nil {
+				return row, fmt.Errorf("第 %d 行 JSON 解析失败: %w", row+1, err)
+			}
+			values := make(map[string]string, len(fields))
+			for k, v := range fields {
+				switch v := v.(type) {
+				case nil:
+				case string:
+					values[k] = v
+				default:
+					// 联系流属性只接受字符串
+					values[k] = fmt.Sprint(v)
+				}
+			}
+			if err := emit(values); err != nil {
+				return row, err
+			}
+		}
+	case "csv":
+		reader := csv.NewReader(br)
+		reader.FieldsPerRecord = -1
+		header, err := reader.Read()
+		if err == io.EOF {
+			return row, nil
+		} else if err != nil {
+			return row, fmt.Errorf("读取 CSV 表头失败: %w", err)
+		}
+		for {
+			record, err := reader.Read()
+			if err == io.EOF {
+				return row, nil
+			} else if err != nil {
+				return row, fmt.Errorf("第 %d 行 CSV 解析失败: %w", row+1, err)
+			}
+			values := make(map[string]string, len(header))
+			for i, name := range header {
+				if i < len(record) {
+					values[name] = record[i]
+				}
+			}
+			if err := emit(values); err != nil {
+				return row, err
+			}
+		}
+	default:
+		return row, fmt.Errorf("不支持的输入格式 %q", format)
+	}
+}
+
+// rateLimiter 按固定间隔为每次调用分配时间槽, 由所有 worker 共享; 空闲时最多积累 burst 个槽位.
+type rateLimiter struct {
+	mu       sync.Mutex
+	interval time.Duration
+	burst    int
+	next     time.Time
+}
+
+// newRateLimiter 返回每秒 rate 次的限速器, rate <= 0 时返回 nil (不限速).
+func newRateLimiter(rate float64, burst int) *rateLimiter {
+	if rate <= 0 {
+		return nil
+	}
+	if burst < 1 {
+		burst = 1
+	}
+	return &rateLimiter{interval: time.Duration(float64(time.Second) / rate), burst: burst}
+}
+
+func (l *rateLimiter) wait(ctx context.Context) error {
+	if l == nil {
+		return ctx.Err()
+	}
+	l.mu.Lock()
+	now := time.Now()
+	if earliest := now.Add(-time.Duration(l.burst-1) * l.interval); l.next.Before(earliest) {
+		l.next = earliest
+	}
+	slot := l.next
+	l.next = l.next.Add(l.interval)
+	l.mu.Unlock()
+
+	delay := time.Until(slot)
+	if delay <= 0 {
+		return ctx.Err()
+	}
+	timer := time.NewTimer(delay)
+	defer timer.Stop()
+	select {
+	case <-ctx.Done():
+		return ctx.Err()
+	case <-timer.C:
+		return nil
+	}
+}
+
+type latencySummary struct {
+	P50 float64 `json:"p50"`
+	P95 float64 `json:"p95"`
+	P99 float64 `json:"p99"`
+	Max float64 `json:"max"`
+}
+
+// summary 与 voice_outbound/stats.py 的 LatencyStats.summary 字段一致.
+type summary struct {
+	Total          int            `json:"total"`
+	Succeeded      int            `json:"succeeded"`
+	Failed         int            `json:"failed"`
+	Cancelled      int            `json:"cancelled,omitempty"`
+	ElapsedS       float64        `json:"elapsed_s"`
+	CallsPerSecond float64        `json:"calls_per_second"`
+	LatencyMs      latencySummary `json:"latency_ms"`
+}
+
+// percentile 最近秩法计算百分位数, sorted 需已排序.
+func percentile(sorted []float64, q float64) float64 {
+	if len(sorted) == 0 {
+		return 0
+	}
+	k := int(math.Ceil(q/100*float64(len(sorted)))) - 1
+	k = max(0, min(len(sorted)-1, k))
+	return sorted[k]
+}
+
+func round(v float64, digits int) float64 {
+	scale := math.Pow(10, float64(digits))
+	return math.Round(v*scale) / scale
+}
+
+// runBulk 用 workers 个 goroutine 消费 contacts 并外呼, 结果写入 w, 返回统计摘要.
+// ctx 取消后不再发起新的外呼, 已发出的请求照常等待返回并写出结果; 此后取到的联系人写出为 cancelled 并计入 Cancelled.
+// 结果在通道暂时为空或距上次写出超过 flushInterval 时写出, 进程被强制终止时最多丢失最近一批结果.
+func runBulk(ctx context.Context, contacts <-chan contact, dial dialFunc, limiter *rateLimiter, workers int, w io.Writer) (summary, error) {
+	started := time.Now()
+	results := make(chan result, workers*2)
+	callCtx := context.WithoutCancel(ctx)
+
+	var wg sync.WaitGroup
+	for i := 0; i < workers; i++ {
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			for c := range contacts {
+				res := result{Row: c.Row, Phone: c.Phone}
+				if c.Phone == "" {
+					res.Status, res.Error = statusFailed, "缺少电话号码"
+					results <- res
+					continue
+				}
+				if err := limiter.wait(ctx); err != nil {
+					res.Status, res.Error = statusCancelled, err.Error()
+					results <- res
+					continue
+				}
+				callStarted := time.Now()
+				contactID, err := dial(callCtx, c)
+				res.LatencyMs = round(float64(time.Since(callStarted))/float64(time.Millisecond), 1)
+				if err != nil {
+					res.Status, res.Error = statusFailed, err.Error()
+				} else {
+					res.Status, res.ContactID = statusDialed, contactID
+				}
+				results <- res
+			}
+		}()
+	}
+	go func() {
+		wg.Wait()
+		close(results)
+	}()
+
+	// 结果由单个 goroutine 写出与统计, 无需加锁
+	out := bufio.NewWriterSize(w, 64*1024)
+	enc := json.NewEncoder(out)
+	enc.SetEscapeHTML(false)
+	var (
+		s         summary
+		latencies []float64
+		writeErr  error
+		lastFlush = time.Now()
+	)
+	for res := range results {
+		switch res.Status {
+		case statusDialed:
+			s.Succeeded++
+		case statusCancelled:
+			s.Cancelled++
+		default:
+			s.Failed++
+		}
+		if res.LatencyMs > 0 {
+			latencies = append(latencies, res.LatencyMs)
+		}
+		if writeErr == nil {
+			writeErr = enc.Encode(res)
+		}
+		if writeErr == nil && (len(results) == 0 || time.Since(lastFlush) >= flushInterval) {
+			writeErr = out.Flush()
+			lastFlush = time.Now()
+		}
+	}
+	if err := out.Flush(); writeErr == nil {
+		writeErr = err
+	}
+
+	elapsed := time.Since(started).Seconds()
+	sort.Float64s(latencies)
+	s.Total = s.Succeeded + s.Failed
+	s.ElapsedS = round(elapsed, 3)
+	if elapsed > 0 {
+		s.CallsPerSecond = round(float64(s.Total)/elapsed, 2)
+	}
+	s.LatencyMs = latencySummary{
+		P50: percentile(latencies, 50),
+		P95: percentile(latencies, 95),
+		P99: percentile(latencies, 99),
+	}
+	if len(latencies) > 0 {
+		s.LatencyMs.Max = latencies[len(latencies)-1]
+	}
+	if writeErr != nil {
+		writeErr = errors.Join(errors.New("写出结果失败"), writeErr)
+	}
+	return s, writeErr
+}
+
+// runBulkMode 执行批量外呼并返回进程退出码: 全部成功为 0, 有失败为 1, 输入输出错误为 2, 被中断为 3.
+func runBulkMode(ctx context.Context, dial dialFunc, input, format, output, language string, workers int, rate float64, burst int) int {
+	var in io.Reader = os.Stdin
+	if input != "-" {
+		f, err := os.Open(input)
+		if err != nil {
+			log.Printf("打开联系人文件失败: %v", err)
+			return 2
+		}
+		defer f.Close()
+		in = f
+		if format == "auto" {
+			switch {
+			case strings.HasSuffix(input, ".jsonl"), strings.HasSuffix(input, ".ndjson"), strings.HasSuffix(input, ".json"):
+				format = "jsonl"
+			case strings.HasSuffix(input, ".csv"):
+				format = "csv"
+			}
+		}
+	}
+	var out io.Writer = os.Stdout
+	if output != "" {
+		f, err := os.OpenFile(output, os.O_CREATE|os.O_WRONLY|os.O_APPEND, 0o644)
+		if err != nil {
+			log.Printf("打开结果文件失败: %v", err)
+			return 2
+		}
+		defer f.Close()
+		out = f
+	}
+	if workers < 1 {
+		workers = 1
+	}
+
+	// 读取与外呼并行: 有界通道限制预读的联系人数量
+	contacts := make(chan contact, workers*2)
+	type readResult struct {
+		rows int
+		err  error
+	}
+	read := make(chan readResult, 1)
+	go func() {
+		defer close(contacts)
+		rows, err := readContacts(ctx, in, format, map[string]string{"Language": language}, contacts)
+		read <- readResult{rows, err}
+	}()
+
+	log.Printf("拨号速率 %.2f calls/s, 并发 %d", rate, workers)
+	s, err := runBulk(ctx, contacts, dial, newRateLimiter(rate, burst), workers, out)
+	summaryJSON, _ := json.Marshal(s)
+	fmt.Fprintln(os.Stderr, string(summaryJSON))
+	r := <-read
+	if r.err != nil && !errors.Is(r.err, context.Canceled) {
+		log.Printf("读取联系人失败: %v", r.err)
+		return 2
+	}
+	if err != nil {
+		log.Print(err)
+		return 2
+	}
+	if s.Cancelled > 0 || r.err != nil {
+		// 结果中 cancelled 的行与第 rows 行之后的联系人均未外呼
+		log.Printf("已中断: %d 个已读取的联系人未外呼 (记为 cancelled), 第 %d 行及之后未读取", s.Cancelled, r.rows)
+		return 3
+	}
+	if s.Failed > 0 {
+		return 1
+	}
+	return 0
+}
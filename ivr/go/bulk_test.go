@@ -0,0 +1,355 @@
+package main
+
+import (
+	"bufio"
+	"bytes"
+	"context"
+	"encoding/json"
+	"errors"
+	"fmt"
+	"os"
+	"path/filepath"
+	"reflect"
+	"sort"
+	"strings"
+	"sync"
+	"testing"
+	"time"
+)
+
+func collect(t *testing.T, input, format string) ([]contact, int, error) {
+	t.Helper()
+	out := make(chan contact, 16)
+	rows, err := readContacts(context.Background(), strings.NewReader(input), format, map[string]string{"Language": "ZH"}, out)
+	close(out)
+	var contacts []contact
+	for c := range out {
+		contacts = append(contacts, c)
+	}
+	return contacts, rows, err
+}
+
+func TestReadContacts(t *testing.T) {
+	tests := []struct {
+		name    string
+		input   string
+		format  string
+		want    []contact
+		wantErr string
+	}{
+		{
+			name:   "csv with BOM",
+			input:  "\ufeffphone,UserName\n+8613800000001,康先生\n",
+			format: "auto",
+			want: []contact{
+				{Row: 0, Phone: "+8613800000001", Attributes: map[string]string{"Language": "ZH", "UserName": "康先生"}},
+			},
+		},
+		{
+			name:   "csv short record and empty values",
+			input:  "DestinationPhoneNumber,UserName,Language\n+1,,EN\n+2\n",
+			format: "csv",
+			want: []contact{
+				{Row: 0, Phone: "+1", Attributes: map[string]string{"Language": "EN"}},
+				{Row: 1, Phone: "+2", Attributes: map[string]string{"Language": "ZH"}},
+			},
+		},
+		{
+			name:   "jsonl detected after whitespace keeps numbers as written",
+			input:  "  \n{\"phone_number\": \" +3 \", \"DueAmount\": 4478.670, \"Note\": null}\n{\"phone\": \"+4\"}\n",
+			format: "auto",
+			want: []contact{
+				{Row: 0, Phone: "+3", Attributes: map[string]string{"Language": "ZH", "DueAmount": "4478.670"}},
+				{Row: 1, Phone: "+4", Attributes: map[string]string{"Language": "ZH"}},
+			},
+		},
+		{
+			name:    "invalid json reports the row",
+			input:   "{\"phone\": \"+1\"}\n{\"phone\": \n",
+			format:  "jsonl",
+			want:    []contact{{Row: 0, Phone: "+1", Attributes: map[string]string{"Language": "ZH"}}},
+			wantErr: "第 2 行 JSON 解析失败",
+		},
+		{
+			name:    "unsupported format",
+			input:   "phone\n+1\n",
+			format:  "xml",
+			wantErr: "不支持的输入格式",
+		},
+		{
+			name:   "empty input",
+			input:  "",
+			format: "auto",
+		},
+	}
+	for _, tt := range tests {
+		t.Run(tt.name, func(t *testing.T) {
+			got, rows, err := collect(t, tt.input, tt.format)
+			if tt.wantErr == "" && err != nil {
+				t.Fatalf("unexpected error: %v", err)
+			}
+			if tt.wantErr != "" && (err == nil || !strings.Contains(err.Error(), tt.wantErr)) {
+				t.Fatalf("error = %v, want %q", err, tt.wantErr)
+			}
+			if !reflect.DeepEqual(got, tt.want) {
+				t.Fatalf("contacts = %+v, want %+v", got, tt.want)
+			}
+			if rows != len(tt.want) {
+				t.Fatalf("rows = %d, want %d", rows, len(tt.want))
+			}
+		})
+	}
+}
+
+func TestReadContactsStopsOnCancel(t *testing.T) {
+	ctx, cancel := context.WithCancel(context.Background())
+	out := make(chan contact)
+	done := make(chan struct{})
+	var rows int
+	var err error
+	go func() {
+		rows, err = readContacts(ctx, strings.NewReader("phone\n+1\n+2\n+3\n"), "csv", nil, out)
+		close(done)
+	}()
+	<-out
+	cancel()
+	<-done
+	if !errors.Is(err, context.Canceled) {
+		t.Fatalf("err = %v, want context.Canceled", err)
+	}
+	// 只有第一行送出, 第二行在取消时仍未被取走
+	if rows != 1 {
+		t.Fatalf("rows = %d, want 1", rows)
+	}
+}
+
+func TestRateLimiter(t *testing.T) {
+	tests := []struct {
+		name     string
+		rate     float64
+		burst    int
+		calls    int
+		min, max time.Duration
+	}{
+		{name: "unlimited", rate: 0, calls: 100, min: 0, max: 50 * time.Millisecond},
+		{name: "spaced", rate: 50, burst: 1, calls: 6, min: 90 * time.Millisecond, max: 400 * time.Millisecond},
+		{name: "burst is immediate", rate: 10, burst: 5, calls: 5, min: 0, max: 50 * time.Millisecond},
+		{name: "after burst", rate: 20, burst: 3, calls: 5, min: 90 * time.Millisecond, max: 400 * time.Millisecond},
+	}
+	for _, tt := range tests {
+		t.Run(tt.name, func(t *testing.T) {
+			limiter := newRateLimiter(tt.rate, tt.burst)
+			if (limiter == nil) != (tt.rate <= 0) {
+				t.Fatalf("newRateLimiter(%v) = %v", tt.rate, limiter)
+			}
+			started := time.Now()
+			for i := 0; i < tt.calls; i++ {
+				if err := limiter.wait(context.Background()); err != nil {
+					t.Fatal(err)
+				}
+			}
+			if elapsed := time.Since(started); elapsed < tt.min || elapsed > tt.max {
+				t.Fatalf("%d calls took %v, want [%v, %v]", tt.calls, elapsed, tt.min, tt.max)
+			}
+		})
+	}
+}
+
+func TestRateLimiterCancel(t *testing.T) {
+	limiter := newRateLimiter(0.1, 1)
+	limiter.wait(context.Background())
+	ctx, cancel := context.WithTimeout(context.Background(), 20*time.Millisecond)
+	defer cancel()
+	started := time.Now()
+	if err := limiter.wait(ctx); !errors.Is(err, context.DeadlineExceeded) {
+		t.Fatalf("err = %v, want deadline exceeded", err)
+	}
+	if time.Since(started) > time.Second {
+		t.Fatal("wait did not return on cancel")
+	}
+	var nilLimiter *rateLimiter
+	if err := nilLimiter.wait(ctx); err == nil {
+		t.Fatal("nil limiter ignored a cancelled context")
+	}
+}
+
+func feed(contacts ...contact) <-chan contact {
+	ch := make(chan contact, len(contacts))
+	for _, c := range contacts {
+		ch <- c
+	}
+	close(ch)
+	return ch
+}
+
+func decode(t *testing.T, data []byte) map[string]result {
+	t.Helper()
+	results := map[string]result{}
+	scanner := bufio.NewScanner(bytes.NewReader(data))
+	for scanner.Scan() {
+		var res result
+		if err := json.Unmarshal(scanner.Bytes(), &res); err != nil {
+			t.Fatalf("invalid result line %q: %v", scanner.Text(), err)
+		}
+		results[res.Phone] = res
+	}
+	return results
+}
+
+func TestRunBulk(t *testing.T) {
+	fail := errors.New("InvalidParameterException")
+	dial := func(ctx context.Context, c contact) (string, error) {
+		if c.Phone == "+bad" {
+			return "", fail
+		}
+		return "id-" + c.Phone, nil
+	}
+	tests := []struct {
+		name     string
+		contacts []contact
+		want     map[string]string
+		summary  summary
+	}{
+		{
+			name:     "all dialed",
+			contacts: []contact{{Row: 0, Phone: "+1"}, {Row: 1, Phone: "+2"}},
+			want:     map[string]string{"+1": statusDialed, "+2": statusDialed},
+			summary:  summary{Total: 2, Succeeded: 2},
+		},
+		{
+			name:     "dial error and missing phone",
+			contacts: []contact{{Row: 0, Phone: "+1"}, {Row: 1, Phone: "+bad"}, {Row: 2}},
+			want:     map[string]string{"+1": statusDialed, "+bad": statusFailed, "": statusFailed},
+			summary:  summary{Total: 3, Succeeded: 1, Failed: 2},
+		},
+	}
+	for _, tt := range tests {
+		t.Run(tt.name, func(t *testing.T) {
+			var out bytes.Buffer
+			s, err := runBulk(context.Background(), feed(tt.contacts...), dial, nil, 4, &out)
+			if err != nil {
+				t.Fatal(err)
+			}
+			results := decode(t, out.Bytes())
+			got := map[string]string{}
+			for phone, res := range results {
+				got[phone] = res.Status
+				if res.Status == statusDialed && res.ContactID != "id-"+phone {
+					t.Fatalf("contact_id = %q for %s", res.ContactID, phone)
+				}
+			}
+			if !reflect.DeepEqual(got, tt.want) {
+				t.Fatalf("statuses = %v, want %v", got, tt.want)
+			}
+			if s.Total != tt.summary.Total || s.Succeeded != tt.summary.Succeeded || s.Failed != tt.summary.Failed || s.Cancelled != 0 {
+				t.Fatalf("summary = %+v, want %+v", s, tt.summary)
+			}
+		})
+	}
+}
+
+func TestRunBulkReportsCancelledContacts(t *testing.T) {
+	ctx, cancel := context.WithCancel(context.Background())
+	var dialed sync.Map
+	dial := func(ctx context.Context, c contact) (string, error) {
+		dialed.Store(c.Phone, true)
+		// 第一通外呼期间收到中断
+		cancel()
+		if ctx.Err() != nil {
+			t.Error("in-flight dial was cancelled")
+		}
+		return "id", nil
+	}
+	var contacts []contact
+	for i := 0; i < 10; i++ {
+		contacts = append(contacts, contact{Row: i, Phone: fmt.Sprintf("+%d", i)})
+	}
+	var out bytes.Buffer
+	s, err := runBulk(ctx, feed(contacts...), dial, nil, 1, &out)
+	if err != nil {
+		t.Fatal(err)
+	}
+	if s.Succeeded != 1 || s.Cancelled != 9 || s.Failed != 0 {
+		t.Fatalf("summary = %+v, want 1 dialed and 9 cancelled", s)
+	}
+	var cancelled []string
+	for phone, res := range decode(t, out.Bytes()) {
+		if res.Status == statusCancelled {
+			if _, ok := dialed.Load(phone); ok {
+				t.Fatalf("%s dialed but reported cancelled", phone)
+			}
+			cancelled = append(cancelled, phone)
+		}
+	}
+	sort.Strings(cancelled)
+	if len(cancelled) != 9 {
+		t.Fatalf("cancelled rows = %v", cancelled)
+	}
+}
+
+// lineWriter 把每次写出的行发送到 lines, 用于观察结果何时落盘.
+type lineWriter struct{ lines chan string }
+
+func (w lineWriter) Write(p []byte) (int, error) {
+	for _, line := range strings.SplitAfter(string(p), "\n") {
+		if line != "" {
+			w.lines <- line
+		}
+	}
+	return len(p), nil
+}
+
+func TestRunBulkFlushesBeforeTheRunEnds(t *testing.T) {
+	release := make(chan struct{})
+	dial := func(ctx context.Context, c contact) (string, error) {
+		if c.Row == 1 {
+			<-release
+		}
+		return "id", nil
+	}
+	w := lineWriter{lines: make(chan string, 4)}
+	done := make(chan struct{})
+	go func() {
+		runBulk(context.Background(), feed(contact{Row: 0, Phone: "+1"}, contact{Row: 1, Phone: "+2"}), dial, nil, 2, w)
+		close(done)
+	}()
+	select {
+	case line := <-w.lines:
+		if !strings.Contains(line, `"phone":"+1"`) {
+			t.Fatalf("first line = %q", line)
+		}
+	case <-time.After(2 * time.Second):
+		t.Fatal("first result was not written while the second call was in flight")
+	}
+	close(release)
+	<-done
+}
+
+func TestRunBulkModeExitCodes(t *testing.T) {
+	dir := t.TempDir()
+	input := filepath.Join(dir, "contacts.csv")
+	if err := os.WriteFile(input, []byte("phone\n+1\n+2\n"), 0o644); err != nil {
+		t.Fatal(err)
+	}
+	dial := func(ctx context.Context, c contact) (string, error) { return "id", nil }
+	cancelled, cancel := context.WithCancel(context.Background())
+	cancel()
+	tests := []struct {
+		name  string
+		ctx   context.Context
+		input string
+		want  int
+	}{
+		{name: "success", ctx: context.Background(), input: input, want: 0},
+		{name: "interrupted", ctx: cancelled, input: input, want: 3},
+		{name: "missing input", ctx: context.Background(), input: filepath.Join(dir, "missing.csv"), want: 2},
+	}
+	for _, tt := range tests {
+		t.Run(tt.name, func(t *testing.T) {
+			output := filepath.Join(dir, tt.name+".jsonl")
+			if got := runBulkMode(tt.ctx, dial, tt.input, "auto", output, "ZH", 2, 0, 1); got != tt.want {
+				t.Fatalf("exit code = %d, want %d", got, tt.want)
+			}
+		})
+	}
+}
@@ -1,11 +1,17 @@
 // Command voice_outbound_ivr 通过 AWS SDK for Go v2 调用 Amazon Connect 的
-// StartOutboundVoiceContact API 发起一通外呼电话。
+// StartOutboundVoiceContact API 发起外呼电话.
 //
 // 参考文档:
-//   https://pkg.go.dev/github.com/aws/aws-sdk-go-v2/service/connect#Client.StartOutboundVoiceContact
+//
+//	https://pkg.go.dev/github.com/aws/aws-sdk-go-v2/service/connect#Client.StartOutboundVoiceContact
 //
 // 参数取值与同目录下 voice_outbound_ivr.py 中的默认值保持一致，可通过命令行
 // 标志覆盖。
+//
+// 指定 -input 时进入批量模式 (见 bulk.go): 从 CSV/JSONL 文件或标准输入 (-input -) 读取联系人,
+// 由 -workers 个 goroutine 共享一个 SDK 客户端与 -rate 限速器并发外呼, 结果以 JSONL 写入 -output,
+// 结束时在标准错误输出吞吐与延迟百分位. 收到 SIGINT / SIGTERM 后不再发起新的外呼, 已读取的联系人记为
+// cancelled, 退出码为 3. -endpoint-url 可指向本地桩服务 (benchmarks/connect_stub.py).
 package main
 
 import (
@@ -13,9 +19,13 @@ import (
 	"flag"
 	"fmt"
 	"log"
+	"net/http"
 	"os"
+	"os/signal"
+	"syscall"
 
 	"github.com/aws/aws-sdk-go-v2/aws"
+	awshttp "github.com/aws/aws-sdk-go-v2/aws/transport/http"
 	"github.com/aws/aws-sdk-go-v2/config"
 	"github.com/aws/aws-sdk-go-v2/service/connect"
 )
@@ -29,6 +39,14 @@ func main() {
 		sourcePhoneNumber string
 		language          string
 		region            string
+		endpointURL       string
+		input             string
+		format            string
+		output            string
+		workers           int
+		rate              float64
+		burst             int
+		maxAttempts       int
 	)
 
 	flag.StringVar(&phoneNumber, "phone-number", "+12285332612", "目标电话号码 (E.164 格式), 对应 DestinationPhoneNumber")
@@ -38,18 +56,35 @@ func main() {
 	flag.StringVar(&sourcePhoneNumber, "source-phone-number", "+13072633584", "主叫号码 (可选, 留空则不传), 对应 SourcePhoneNumber")
 	flag.StringVar(&language, "language", "ZH", "Attributes.Language 的值")
 	flag.StringVar(&region, "region", "", "AWS 区域 (留空则使用环境变量或默认配置)")
+	flag.StringVar(&endpointURL, "endpoint-url", "", "自定义 Connect endpoint (例如本地桩服务 http://127.0.0.1:8765)")
+	flag.StringVar(&input, "input", "", "批量模式: 联系人 CSV/JSONL 文件, - 为标准输入")
+	flag.StringVar(&format, "format", "auto", "批量模式: 输入格式 csv, jsonl 或 auto")
+	flag.StringVar(&output, "output", "", "批量模式: 结果 JSONL 文件 (默认输出到标准输出)")
+	flag.IntVar(&workers, "workers", 16, "批量模式: 并发 goroutine 数")
+	flag.Float64Var(&rate, "rate", 5, "批量模式: 每秒外呼次数上限 (实例 TPS 配额), 0 为不限速")
+	flag.IntVar(&burst, "burst", 1, "批量模式: 限速器允许的突发次数")
+	flag.IntVar(&maxAttempts, "max-attempts", 3, "SDK 对限流/临时错误的最大尝试次数")
 	flag.Parse()
 
-	if phoneNumber == "" || instanceID == "" || contactFlowID == "" {
-		log.Println("phone-number, instance-id, contact-flow-id 均为必填")
+	if instanceID == "" || contactFlowID == "" || (input == "" && phoneNumber == "") {
+		log.Println("phone-number (或 input), instance-id, contact-flow-id 均为必填")
 		flag.Usage()
 		os.Exit(2)
 	}
 
-	ctx := context.Background()
+	ctx, stop := signal.NotifyContext(context.Background(), os.Interrupt, syscall.SIGTERM)
+	defer stop()
 
 	// 加载默认 AWS 配置 (环境变量, ~/.aws/credentials, ~/.aws/config 等).
-	loadOpts := []func(*config.LoadOptions) error{}
+	// 连接池大小与并发数一致, 所有 worker 复用同一批 keep-alive 连接.
+	httpClient := awshttp.NewBuildableClient().WithTransportOptions(func(t *http.Transport) {
+		t.MaxIdleConns = workers
+		t.MaxIdleConnsPerHost = workers
+	})
+	loadOpts := []func(*config.LoadOptions) error{
+		config.WithHTTPClient(httpClient),
+		config.WithRetryMaxAttempts(maxAttempts),
+	}
 	if region != "" {
 		loadOpts = append(loadOpts, config.WithRegion(region))
 	}
@@ -58,26 +93,43 @@ func main() {
 		log.Fatalf("加载 AWS 配置失败: %v", err)
 	}
 
-	client := connect.NewFromConfig(cfg)
+	client := connect.NewFromConfig(cfg, func(o *connect.Options) {
+		if endpointURL != "" {
+			o.BaseEndpoint = aws.String(endpointURL)
+		}
+	})
 
-	input := &connect.StartOutboundVoiceContactInput{
-		DestinationPhoneNumber: aws.String(phoneNumber),
-		ContactFlowId:          aws.String(contactFlowID),
-		InstanceId:             aws.String(instanceID),
-		Attributes: map[string]string{
-			"UserName": userName,
-			"Language": language,
-		},
+	dial := func(ctx context.Context, c contact) (string, error) {
+		params := &connect.StartOutboundVoiceContactInput{
+			DestinationPhoneNumber: aws.String(c.Phone),
+			ContactFlowId:          aws.String(contactFlowID),
+			InstanceId:             aws.String(instanceID),
+			Attributes:             c.Attributes,
+		}
+		if sourcePhoneNumber != "" {
+			params.SourcePhoneNumber = aws.String(sourcePhoneNumber)
+		}
+		resp, err := client.StartOutboundVoiceContact(ctx, params)
+		if err != nil {
+			return "", err
+		}
+		return aws.ToString(resp.ContactId), nil
 	}
 
-	if sourcePhoneNumber != "" {
-		input.SourcePhoneNumber = aws.String(sourcePhoneNumber)
+	if input != "" {
+		os.Exit(runBulkMode(ctx, dial, input, format, output, language, workers, rate, burst))
 	}
 
-	resp, err := client.StartOutboundVoiceContact(ctx, input)
+	contactID, err := dial(ctx, contact{
+		Phone: phoneNumber,
+		Attributes: map[string]string{
+			"UserName": userName,
+			"Language": language,
+		},
+	})
 	if err != nil {
 		log.Fatalf("外呼失败: %v", err)
 	}
 
-	fmt.Printf("成功发起外呼电话到 %s, ContactId: %s\n", phoneNumber, aws.ToString(resp.ContactId))
+	fmt.Printf("成功发起外呼电话到 %s, ContactId: %s\n", phoneNumber, contactID)
 }
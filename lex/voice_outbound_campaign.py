@@ -0,0 +1,80 @@
+import streamlit as st
+import sys
+from pathlib import Path
+
+# 使仓库根目录下的公共模块 voice_outbound 可被导入
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound.campaign import COLUMNS, CampaignAggregator
+from voice_outbound.outcomes import format_local
+
+# 初始化页面配置
+st.set_page_config(page_title="外呼任务看板", page_icon="📊", layout="wide")
+
+# 设置页面标题
+st.title("外呼任务看板")
+
+# 每组文件只创建一个汇总线程，跨页面重跑与会话共享；页面交互不会重新读取文件
+@st.cache_resource
+def get_aggregator(results_path, outcomes_path):
+    aggregator = CampaignAggregator(results_path, outcomes_path or None)
+    # 首次同步读取，页面第一次渲染即有数据
+    aggregator.poll()
+    return aggregator.start()
+
+with st.sidebar:
+    results_path = st.text_input("外呼结果文件", value="results.jsonl", help="python -m voice_outbound.dialer --output 写出的 JSONL")
+    outcomes_path = st.text_input("终态结果文件（可选）", value="outcomes.jsonl", help="voice_outbound.tracker / events 写出的 JSONL")
+    refresh_seconds = st.slider("刷新间隔（秒）", 1, 30, 2)
+
+if not results_path:
+    st.info("请输入外呼结果文件")
+    st.stop()
+
+aggregator = get_aggregator(results_path, outcomes_path)
+
+# 指标区按间隔局部刷新，只读取内存中的计数器
+@st.fragment(run_every=refresh_seconds)
+def metrics():
+    snapshot = aggregator.snapshot()
+    columns = st.columns(5)
+    columns[0].metric("联系人", f"{snapshot['contacts']:,}")
+    columns[1].metric("已外呼", f"{snapshot['dialed']:,}")
+    columns[2].metric("已接通", f"{snapshot['connected']:,}")
+    columns[3].metric("已挂断", f"{snapshot['disconnected']:,}")
+    columns[4].metric("calls/second", snapshot['calls_per_second'])
+
+    left, middle, right = st.columns(3)
+    left.caption("外呼状态")
+    left.bar_chart(snapshot['statuses'], horizontal=True)
+    middle.caption("应答检测 amd_result")
+    middle.bar_chart(snapshot['amd_results'], horizontal=True)
+    right.caption("挂断原因 DisconnectReason")
+    right.bar_chart(snapshot['disconnect_reasons'], horizontal=True)
+
+    if snapshot['updated']:
+        st.caption(f"最后更新: {format_local(snapshot['updated'])}，等待外呼结果的终态记录 {snapshot['pending_outcomes']} 条")
+
+# 联系人表：服务端分页，翻页与筛选只重跑该片段，每次只取一页数据
+@st.fragment
+def contacts_table():
+    filters = st.columns(4)
+    status = filters[0].selectbox("外呼状态", [None] + aggregator.values('status'), format_func=lambda v: v or "全部")
+    amd_result = filters[1].selectbox("amd_result", [None] + aggregator.values('amd_result'), format_func=lambda v: v or "全部")
+    disconnect_reason = filters[2].selectbox("挂断原因", [None] + aggregator.values('disconnect_reason'), format_func=lambda v: v or "全部")
+    page_size = filters[3].selectbox("每页行数", [50, 100, 500], index=1)
+
+    query = dict(status=status, amd_result=amd_result, disconnect_reason=disconnect_reason)
+    # 总行数取自汇总计数器，只有取当前页时才逐行匹配
+    total = aggregator.count(**query)
+    pages = max(1, -(-total // page_size))
+    page_number = st.number_input(f"页码（共 {pages} 页，{total:,} 行）", min_value=1, max_value=pages, value=1)
+    rows = aggregator.page((page_number - 1) * page_size, page_size, newest_first=True, **query)
+    for row in rows:
+        for field in ('connected', 'disconnected'):
+            if row[field] is not None:
+                row[field] = format_local(row[field])
+    st.dataframe(rows, column_order=COLUMNS, hide_index=True, width="stretch")
+    st.button("刷新表格")
+
+metrics()
+contacts_table()
@@ -1,5 +1,11 @@
 import streamlit as st
-import boto3
+import sys
+from pathlib import Path
+
+# 使仓库根目录下的公共模块 voice_outbound 可被导入
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound.call import start_outbound_voice_call
+from voice_outbound.hygiene import normalize_e164
 
 # 初始化页面配置
 st.set_page_config(page_title="语音外呼Demo", page_icon="📞")
@@ -7,43 +13,6 @@ st.set_page_config(page_title="语音外呼Demo", page_icon="📞")
 # 设置页面标题
 st.title("语音外呼Demo")
 
-# 外呼语音通话函数
-def start_outbound_voice_call(
-    phone_number,
-    user_name,
-    connect_instance_id,
-    contact_flow_id,
-    source_phone_number=None
-):
-    try:
-        # 初始化 Amazon Connect 客户端
-        connect_client = boto3.client('connect')
-        
-        # 准备默认属性
-        attributes = {'UserName': user_name, "Language": 'ZH'}
-        
-        # 准备 API 调用参数
-        params = {
-            'DestinationPhoneNumber': phone_number,
-            'ContactFlowId': contact_flow_id,
-            'InstanceId': connect_instance_id,
-            'Attributes': attributes
-        }
-        
-        # 添加可选参数（如果提供）
-        if source_phone_number:
-            params['SourcePhoneNumber'] = source_phone_number
-        
-        # 发起外呼电话
-        response = connect_client.start_outbound_voice_contact(**params)
-        
-        print(f"成功发起外呼电话到 {phone_number}，ContactId: {response['ContactId']}")
-        return response
-        
-    except Exception as e:
-        print(f"发生未预期的错误: {str(e)}")
-        raise
-
 # 创建表单
 with st.form("outbound_form"):
     # 用户名称输入
@@ -55,7 +24,7 @@ with st.form("outbound_form"):
     phone_number = st.text_input("请输入手机号码", 
                                 placeholder="+12285332612",
                                 value="+12285332612",
-                                max_chars=12)
+                                max_chars=20)
     
     # 配置项折叠
     with st.expander("配置项", expanded=False):
@@ -65,9 +34,11 @@ with st.form("outbound_form"):
     
     # 外呼按钮
     if st.form_submit_button("外呼"):
+        # 规范化为 E.164（允许空格、括号、连字符等分隔符，不带国家码时按北美 +1 补全）
+        destination = normalize_e164(phone_number)
         if not user_name.strip():
             st.error("请输入用户名称")
-        elif not phone_number or len(phone_number) != 12:
+        elif not destination:
             st.error("请输入有效的手机号码")
         elif not connect_instance_id:
             st.error("请输入Connect实例ID")
@@ -76,10 +47,10 @@ with st.form("outbound_form"):
         else:
             try:
                 response = start_outbound_voice_call(
-                    phone_number=phone_number,
-                    user_name=user_name,
-                    connect_instance_id=connect_instance_id,
-                    contact_flow_id=contact_flow_id,
+                    destination,
+                    connect_instance_id,
+                    contact_flow_id,
+                    {'UserName': user_name, "Language": 'ZH'},
                     source_phone_number=source_phone_number if source_phone_number else None
                 )
                 st.success(f"外呼成功！ContactId: {response['ContactId']}")
@@ -1,7 +1,14 @@
 import streamlit as st
-import boto3
 import pandas as pd
 from datetime import datetime, timezone
+import sys
+from pathlib import Path
+
+# 使仓库根目录下的公共模块 voice_outbound 可被导入
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound.call import describe_contact, start_outbound_voice_call
+from voice_outbound.hygiene import normalize_e164
+from voice_outbound.outcomes import parse_contact
 
 # 初始化页面配置
 st.set_page_config(page_title="语音外呼Demo", page_icon="📞")
@@ -9,43 +16,6 @@ st.set_page_config(page_title="语音外呼Demo", page_icon="📞")
 # 设置页面标题
 st.title("语音外呼Demo")
 
-# 外呼语音通话函数
-def start_outbound_voice_call(
-    phone_number,
-    user_name,
-    connect_instance_id,
-    contact_flow_id,
-    source_phone_number=None
-):
-    try:
-        # 初始化 Amazon Connect 客户端
-        connect_client = boto3.client('connect')
-        
-        # 准备默认属性
-        attributes = {'UserName': user_name}
-        
-        # 准备 API 调用参数
-        params = {
-            'DestinationPhoneNumber': phone_number,
-            'ContactFlowId': contact_flow_id,
-            'InstanceId': connect_instance_id,
-            'Attributes': attributes
-        }
-        
-        # 添加可选参数（如果提供）
-        if source_phone_number:
-            params['SourcePhoneNumber'] = source_phone_number
-        
-        # 发起外呼电话
-        response = connect_client.start_outbound_voice_contact(**params)
-        
-        print(f"成功发起外呼电话到 {phone_number}，ContactId: {response['ContactId']}")
-        return response
-        
-    except Exception as e:
-        print(f"发生未预期的错误: {str(e)}")
-        raise
-
 # 创建表单
 with st.form("outbound_form"):
     # 用户名称输入
@@ -58,7 +28,7 @@ with st.form("outbound_form"):
     phone_number = st.text_input("请输入手机号码", 
                                 placeholder="+12285332612",
                                 value="+525593312700",
-                                max_chars=13)
+                                max_chars=20)
     
     # 配置项折叠
     # connect-us-finance.my.connect.aws
@@ -70,9 +40,11 @@ with st.form("outbound_form"):
     
     # 外呼按钮
     if st.form_submit_button("外呼"):
+        # 规范化为 E.164（允许空格、括号、连字符等分隔符，不带国家码时按墨西哥 +52 补全）
+        destination = normalize_e164(phone_number, '52')
         if not user_name.strip():
             st.error("请输入用户名称")
-        elif not phone_number or len(phone_number) > 13:
+        elif not destination:
             st.error("请输入有效的手机号码")
         elif not connect_instance_id:
             st.error("请输入Connect实例ID")
@@ -81,10 +53,10 @@ with st.form("outbound_form"):
         else:
             try:
                 response = start_outbound_voice_call(
-                    phone_number=phone_number,
-                    user_name=user_name,
-                    connect_instance_id=connect_instance_id,
-                    contact_flow_id=contact_flow_id,
+                    destination,
+                    connect_instance_id,
+                    contact_flow_id,
+                    {'UserName': user_name},
                     source_phone_number=source_phone_number if source_phone_number else None
                 )
                 st.success("外呼成功！")
@@ -103,44 +75,16 @@ with st.form("outbound_form"):
 if st.button("更新"):
     if 'contact_id' in st.session_state:
         try:
-            connect_client = boto3.client('connect')
-            response = connect_client.describe_contact(
-                InstanceId=st.session_state.connect_instance_id,
-                ContactId=st.session_state.contact_id
-            )
+            contact = describe_contact(st.session_state.connect_instance_id, st.session_state.contact_id)
             
-            contact = response['Contact']
+            # 时间戳、DisconnectReason 与 amd_result 的解析与批量跟踪共用
+            outcome = parse_contact(contact)
             
             names = ["ContactId", "StartTime"]
             values = [st.session_state.contact_id, st.session_state.df.iloc[1]['Value']]
-            
-            if 'InitiationTimestamp' in contact:
-                names.append("InitiationTimestamp")
-                local_time = contact['InitiationTimestamp'].astimezone()
-                values.append(local_time.strftime('%Y-%m-%d %H:%M:%S'))
-            
-            if 'ConnectedToSystemTimestamp' in contact:
-                names.append("ConnectedToSystemTimestamp")
-                local_time = contact['ConnectedToSystemTimestamp'].astimezone()
-                values.append(local_time.strftime('%Y-%m-%d %H:%M:%S'))
-            
-            if 'AgentInfo' in contact and 'ConnectedToAgentTimestamp' in contact['AgentInfo']:
-                names.append("ConnectedToAgentTimestamp")
-                local_time = contact['AgentInfo']['ConnectedToAgentTimestamp'].astimezone()
-                values.append(local_time.strftime('%Y-%m-%d %H:%M:%S'))
-            
-            if 'DisconnectTimestamp' in contact:
-                names.append("DisconnectTimestamp")
-                local_time = contact['DisconnectTimestamp'].astimezone()
-                values.append(local_time.strftime('%Y-%m-%d %H:%M:%S'))
-            
-            if 'DisconnectReason' in contact:
-                names.append("DisconnectReason")
-                values.append(contact['DisconnectReason'])
-            
-            if 'Attributes' in contact and 'amd_result' in contact['Attributes']:
-                names.append("amd_result")
-                values.append(contact['Attributes']['amd_result'])
+            for name, value in outcome.rows():
+                names.append(name)
+                values.append(value)
             
             st.session_state.df = pd.DataFrame({"Name": names, "Value": values})
             st.success("记录已更新！")
@@ -164,12 +108,8 @@ if st.download_button(
 if st.button("加载通话"):
     if 'contact_id' in st.session_state:
         try:
-                connect_client = boto3.client('connect')
-                response = connect_client.describe_contact(
-                    InstanceId=st.session_state.connect_instance_id,
-                    ContactId=st.session_state.contact_id
-                )
+                contact = describe_contact(st.session_state.connect_instance_id, st.session_state.contact_id)
                 
-                st.write(response)
+                st.write({'Contact': contact})
         except Exception as e:
                 st.error(f"加载失败: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,31 @@
+"""将 lambda/ 目录下的源码打包为 voice_outbound_llm_lambda.zip
+
+固定文件时间戳与顺序，源码不变时生成的 zip 字节完全一致，便于按内容哈希判断是否需要重新部署。
+
+    python llm/build_lambda_zip.py
+"""
+import zipfile
+from pathlib import Path
+
+SOURCE_DIR = Path(__file__).parent / "lambda"
+ZIP_PATH = Path(__file__).parent / "voice_outbound_llm_lambda.zip"
+FIXED_DATE_TIME = (2025, 7, 31, 0, 0, 0)
+
+
+def build_lambda_zip(source_dir=SOURCE_DIR, zip_path=ZIP_PATH):
+    """打包 source_dir 下的 .py 与数据文件，返回 zip 路径"""
+    files = sorted(
+        p for p in source_dir.rglob("*")
+        if p.is_file() and "__pycache__" not in p.parts and p.suffix != ".pyc"
+    )
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for path in files:
+            info = zipfile.ZipInfo(path.relative_to(source_dir).as_posix(), date_time=FIXED_DATE_TIME)
+            info.external_attr = 0o100644 << 16
+            info.compress_type = zipfile.ZIP_DEFLATED
+            zf.writestr(info, path.read_bytes())
+    return zip_path
+
+
+if __name__ == "__main__":
+    print(f"已生成 {build_lambda_zip()}")
@@ -0,0 +1,129 @@
+import json
+import os
+import re
+import unicodedata
+
+# 会话记忆保存在 Lex 会话属性 conversation 中（JSON 字符串）:
+#   turns: 最近几轮 [客户话术, 机器人回复]，总量不超过 HISTORY_TOKEN_BUDGET
+#   facts: 从全部对话中提取的结构化事实（身份是否确认、承诺还款日期、金额）
+#   compacted: 已压缩（丢弃原文、只保留事实）的轮数
+# 每轮发送给模型的输入 = 提示词 + 事实摘要 + 预算内的最近几轮，与通话时长无关
+MEMORY_ATTRIBUTE = 'conversation'
+HISTORY_TOKEN_BUDGET = int(os.environ.get('HISTORY_TOKEN_BUDGET', '600'))
+
+IDENTITY_YES = re.compile(r'^(是|是的|是我|我是|我就是|对|对的|对啊|嗯|嗯嗯)')
+IDENTITY_NO = re.compile(r'^(不是|打错|你打错|不认识)')
+DATE_PATTERN = re.compile(
+    r'(今天|明天|后天|大后天|这周[一二三四五六日天]|下周[一二三四五六日天]?|下个月\d{0,2}[日号]?|月底|月初|'
+    r'\d{1,2}月\d{1,2}[日号]?|\d{1,2}[日号]|[一二三四五六七八九十]{1,3}月[一二三四五六七八九十]{1,3}[日号]?|'
+    r'[一二三四五六七八九十]{1,3}[日号])'
+)
+AMOUNT_PATTERN = re.compile(r'(\d[\d,]*(?:\.\d+)?|[零一二两三四五六七八九十百千万]+)(元|块钱|块)')
+
+FACT_LABELS = {
+    'identity_confirmed': '客户身份已确认',
+    'promised_date': '客户承诺还款日期',
+    'amount': '客户提到的金额',
+}
+
+
+def estimate_tokens(text):
+    # 中日韩字符约 1 token/字，其余约 4 字符/token
+    cjk = sum(1 for ch in text if '\u3000' <= ch <= '\u9fff' or '\uff00' <= ch <= '\uffef')
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _normalize(text):
+    text = unicodedata.normalize('NFKC', text or '')
+    return ''.join(ch for ch in text if unicodedata.category(ch)[0] not in 'PZ')
+
+
+def extract_facts(facts, user_text, first_turn):
+    """从客户话术中提取事实，更新 facts（后出现的日期 / 金额覆盖先前的）"""
+    text = _normalize(user_text)
+    if first_turn and 'identity_confirmed' not in facts:
+        if IDENTITY_NO.match(text):
+            facts['identity_confirmed'] = False
+        elif IDENTITY_YES.match(text):
+            facts['identity_confirmed'] = True
+    date = DATE_PATTERN.search(text)
+    if date:
+        facts['promised_date'] = date.group(1)
+    amount = AMOUNT_PATTERN.search(text)
+    if amount:
+        facts['amount'] = amount.group(0)
+    return facts
+
+
+class ConversationMemory:
+    """有 token 预算的多轮会话记忆，读写 Lex 会话属性"""
+
+    def __init__(self, turns=None, facts=None, compacted=0, token_budget=None):
+        self.turns = turns or []
+        self.facts = facts or {}
+        self.compacted = compacted
+        self.token_budget = token_budget or HISTORY_TOKEN_BUDGET
+
+    @classmethod
+    def load(cls, session_attributes, token_budget=None):
+        raw = session_attributes.get(MEMORY_ATTRIBUTE)
+        if not raw:
+            return cls(token_budget=token_budget)
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            return cls(token_budget=token_budget)
+        return cls(data.get('turns'), data.get('facts'), data.get('compacted', 0), token_budget)
+
+    def save(self, session_attributes):
+        session_attributes[MEMORY_ATTRIBUTE] = json.dumps({
+            'turns': self.turns,
+            'facts': self.facts,
+            'compacted': self.compacted
+        }, ensure_ascii=False, separators=(',', ':'))
+
+    @property
+    def turn_count(self):
+        return self.compacted + len(self.turns)
+
+    def last_reply(self):
+        """上一轮机器人回复；已压缩或尚无对话时为 None"""
+        return self.turns[-1][1] if self.turns else None
+
+    def history_tokens(self):
+        return sum(estimate_tokens(user) + estimate_tokens(assistant) for user, assistant in self.turns)
+
+    def add_turn(self, user_text, assistant_text):
+        """记录一轮对话；超出预算时从最早的轮次开始压缩为事实"""
+        extract_facts(self.facts, user_text, self.turn_count == 0)
+        if not assistant_text:
+            # 模型调用失败的轮次不进入历史（assistant 内容不能为空）
+            return
+        self.turns.append([user_text, assistant_text])
+        tokens = self.history_tokens()
+        while self.turns and tokens > self.token_budget:
+            user, assistant = self.turns.pop(0)
+            tokens -= estimate_tokens(user) + estimate_tokens(assistant)
+            self.compacted += 1
+
+    def summary(self):
+        """事实摘要文本，附加到系统提示词之后；没有事实时为空"""
+        lines = []
+        for key, label in FACT_LABELS.items():
+            if key in self.facts:
+                value = self.facts[key]
+                if isinstance(value, bool):
+                    value = '是' if value else '否'
+                lines.append(f"- {label}: {value}")
+        if not lines:
+            return ''
+        return "\n\n对话中已知的信息:\n" + "\n".join(lines)
+
+    def messages(self, user_text):
+        """Anthropic messages: 预算内的最近几轮 + 当前话术，user / assistant 严格交替"""
+        messages = []
+        for user, assistant in self.turns:
+            messages.append({"role": "user", "content": user})
+            messages.append({"role": "assistant", "content": assistant})
+        messages.append({"role": "user", "content": user_text})
+        return messages
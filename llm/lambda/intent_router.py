@@ -0,0 +1,243 @@
+import re
+import unicodedata
+
+# 快速路由：明显的确认、拒绝、转人工、挂机话术在调用模型前直接处理，只有含糊的话术才交给 Bedrock。
+# 分类结果:
+#   TRANSFER     -> TransferToAgentIntent（联系流转入人工队列）
+#   HANGUP       -> CloseIntent（联系流致谢并挂机）
+#   WRONG_NUMBER -> CloseIntent（接听人不是客户本人 / 打错电话）
+#   CONFIRM / REFUSE -> 固定回复
+TRANSFER = 'TRANSFER'
+HANGUP = 'HANGUP'
+WRONG_NUMBER = 'WRONG_NUMBER'
+CONFIRM = 'CONFIRM'
+REFUSE = 'REFUSE'
+
+ROUTE_INTENTS = {
+    TRANSFER: 'TransferToAgentIntent',
+    HANGUP: 'CloseIntent',
+    WRONG_NUMBER: 'CloseIntent',
+}
+
+# 对话阶段：同一句“是”“不是”“no”在不同阶段含义不同
+#   IDENTITY -> 开场白询问是否为客户本人之后（第一轮）
+#   PAYMENT  -> 机器人提醒还款、询问能否按时还款之后
+#   CLOSING  -> 机器人询问“还有其他问题吗”之后
+# 其他阶段（例如延期方案的追问）只使用不分阶段的规则
+IDENTITY = 'IDENTITY'
+PAYMENT = 'PAYMENT'
+CLOSING = 'CLOSING'
+
+# 每个语种:
+#   exact 为整句（规范化后）完全匹配，keywords 为包含匹配，两者不分阶段
+#   stages 为各阶段的整句匹配（exact）与整句正则（patterns），优先于不分阶段的规则
+#   markers 为识别上一轮回复所处阶段的关键词（见 IntentRouter.stage）
+RULES = {
+    'zh_CN': {
+        'exact': {
+            WRONG_NUMBER: ['打错了', '你打错了', '打错电话了', '你们打错了'],
+            HANGUP: ['再见', '拜拜', '挂了'],
+        },
+        'keywords': {
+            TRANSFER: ['转人工', '人工客服', '人工座席', '人工坐席', '人工服务', '找人工', '接人工', '真人客服', '转接客服'],
+            HANGUP: ['再见', '拜拜', '先挂了', '我挂了', '不要再打', '别再打', '别打了'],
+        },
+        'stages': {
+            IDENTITY: {
+                'exact': {
+                    WRONG_NUMBER: ['不是', '不是我', '我不是', '不是的', '不认识', '没有这个人', '不认识这个人'],
+                },
+            },
+            PAYMENT: {
+                'exact': {
+                    CONFIRM: ['是', '是的', '对', '对的', '对啊', '嗯', '嗯嗯', '好', '好的', '好的好的', '可以', '行',
+                              '没问题', '知道了', '明白', '明白了', '能', '能还', '会还', '我会还的', '一定还'],
+                    REFUSE: ['不行', '不可以', '不能', '还不了', '没钱', '没有钱', '不还'],
+                },
+                'patterns': {
+                    REFUSE: [r'^(我)?(现在)?(暂时)?(还不了|没(有)?钱(还)?|还不上)(了|啊|呢)?$'],
+                    CONFIRM: [r'^(好的?|可以|行)[,，]?(我)?(明天|今天|后天|下周|月底)(就|会)?还(款|钱)?(的|吧)?$'],
+                },
+            },
+            CLOSING: {
+                'exact': {
+                    HANGUP: ['没有', '没有了', '没了', '没事了', '不用了', '不需要了', '没有其他问题', '没有其他问题了',
+                             '没问题了', '没有问题了'],
+                },
+            },
+        },
+        'markers': {
+            PAYMENT: ['还款', '还钱', '账单', '欠款'],
+            CLOSING: ['其他问题', '其他需要', '还有什么'],
+        },
+        # 关键词前 3 个字内出现这些词时视为否定（“不要转人工”“不需要人工客服”），不走快速路由
+        'negations': ['不', '别', '没', '勿'],
+        'negation_window': 3,
+        'replies': {
+            CONFIRM: '好的，感谢您的配合。请您在到期日前完成还款，可以通过手机银行或官方渠道还款。请问您还有其他问题吗？',
+            REFUSE: '理解您的情况。如果遇到还款困难，您可以申请延后还款，或者转人工客服为您处理。请问您需要哪一种帮助？',
+        },
+    },
+    'en_US': {
+        'exact': {
+            WRONG_NUMBER: ['wrong number', 'you have the wrong number', 'wrong person'],
+            HANGUP: ['bye', 'goodbye', 'bye bye'],
+        },
+        'keywords': {
+            TRANSFER: ['agent', 'representative', 'real person', 'human', 'operator'],
+            HANGUP: ['stop calling', 'dont call'],
+        },
+        'stages': {
+            IDENTITY: {
+                'exact': {
+                    WRONG_NUMBER: ['no', 'nope', 'not me', 'no its not', 'no thats not me'],
+                },
+            },
+            PAYMENT: {
+                'exact': {
+                    CONFIRM: ['yes', 'yeah', 'yep', 'sure', 'ok', 'okay', 'no problem', 'i will pay', 'i can pay'],
+                    REFUSE: ['no', 'nope', 'i cant pay', 'i cannot pay', 'i cant'],
+                },
+            },
+            CLOSING: {
+                'exact': {
+                    HANGUP: ['no', 'nope', 'no thanks', 'no thank you', 'thats all', 'thats it', 'nothing else', 'im good'],
+                },
+            },
+        },
+        'markers': {
+            PAYMENT: ['payment', 'pay', 'bill', 'due'],
+            CLOSING: ['anything else', 'other questions'],
+        },
+        # 规范化后没有空格，否定词可能在关键词前若干个字母处（“i dont want an agent”）
+        'negations': ['dont', 'donot', 'not', 'never', 'without', 'noneed'],
+        'negation_window': 20,
+        'replies': {
+            CONFIRM: 'Thank you. Please make your payment before the due date. Is there anything else I can help with?',
+            REFUSE: 'I understand. If you are having difficulty, you can request a payment extension or speak with an agent. Which would you prefer?',
+        },
+    },
+}
+
+
+def normalize(text):
+    # 全角转半角、小写，去掉空白与标点（保留字母、数字与中文）
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    return ''.join(ch for ch in text if unicodedata.category(ch)[0] not in 'PZSC')
+
+
+class _Trie:
+    # 关键词前缀树，一次扫描找出包含的关键词
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, word, label):
+        node = self.root
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[None] = label
+
+    def search(self, text, negations=(), window=0):
+        for start in range(len(text)):
+            node = self.root
+            for ch in text[start:]:
+                node = node.get(ch)
+                if node is None:
+                    break
+                if None in node:
+                    before = text[max(0, start - window):start]
+                    if any(word in before for word in negations):
+                        break
+                    return node[None]
+        return None
+
+
+def _compile_exact(table):
+    exact = {}
+    for label, phrases in table.items():
+        for phrase in phrases:
+            exact[normalize(phrase)] = label
+    return exact
+
+
+def _compile_patterns(table):
+    return [(re.compile(pattern), label) for label, items in table.items() for pattern in items]
+
+
+class _Compiled:
+    __slots__ = ('exact', 'trie', 'stages', 'markers', 'negations', 'window', 'replies')
+
+
+class IntentRouter:
+
+    def __init__(self, rules=RULES):
+        self._compiled = {}
+        for locale, rule in rules.items():
+            compiled = _Compiled()
+            compiled.exact = _compile_exact(rule['exact'])
+            compiled.trie = _Trie()
+            for label, words in rule['keywords'].items():
+                for word in words:
+                    compiled.trie.add(normalize(word), label)
+            compiled.stages = {
+                stage: (_compile_exact(items.get('exact', {})), _compile_patterns(items.get('patterns', {})))
+                for stage, items in rule.get('stages', {}).items()
+            }
+            compiled.markers = {stage: [normalize(m) for m in words] for stage, words in rule.get('markers', {}).items()}
+            compiled.negations = [normalize(word) for word in rule.get('negations', ())]
+            compiled.window = rule.get('negation_window', 0)
+            compiled.replies = rule['replies']
+            self._compiled[locale] = compiled
+
+    def _resolve(self, locale):
+        # 精确匹配语种，否则按语言前缀匹配（zh_TW -> zh_CN 规则）
+        compiled = self._compiled.get(locale)
+        if compiled is None and locale:
+            language = locale.split('_')[0] + '_'
+            compiled = next((c for l, c in self._compiled.items() if l.startswith(language)), None)
+        return compiled
+
+    def stage(self, turn_count, last_reply=None, locale='zh_CN'):
+        # 由会话记忆判断对话阶段：第一轮回答开场白（身份确认）；机器人对第一轮的回复为还款提醒；
+        # 之后只有上一轮回复在询问“还有其他问题吗”时才可确定阶段
+        if turn_count == 0:
+            return IDENTITY
+        compiled = self._resolve(locale)
+        if compiled is None or not last_reply:
+            return None
+        text = normalize(last_reply)
+        if any(marker in text for marker in compiled.markers.get(CLOSING, ())):
+            return CLOSING
+        if turn_count == 1 and any(marker in text for marker in compiled.markers.get(PAYMENT, ())):
+            return PAYMENT
+        return None
+
+    def classify(self, transcript, locale='zh_CN', stage=None):
+        # 返回分类标签；含糊的话术返回 None，交给模型处理。stage 为 None 时只使用不分阶段的规则
+        compiled = self._resolve(locale)
+        if compiled is None:
+            return None
+        text = normalize(transcript)
+        if not text:
+            return None
+        if stage in compiled.stages:
+            exact, patterns = compiled.stages[stage]
+            label = exact.get(text)
+            if label:
+                return label
+            for pattern, label in patterns:
+                if pattern.match(text):
+                    return label
+        label = compiled.exact.get(text)
+        if label:
+            return label
+        return compiled.trie.search(text, compiled.negations, compiled.window)
+
+    def route(self, transcript, locale='zh_CN', stage=None):
+        # 返回 (标签, 目标意图, 固定回复)；无需快速路由时返回 None
+        label = self.classify(transcript, locale, stage)
+        if label is None:
+            return None
+        replies = self._resolve(locale).replies
+        return label, ROUTE_INTENTS.get(label), replies.get(label)
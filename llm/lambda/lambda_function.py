@@ -0,0 +1,457 @@
+import json
+import boto3
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from conversation_memory import ConversationMemory, estimate_tokens
+from intent_router import IntentRouter
+from model_invoker import HedgedInvoker
+from response_cache import cache_key, create_response_cache, reply_id
+from telemetry import TurnMetrics
+
+bedrock = boto3.client(service_name="bedrock-runtime")
+ssm = boto3.client(service_name="ssm")
+
+MODEL_ID = os.environ.get('MODEL_ID', "anthropic.claude-3-haiku-20240307-v1:0")
+
+# 对冲调用：主模型超过其 p95 未返回时向备用模型 / 区域发出第二个请求；
+# 默认备用为同一模型（同区域重发），可指定其他模型或区域
+MODEL_HEDGING = os.environ.get('MODEL_HEDGING', 'true').lower() == 'true'
+SECONDARY_MODEL_ID = os.environ.get('SECONDARY_MODEL_ID', MODEL_ID)
+SECONDARY_REGION = os.environ.get('SECONDARY_REGION', '')
+# 单轮截止时间：超时后播报安抚话术，请客户稍后重复
+TURN_DEADLINE_MS = int(os.environ.get('TURN_DEADLINE_MS', '2500'))
+HEDGE_AFTER_MS = int(os.environ.get('HEDGE_AFTER_MS', '1000'))
+FILLER_TEXT = os.environ.get('FILLER_TEXT', '不好意思，刚才信号不太好，您能再说一遍吗？')
+model_invoker = HedgedInvoker(TURN_DEADLINE_MS, HEDGE_AFTER_MS)
+regional_clients = {}
+
+# 流式模式：按句切分，首个可播报的句子就绪即返回，缩短通话中的静默时间
+BEDROCK_STREAMING = os.environ.get('BEDROCK_STREAMING', 'true').lower() == 'true'
+# first_sentence: 首个可播报句子就绪即返回；budget: 读到口播 token 预算用完或生成结束
+STREAM_UNTIL = os.environ.get('STREAM_UNTIL', 'first_sentence')
+# 单轮口播的 token 预算（电话中一次播报不宜过长）
+SPOKEN_TOKEN_BUDGET = int(os.environ.get('SPOKEN_TOKEN_BUDGET', '200'))
+# 少于该字数的句子（如“好的。”）与后续句子合并后再返回
+MIN_SPEAKABLE_CHARS = int(os.environ.get('MIN_SPEAKABLE_CHARS', '8'))
+SENTENCE_ENDINGS = "。！？!?；;\n"
+
+# 明显的确认、拒绝、转人工、挂机话术由规则直接处理，不调用 Bedrock
+INTENT_FASTPATH = os.environ.get('INTENT_FASTPATH', 'true').lower() == 'true'
+intent_router = IntentRouter()
+
+# 重复的客户话术（“好的”“我明天还”）直接复用缓存的回复，跳过 Bedrock
+response_cache = create_response_cache()
+
+# 振铃期间预生成：开场白与客户首句常见话术的回复，按 ContactId 写入回复缓存
+FIRST_TURN_UTTERANCES = [u for u in os.environ.get(
+    'FIRST_TURN_UTTERANCES', '什么事,你是谁,哪里,喂,有什么事吗,你们是哪家银行,多少钱'
+).split(',') if u]
+PREGENERATE_WORKERS = int(os.environ.get('PREGENERATE_WORKERS', '8'))
+
+# 与 voice_outbound/prompts.py 中的参数路径一致
+PROMPT_PARAMETER_PREFIX = os.environ.get('PROMPT_PARAMETER_PREFIX', '/voice-outbound/prompts/')
+
+@lru_cache(maxsize=128)
+def resolve_prompt(prompt_id, prompt_version):
+    # 指定版本的提示词内容不可变，可在进程内长期缓存
+    name = PROMPT_PARAMETER_PREFIX + prompt_id + ":" + prompt_version
+    return ssm.get_parameter(Name=name)['Parameter']['Value']
+
+def get_prompt_key(session_attributes):
+    # 缓存键中的提示词版本；未使用版本化提示词时以环境变量内容摘要代替
+    if session_attributes.get('PromptId') and session_attributes.get('PromptVersion'):
+        return session_attributes['PromptId'] + ":" + session_attributes['PromptVersion']
+    return "env:" + reply_id(os.environ.get('Prompt', ''))
+
+def get_system_prompt(session_attributes):
+    # 外呼时通过联系流属性传入 PromptId / PromptVersion；未传入时沿用环境变量
+    prompt_id = session_attributes.get('PromptId')
+    prompt_version = session_attributes.get('PromptVersion')
+    if prompt_id and prompt_version:
+        try:
+            return resolve_prompt(prompt_id, prompt_version)
+        except Exception as e:
+            print(f"Failed to resolve prompt {prompt_id}:{prompt_version}: {e}")
+    return os.environ.get('Prompt', '')
+
+def get_bedrock_client(region=''):
+    # 空区域使用默认客户端；其他区域的客户端按需创建并复用
+    if not region:
+        return bedrock
+    if region not in regional_clients:
+        regional_clients[region] = boto3.client(service_name="bedrock-runtime", region_name=region)
+    return regional_clients[region]
+
+def get_chat_response_3(prompt, system_prompt=None, messages=None, model_id=None, client=None):
+    text = ''
+    model_id = model_id or MODEL_ID
+    client = client or bedrock
+    if system_prompt is None:
+        system_prompt = os.environ['Prompt']
+
+    if prompt:
+        body = json.dumps({
+            "system": system_prompt,
+            "temperature": 0.1,
+            "max_tokens": 4096,
+            "messages": messages or [{"role": "user", "content": prompt}],
+            "anthropic_version": "bedrock-2023-05-31"
+        })
+    
+        try:
+            response = client.invoke_model(
+                body=body, modelId=model_id)
+
+            response_text = json.loads(response.get("body").read())
+            text = response_text["content"][0]["text"]
+        except Exception as e:
+            # Handle the exception
+            print(f"An exception occurred: {e}")
+    
+    return text
+
+def split_sentences(buffer):
+    # 切出 buffer 中所有完整的句子，返回 (句子列表, 剩余未完成部分)
+    sentences = []
+    start = 0
+    for i, ch in enumerate(buffer):
+        if ch in SENTENCE_ENDINGS:
+            sentence = buffer[start:i + 1].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = i + 1
+    return sentences, buffer[start:]
+
+def get_chat_response_stream(prompt, system_prompt=None, token_budget=None, until=None, messages=None,
+                             model_id=None, client=None, cancel=None, metrics=None):
+    # 使用 invoke_model_with_response_stream 流式生成，按句切分并限制口播长度；
+    # cancel 被置位（对冲请求已先返回）时停止读取并关闭连接
+    text = ''
+    model_id = model_id or MODEL_ID
+    client = client or bedrock
+    if system_prompt is None:
+        system_prompt = os.environ['Prompt']
+    token_budget = token_budget or SPOKEN_TOKEN_BUDGET
+    until = until or STREAM_UNTIL
+    if not prompt:
+        return text
+
+    messages = messages or [{"role": "user", "content": prompt}]
+    body = json.dumps({
+        "system": system_prompt,
+        "temperature": 0.1,
+        "max_tokens": token_budget,
+        "messages": messages,
+        "anthropic_version": "bedrock-2023-05-31"
+    })
+    input_tokens = estimate_tokens(system_prompt) + sum(estimate_tokens(m['content']) for m in messages)
+
+    started = time.perf_counter()
+    first_token_at = None
+    sentences = []
+    spoken_tokens = 0
+    buffer = ''
+    done = False
+    stream = None
+    try:
+        response = client.invoke_model_with_response_stream(body=body, modelId=model_id)
+        stream = response.get("body")
+        for event in stream:
+            if cancel is not None and cancel.is_set():
+                done = True
+                break
+            chunk = json.loads(event['chunk']['bytes'])
+            if chunk.get('type') != 'content_block_delta':
+                continue
+            delta = chunk['delta'].get('text', '')
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            complete, buffer = split_sentences(buffer + delta)
+            for sentence in complete:
+                cost = estimate_tokens(sentence)
+                if sentences and spoken_tokens + cost > token_budget:
+                    done = True
+                    break
+                sentences.append(sentence)
+                spoken_tokens += cost
+                if until == 'first_sentence' and len(''.join(sentences)) >= MIN_SPEAKABLE_CHARS:
+                    done = True
+                    break
+            if done:
+                break
+        if not done and buffer.strip() and (not sentences or spoken_tokens + estimate_tokens(buffer) <= token_budget):
+            sentences.append(buffer.strip())
+        text = ''.join(sentences)
+    except Exception as e:
+        print(f"An exception occurred: {e}")
+    finally:
+        # 提前返回时关闭连接，不再等待剩余生成
+        if stream is not None and done:
+            stream.close()
+
+    # 对冲落败（被取消）的请求不覆盖胜出请求的记录
+    if metrics is not None and not (cancel is not None and cancel.is_set()):
+        metrics.set(
+            input_tokens=input_tokens,
+            ttft_ms=round((first_token_at - started) * 1000, 1) if first_token_at else None,
+            spoken_tokens=spoken_tokens,
+            truncated=done
+        )
+    return text
+
+def model_call(prompt, system_prompt, messages, model_id, region, metrics=None):
+    def call(cancel):
+        client = get_bedrock_client(region)
+        if BEDROCK_STREAMING:
+            return get_chat_response_stream(prompt, system_prompt, messages=messages, model_id=model_id,
+                                            client=client, cancel=cancel, metrics=metrics)
+        return get_chat_response_3(prompt, system_prompt, messages, model_id=model_id, client=client)
+    return call
+
+def get_model_response(prompt, system_prompt=None, messages=None, metrics=None):
+    # 截止时间内主模型与对冲请求都未返回时返回空字符串，由调用方决定兜底话术
+    if not prompt:
+        return ''
+    primary = (MODEL_ID, model_call(prompt, system_prompt, messages, MODEL_ID, '', metrics))
+    secondary = None
+    if MODEL_HEDGING:
+        label = SECONDARY_MODEL_ID + ("@" + SECONDARY_REGION if SECONDARY_REGION else "")
+        secondary = (label, model_call(prompt, system_prompt, messages, SECONDARY_MODEL_ID, SECONDARY_REGION, metrics))
+    text, model = model_invoker.invoke(primary, secondary)
+    if metrics is not None and metrics.sampled:
+        metrics.set_dimension('Model', model or 'filler')
+        stats = model_invoker.stats()
+        metrics.set(
+            model_hedges=stats['hedges'],
+            model_hedge_wins=stats['hedge_wins'],
+            model_timeouts=stats['timeouts'],
+            model_latency_ms=stats['models'].get(model)
+        )
+    return text
+
+    
+# 模型输出中的 & < > 等字符会使 SSML 解析失败，先转义再插入标记
+SSML_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&apos;'})
+
+def get_ssml_text(answer_text):
+    answer_text = answer_text.translate(SSML_ESCAPES)
+    answer_text = answer_text.replace("Got it","<say-as interpret-as=\"verbal\">Got it</say-as>")
+    answer_text = answer_text.replace("...","<break time=\"1s\"/>")
+    return "<speak><prosody rate=\"90%\">" + answer_text + "</prosody></speak>"
+
+def Claude3Search_AWS_SSML(intent_request, metrics):
+    with metrics.span('parse'):
+        session_attributes = get_session_attributes(intent_request)
+        input_text = get_prompt(intent_request)
+    with metrics.span('prompt'):
+        system_prompt = get_system_prompt(session_attributes)
+    with metrics.span('model'):
+        text = get_model_response(input_text, system_prompt, metrics=metrics) or FILLER_TEXT
+    
+    with metrics.span('ssml'):
+        ssml_text = get_ssml_text(text)
+    message =  {
+            'contentType': 'SSML',
+            'content': ssml_text
+        }
+    fulfillment_state = "Fulfilled"    
+    with metrics.span('close'):
+        return close(intent_request, session_attributes, fulfillment_state, message) 
+
+def Claude3Search_AWS_PlainText(intent_request, metrics):
+    with metrics.span('parse'):
+        session_attributes = get_session_attributes(intent_request)
+        input_text = get_prompt(intent_request)
+        # 多轮记忆：预算内的最近几轮原文 + 更早轮次压缩出的事实
+        memory = ConversationMemory.load(session_attributes)
+
+    if INTENT_FASTPATH:
+        with metrics.span('route'):
+            # 确认 / 拒绝等整句规则只在对应的对话阶段（身份确认、还款提醒、结束语）生效
+            locale = intent_request['bot']['localeId']
+            stage = intent_router.stage(memory.turn_count, memory.last_reply(), locale)
+            route = intent_router.route(input_text, locale, stage)
+        metrics.set(fastpath=route[0] if route else None)
+        if route is not None:
+            with metrics.span('close'):
+                return fast_path(intent_request, session_attributes, memory, input_text, route, metrics)
+    
+    with metrics.span('prompt'):
+        summary = memory.summary()
+        # 对话状态以上一轮回复摘要与已知事实表示，同一句话在不同上下文中不会命中同一缓存
+        state = session_attributes.get('last_reply_id', '') + ":" + reply_id(summary)
+        key = cache_key(get_prompt_key(session_attributes), input_text, state)
+    with metrics.span('cache'):
+        text = response_cache.get(key)
+    cache_hit = text is not None
+    if not cache_hit:
+        with metrics.span('prompt'):
+            system_prompt = get_system_prompt(session_attributes) + summary
+            messages = memory.messages(input_text)
+        started = time.perf_counter()
+        with metrics.span('model'):
+            text = get_model_response(input_text, system_prompt, messages, metrics)
+        response_cache.put(key, text, (time.perf_counter() - started) * 1000)
+    if metrics.sampled:
+        metrics.set(cache_hit=cache_hit, cache_hit_rate=response_cache.stats()['hit_rate'])
+
+    with metrics.span('close'):
+        memory.add_turn(input_text, text)
+        memory.save(session_attributes)
+        if text:
+            session_attributes['last_reply_id'] = reply_id(text)
+        else:
+            # 模型超时或失败：请客户重复，不写入缓存与会话历史，对话状态保持不变
+            text = FILLER_TEXT
+        message =  {
+                'contentType': 'PlainText',
+                'content': text
+            }
+        fulfillment_state = "Fulfilled"    
+        return close(intent_request, session_attributes, fulfillment_state, message)
+    
+def fast_path(intent_request, session_attributes, memory, input_text, route, metrics):
+    label, intent_name, reply = route
+    if intent_name:
+        # 切换为目标意图，联系流按意图分支（转人工 / 致谢挂机）
+        metrics.set_dimension('Intent', intent_name)
+        intent_request['sessionState']['intent'] = {'name': intent_name, 'slots': {}, 'confirmationState': 'None'}
+        return close(intent_request, session_attributes, "Fulfilled")
+    session_attributes['last_reply_id'] = reply_id(reply)
+    memory.add_turn(input_text, reply)
+    memory.save(session_attributes)
+    message = {
+            'contentType': 'PlainText',
+            'content': reply
+        }
+    return close(intent_request, session_attributes, "Fulfilled", message)
+
+def get_prompt(intent_request):
+    prompt = intent_request["inputTranscript"]
+    lan = intent_request["bot"]['localeId']
+           
+    return prompt
+    
+def get_session_attributes(intent_request):
+    sessionState = intent_request['sessionState']
+    if 'sessionAttributes' in sessionState:
+        return sessionState['sessionAttributes']
+
+    return {}
+
+def close(intent_request, session_attributes, fulfillment_state, message=None):
+    intent_request['sessionState']['intent']['state'] = fulfillment_state
+    return {
+        'sessionState': {
+            'sessionAttributes': session_attributes,
+            'dialogAction': {
+                'type': 'Close'
+            },
+            'intent': intent_request['sessionState']['intent']
+        },
+        'messages': [message] if message else [],
+        'sessionId': intent_request['sessionId'],
+        'requestAttributes': intent_request['requestAttributes'] if 'requestAttributes' in intent_request else None
+    }
+    
+def opening_key(contact_id):
+    return cache_key('opening', contact_id, '')
+
+def generate_opening(attributes, metrics=None):
+    # 根据联系属性生成一句个性化开场白（确认身份）；模型不可用时退回固定话术
+    user_name = attributes.get('UserName', '')
+    details = {k: v for k, v in attributes.items() if k not in ('PromptId', 'PromptVersion', 'LanguageCode')}
+    instruction = (
+        "客户信息: " + json.dumps(details, ensure_ascii=False) +
+        f"。电话刚刚接通，请用一句不超过40字的话问好，并确认对方是否为{user_name}本人。只输出这句话。"
+    )
+    text = get_model_response(instruction, get_system_prompt(attributes), metrics=metrics)
+    return text or f"您好，请问是{user_name}吗？"
+
+def pregenerate_contact(contact_id, attributes, metrics):
+    # 外呼发起后（振铃期间）异步调用：生成开场白与首轮回复并写入缓存，首轮对话直接命中
+    started = time.perf_counter()
+    metrics.set(ContactId=contact_id)
+    if response_cache.backend is None:
+        # 异步调用与联系流 / Lex 的调用通常落在不同实例，只写入本实例内存的结果不会被读到，不浪费模型调用
+        metrics.set(pregenerate_skipped=True)
+        return {'ContactId': contact_id, 'replies': 0, 'skipped': 'RESPONSE_CACHE_TABLE 未配置'}
+    with metrics.span('model'):
+        opening = generate_opening(attributes, metrics)
+    response_cache.put(opening_key(contact_id), opening, (time.perf_counter() - started) * 1000)
+
+    # 首轮的缓存键与 Claude3Search_AWS_PlainText 一致: 上一轮回复为开场白，尚无会话记忆
+    prompt_key = get_prompt_key(attributes)
+    system_prompt = get_system_prompt(attributes)
+    state = reply_id(opening) + ":" + reply_id('')
+
+    def generate_reply(utterance):
+        key = cache_key(prompt_key, utterance, state)
+        if response_cache.get(key) is not None:
+            return False
+        turn_started = time.perf_counter()
+        text = get_model_response(utterance, system_prompt, [{"role": "user", "content": utterance}])
+        response_cache.put(key, text, (time.perf_counter() - turn_started) * 1000)
+        return True
+
+    with metrics.span('pregenerate'), ThreadPoolExecutor(max_workers=PREGENERATE_WORKERS) as executor:
+        generated = sum(executor.map(generate_reply, FIRST_TURN_UTTERANCES))
+    metrics.set(replies=generated)
+    return {'ContactId': contact_id, 'replies': generated, 'total_ms': round((time.perf_counter() - started) * 1000, 1)}
+
+def contact_flow_opening(details, metrics):
+    # 联系流在连接 Lex 前调用：返回开场白 SSML 与其摘要（作为 Lex 会话属性 last_reply_id）
+    with metrics.span('parse'):
+        contact = details['ContactData']
+        contact_id = contact['ContactId']
+        attributes = contact.get('Attributes') or {}
+    metrics.set(ContactId=contact_id)
+    with metrics.span('cache'):
+        opening = response_cache.get(opening_key(contact_id))
+    pregenerated = opening is not None
+    metrics.set(pregenerated=pregenerated)
+    if not pregenerated:
+        # 未预生成（或落在其他实例且未配置共享缓存）时同步生成
+        with metrics.span('model'):
+            opening = generate_opening(attributes, metrics)
+    with metrics.span('ssml'):
+        ssml = get_ssml_text(opening)
+    return {
+        'OpeningSSML': ssml,
+        'LastReplyId': reply_id(opening)
+    }
+
+def dispatch(intent_request, metrics):
+
+    intent_name = intent_request['sessionState']['intent']['name']
+    metrics.set_dimension('Intent', intent_name)
+    if metrics.sampled:
+        # ContactId 由联系流作为 Lex 会话属性传入
+        session_attributes = intent_request['sessionState'].get('sessionAttributes') or {}
+        metrics.set(ContactId=session_attributes.get('ContactId') or intent_request.get('sessionId'))
+    # Dispatch to your bot's intent handlers
+    if intent_name == 'FallbackIntent':
+        return Claude3Search_AWS_PlainText(intent_request, metrics)
+    if intent_name in ('CloseIntent', 'TransferToAgentIntent'):
+        # 提示语与后续动作由联系流处理
+        return close(intent_request, get_session_attributes(intent_request), "Fulfilled")
+    
+    raise Exception('Intent with name ' + intent_name + ' not supported')
+        
+def lambda_handler(event, context):
+    # 不记录原始事件（含客户话术全文）；每轮输出一条采样的 EMF 耗时记录
+    metrics = TurnMetrics()
+    try:
+        if 'Pregenerate' in event:
+            metrics.set_dimension('Intent', 'Pregenerate')
+            request = event['Pregenerate']
+            return pregenerate_contact(request['ContactId'], request.get('Attributes') or {}, metrics)
+        if 'Details' in event:
+            metrics.set_dimension('Intent', 'Opening')
+            return contact_flow_opening(event['Details'], metrics)
+        return dispatch(event, metrics)
+    finally:
+        metrics.emit()
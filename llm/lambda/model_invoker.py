@@ -0,0 +1,151 @@
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# 对冲调用：主模型超过其 p95 仍未返回时，向备用模型 / 区域发出第二个请求，取先返回的结果；
+# 两者都未在单轮截止时间内返回时由调用方播报固定的安抚话术，避免通话中长时间静默
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
+
+
+class ModelLatency:
+    # 单个模型最近 window 次调用的延迟（毫秒），失败次数单独计数
+
+    def __init__(self, window=500):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def record(self, latency_ms, ok=True):
+        with self._lock:
+            self.calls += 1
+            if ok:
+                self._samples.append(latency_ms)
+            else:
+                self.failures += 1
+
+    def snapshot(self):
+        with self._lock:
+            values = sorted(self._samples)
+            calls, failures = self.calls, self.failures
+        return {
+            'calls': calls,
+            'failures': failures,
+            'p50': _round(percentile(values, 50)),
+            'p95': _round(percentile(values, 95)),
+            'p99': _round(percentile(values, 99))
+        }
+
+    def percentiles(self, min_samples, *qs):
+        # 样本不足 min_samples 时返回 None
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            values = sorted(self._samples)
+        return [percentile(values, q) for q in qs]
+
+
+class HedgedInvoker:
+
+    def __init__(self, deadline_ms=2500, hedge_after_ms=1000, min_samples=20, max_workers=32):
+        self.deadline_ms = deadline_ms
+        # 样本不足以估计 p95 时的对冲等待时间
+        self.hedge_after_ms = hedge_after_ms
+        self.min_samples = min_samples
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._latency = {}
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+
+    def latency(self, label):
+        with self._lock:
+            if label not in self._latency:
+                self._latency[label] = ModelLatency()
+            return self._latency[label]
+
+    def hedge_delay_ms(self, label, deadline_ms):
+        # 主模型的 p95；慢请求占比较高时 p95 可能超过截止时间，
+        # 因此最迟在截止时间过半时对冲，为对冲请求留出一半时间
+        estimate = self.latency(label).percentiles(self.min_samples, 95)
+        p95 = estimate[0] if estimate is not None else self.hedge_after_ms
+        return min(p95, deadline_ms / 2)
+
+    def _submit(self, label, fn, cancel):
+        def run():
+            started = time.perf_counter()
+            try:
+                text = fn(cancel)
+            except Exception as e:
+                print(f"Model {label} failed: {e}")
+                text = ''
+            # 被取消的请求（对冲落败）以取消时的耗时作为延迟下界计入，使 p95 反映慢请求
+            cancelled = cancel.is_set()
+            self.latency(label).record((time.perf_counter() - started) * 1000, bool(text) or cancelled)
+            return '' if cancelled else text
+        return self._executor.submit(run)
+
+    def invoke(self, primary, secondary=None, deadline_ms=None):
+        """primary / secondary 为 (模型标识, fn)，fn(cancel_event) 返回文本（失败时为空）；
+        返回 (文本, 模型标识)，截止时间内都未成功时返回 ('', None)"""
+        deadline_ms = deadline_ms or self.deadline_ms
+        started = time.monotonic()
+        deadline = started + deadline_ms / 1000
+        hedge_at = started + self.hedge_delay_ms(primary[0], deadline_ms) / 1000
+        cancel = threading.Event()
+        # future -> (模型标识, 是否为对冲请求)
+        futures = {self._submit(primary[0], primary[1], cancel): (primary[0], False)}
+        pending = secondary
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                # 主模型超过 p95 或已失败时发出对冲请求
+                if pending is not None and (now >= hedge_at or not futures):
+                    futures[self._submit(pending[0], pending[1], cancel)] = (pending[0], True)
+                    pending = None
+                    with self._lock:
+                        self.hedges += 1
+                    continue
+                if not futures:
+                    break
+                wake = min(deadline, hedge_at) if pending is not None else deadline
+                done, _ = wait(list(futures), timeout=wake - now, return_when=FIRST_COMPLETED)
+                for future in done:
+                    label, hedged = futures.pop(future)
+                    text = future.result()
+                    if text:
+                        if hedged:
+                            with self._lock:
+                                self.hedge_wins += 1
+                        return text, label
+            with self._lock:
+                self.timeouts += 1
+            return '', None
+        finally:
+            # 让仍在生成的请求尽快停止（流式请求会关闭连接）
+            cancel.set()
+
+    def close(self):
+        # 等待仍在进行（已被取消）的请求结束
+        self._executor.shutdown(wait=True)
+
+    def stats(self):
+        with self._lock:
+            labels = list(self._latency)
+            counters = {'hedges': self.hedges, 'hedge_wins': self.hedge_wins, 'timeouts': self.timeouts}
+        return dict(counters, models={label: self.latency(label).snapshot() for label in labels})
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import boto3
+
+# 进程内缓存容量与过期时间
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', '2048'))
+RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', '3600'))
+# 可选的共享后端（DynamoDB 表，分区键 k，开启 TTL 属性 ttl），多个 Lambda 实例共享命中
+RESPONSE_CACHE_TABLE = os.environ.get('RESPONSE_CACHE_TABLE', '')
+
+
+def normalize_utterance(text):
+    # 全角转半角（NFKC）、统一小写，去掉空白、标点与符号，
+    # 使“好的。”“好的！”“ 好 的”落到同一个键
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    return ''.join(ch for ch in text if unicodedata.category(ch)[0] not in 'PZSC')
+
+
+def reply_id(text):
+    # 上一轮回复的短摘要，作为对话状态的一部分
+    return hashlib.sha1((text or '').encode('utf-8')).hexdigest()[:12]
+
+
+def cache_key(prompt_key, transcript, state):
+    raw = '\x1f'.join((prompt_key or '', normalize_utterance(transcript), state or ''))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class DynamoDBBackend:
+    def __init__(self, table_name, ttl):
+        self.table_name = table_name
+        self.ttl = ttl
+        self.client = boto3.client('dynamodb')
+
+    def get(self, key):
+        item = self.client.get_item(TableName=self.table_name, Key={'k': {'S': key}}).get('Item')
+        if not item or int(item['ttl']['N']) < time.time():
+            return None
+        return item['v']['S'], float(item['ms']['N'])
+
+    def put(self, key, text, latency_ms):
+        self.client.put_item(TableName=self.table_name, Item={
+            'k': {'S': key},
+            'v': {'S': text},
+            'ms': {'N': str(round(latency_ms, 1))},
+            'ttl': {'N': str(int(time.time() + self.ttl))}
+        })
+
+
+class ResponseCache:
+    # LRU + TTL 的回复缓存，记录命中率与节省的模型延迟
+
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL, backend=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved_ms = 0.0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                text, latency_ms, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.latency_saved_ms += latency_ms
+                    return text
+                del self._entries[key]
+
+        if self.backend is not None:
+            try:
+                found = self.backend.get(key)
+            except Exception as e:
+                print(f"Response cache backend error: {e}")
+                found = None
+            if found is not None:
+                text, latency_ms = found
+                self._store(key, text, latency_ms)
+                with self._lock:
+                    self.hits += 1
+                    self.latency_saved_ms += latency_ms
+                return text
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _store(self, key, text, latency_ms):
+        with self._lock:
+            self._entries[key] = (text, latency_ms, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, key, text, latency_ms=0.0):
+        if not text:
+            return
+        self._store(key, text, latency_ms)
+        if self.backend is not None:
+            try:
+                self.backend.put(key, text, latency_ms)
+            except Exception as e:
+                print(f"Response cache backend error: {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'latency_saved_ms': round(self.latency_saved_ms, 1),
+                'entries': len(self._entries)
+            }
+
+
+def create_response_cache():
+    backend = DynamoDBBackend(RESPONSE_CACHE_TABLE, RESPONSE_CACHE_TTL) if RESPONSE_CACHE_TABLE else None
+    return ResponseCache(backend=backend)
@@ -0,0 +1,93 @@
+import json
+import os
+import random
+import time
+
+# 每轮一条 CloudWatch EMF（Embedded Metric Format）日志：各阶段耗时作为指标（毫秒），
+# CloudWatch 按维度 Intent / Model 聚合并提供 p50 / p95 / p99 等百分位统计；
+# ContactId 等高基数字段只作为属性写入日志，可在 Logs Insights 中按通话检索
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'VoiceOutbound/LLM')
+# 采样率（0~1）；未采样的轮次不计时、不输出
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', '1.0'))
+
+DIMENSIONS = [['Intent', 'Model'], ['Intent']]
+
+
+class _Span:
+    __slots__ = ('turn', 'name', 'started')
+
+    def __init__(self, turn, name):
+        self.turn = turn
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = (time.perf_counter() - self.started) * 1000
+        spans = self.turn.spans
+        # 同名阶段多次进入时累加
+        spans[self.name] = spans.get(self.name, 0.0) + elapsed
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class TurnMetrics:
+
+    def __init__(self, sample_rate=None, namespace=METRICS_NAMESPACE):
+        sample_rate = METRICS_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.sampled = sample_rate >= 1 or random.random() < sample_rate
+        self.namespace = namespace
+        self.started = time.perf_counter()
+        self.spans = {}
+        self.dimensions = {'Intent': 'None', 'Model': 'None'}
+        self.properties = {}
+
+    def span(self, name):
+        return _Span(self, name) if self.sampled else _NOOP_SPAN
+
+    def set_dimension(self, name, value):
+        self.dimensions[name] = value or 'None'
+
+    def set(self, **properties):
+        if self.sampled:
+            self.properties.update(properties)
+
+    def record(self):
+        """生成 EMF 日志对象；未采样时返回 None"""
+        if not self.sampled:
+            return None
+        values = {name: round(ms, 3) for name, ms in self.spans.items()}
+        values['total'] = round((time.perf_counter() - self.started) * 1000, 3)
+        record = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': self.namespace,
+                    'Dimensions': DIMENSIONS,
+                    'Metrics': [{'Name': name, 'Unit': 'Milliseconds'} for name in values]
+                }]
+            }
+        }
+        record.update(self.properties)
+        record.update(self.dimensions)
+        record.update(values)
+        return record
+
+    def emit(self):
+        record = self.record()
+        if record is not None:
+            print(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
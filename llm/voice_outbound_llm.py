@@ -1,5 +1,12 @@
 import streamlit as st
-import boto3
+import sys
+from pathlib import Path
+
+# 使仓库根目录下的公共模块 voice_outbound 可被导入
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound.call import start_outbound_voice_call
+from voice_outbound.hygiene import normalize_e164
+from voice_outbound.prompts import PromptRegistry, request_pregeneration
 
 # 初始化页面配置
 st.set_page_config(page_title="语音外呼Demo", page_icon="📞")
@@ -7,66 +14,10 @@ st.set_page_config(page_title="语音外呼Demo", page_icon="📞")
 # 设置页面标题
 st.title("语音外呼Demo")
 
-# 外呼语音通话函数
-def start_outbound_voice_call(
-    phone_number,
-    user_name,
-    connect_instance_id,
-    contact_flow_id,
-    source_phone_number=None
-):
-    try:
-        # 初始化 Amazon Connect 客户端
-        connect_client = boto3.client('connect')
-        
-        # 准备默认属性
-        attributes = {'UserName': user_name, "LanguageCode": 'zh_CN'}
-        
-        # 准备 API 调用参数
-        params = {
-            'DestinationPhoneNumber': phone_number,
-            'ContactFlowId': contact_flow_id,
-            'InstanceId': connect_instance_id,
-            'Attributes': attributes
-        }
-        
-        # 添加可选参数（如果提供）
-        if source_phone_number:
-            params['SourcePhoneNumber'] = source_phone_number
-        
-        # 发起外呼电话
-        response = connect_client.start_outbound_voice_contact(**params)
-        
-        print(f"成功发起外呼电话到 {phone_number}，ContactId: {response['ContactId']}")
-        return response
-        
-    except Exception as e:
-        print(f"发生未预期的错误: {str(e)}")
-        raise
-
-# 更新Lambda函数环境变量的函数
-def update_lambda_env_var(prompt_content, lambda_arn, env_var_name):
-    """更新指定Lambda函数的环境变量"""
-    try:
-        lambda_client = boto3.client('lambda')
-        
-        # 获取当前函数配置
-        response = lambda_client.get_function_configuration(FunctionName=lambda_arn)
-        
-        # 更新环境变量
-        current_env = response.get('Environment', {}).get('Variables', {})
-        current_env[env_var_name] = prompt_content
-        
-        # 更新函数配置
-        lambda_client.update_function_configuration(
-            FunctionName=lambda_arn,
-            Environment={'Variables': current_env}
-        )
-        
-        return True
-    except Exception as e:
-        st.error(f"更新Lambda环境变量失败: {str(e)}")
-        return False
+# 进程内共享的提示词注册表（跨页面重跑保留），内容未变时不重复发布
+@st.cache_resource
+def get_prompt_registry():
+    return PromptRegistry()
 
 # 创建表单
 with st.form("outbound_form"):
@@ -78,7 +29,7 @@ with st.form("outbound_form"):
     phone_number = st.text_input("请输入手机号码", 
                                 placeholder="+12285332612",
                                 value="+12285332612",
-                                max_chars=12)
+                                max_chars=20)
     
     # 提示词输入
     prompt_content = st.text_area("请输入提示词", 
@@ -90,14 +41,17 @@ with st.form("outbound_form"):
         connect_instance_id = st.text_input("Connect实例ID", placeholder="xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx",value="b7e4b4ed-1bdf-4b14-b624-d9328f08725a")
         contact_flow_id = st.text_input("联系流ID", placeholder="xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx",value="bc57a009-89fd-424f-add6-c1f8fee2464d")
         source_phone_number = st.text_input("源电话号码（可选）", placeholder="+1234567890",value="+13072633584")
-        lambda_arn = st.text_input("Lambda函数ARN", placeholder="arn:aws:lambda:region:account:function:function-name",value="arn:aws:lambda:us-east-1:991727053196:function:StartOutboundVoice_Claude_Haiku")
-        env_var_name = st.text_input("环境变量名", placeholder="PROMPT_CONTENT",value="Prompt")
+        prompt_id = st.text_input("提示词ID", placeholder="debt-collection",value="credit-card-reminder")
+        pregenerate_function = st.text_input("预生成Lambda函数（可选）", placeholder="voice-outbound-llm",value="voice-outbound-llm",
+                                             help="部署页面按 Stack 名称生成的函数名（默认 Stack 为 voice-outbound-llm）")
     
     # 外呼按钮
     if st.form_submit_button("外呼"):
+        # 规范化为 E.164（允许空格、括号、连字符等分隔符，不带国家码时按北美 +1 补全）
+        destination = normalize_e164(phone_number)
         if not user_name.strip():
             st.error("请输入用户名称")
-        elif not phone_number or len(phone_number) != 12:
+        elif not destination:
             st.error("请输入有效的手机号码")
         elif not prompt_content.strip():
             st.error("请输入提示词内容")
@@ -107,17 +61,26 @@ with st.form("outbound_form"):
             st.error("请输入联系流ID")
         else:
             try:
-                # 如果提供了Lambda配置，先更新环境变量
-                if lambda_arn and env_var_name:
-                    update_lambda_env_var(prompt_content, lambda_arn, env_var_name)
+                # 发布提示词（内容未变时直接复用版本号），以联系流属性传给Lambda
+                prompt_attributes = get_prompt_registry().attributes(prompt_id, prompt_content) if prompt_id else None
                 
+                attributes = {'UserName': user_name, "LanguageCode": 'zh_CN'}
+                if prompt_attributes:
+                    attributes.update(prompt_attributes)
                 response = start_outbound_voice_call(
-                    phone_number=phone_number,
-                    user_name=user_name,
-                    connect_instance_id=connect_instance_id,
-                    contact_flow_id=contact_flow_id,
+                    destination,
+                    connect_instance_id,
+                    contact_flow_id,
+                    attributes,
                     source_phone_number=source_phone_number if source_phone_number else None
                 )
                 st.success(f"外呼成功！ContactId: {response['ContactId']}")
+                
+                # 振铃期间预生成开场白与首轮回复，失败不影响外呼
+                if pregenerate_function.strip():
+                    try:
+                        request_pregeneration(pregenerate_function.strip(), response['ContactId'], attributes)
+                    except Exception as e:
+                        st.warning(f"预生成请求失败: {str(e)}")
             except Exception as e:
                 st.error(f"外呼失败: {str(e)}")
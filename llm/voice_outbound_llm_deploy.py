@@ -1,17 +1,17 @@
 import streamlit as st
-import boto3
-import json
-import zipfile
-import os
-import subprocess
-import tempfile
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from voice_outbound.deploy import DEFAULT_STACK_NAME, IncrementalDeployer, lambda_function_name, update_contact_flow, update_lambda_code
+
 st.set_page_config(page_title="Amazon Connect自动化部署", page_icon="🚀")
 st.title("Amazon Connect自动化部署")
 
 def create_cdk_app(aws_access_key, aws_secret_key, region, connect_instance_id, stack_name):
     """创建CDK应用代码"""
+    function_name = lambda_function_name(stack_name)
     cdk_code = f'''import aws_cdk as cdk
 from aws_cdk import (
     Stack,
@@ -19,6 +19,7 @@ from aws_cdk import (
     aws_iam as iam,
     aws_connect as connect,
     aws_lex as lex,
+    aws_dynamodb as dynamodb,
 )
 from constructs import Construct
 import json
@@ -34,24 +35,54 @@ class VoiceOutboundStack(Stack):
             managed_policies=[
                 iam.ManagedPolicy.from_aws_managed_policy_name("service-role/AWSLambdaBasicExecutionRole"),
                 iam.ManagedPolicy.from_aws_managed_policy_name("AmazonBedrockFullAccess"),
-                iam.ManagedPolicy.from_aws_managed_policy_name("AmazonConnect_FullAccess")
+                iam.ManagedPolicy.from_aws_managed_policy_name("AmazonConnect_FullAccess"),
+                # 读取 /voice-outbound/prompts/ 下的版本化提示词
+                iam.ManagedPolicy.from_aws_managed_policy_name("AmazonSSMReadOnlyAccess")
             ]
         )
         
+        # 回复缓存共享表：振铃期间预生成的开场白与首轮回复由其他 Lambda 实例读取
+        response_cache_table = dynamodb.Table(
+            self, "ResponseCacheTable",
+            partition_key=dynamodb.Attribute(name="k", type=dynamodb.AttributeType.STRING),
+            time_to_live_attribute="ttl",
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=cdk.RemovalPolicy.DESTROY
+        )
+        
         # Lambda函数
         lambda_function = _lambda.Function(
             self, "VoiceOutboundLambda",
+            # 函数名由堆栈名决定，外呼页面（振铃期间预生成）按名称调用
+            function_name="{function_name}",
             runtime=_lambda.Runtime.PYTHON_3_9,
             handler="lambda_function.lambda_handler",
             code=_lambda.Code.from_asset("voice_outbound_llm_lambda.zip"),
             role=lambda_role,
-            timeout=cdk.Duration.minutes(5)
+            timeout=cdk.Duration.minutes(5),
+            environment={{"RESPONSE_CACHE_TABLE": response_cache_table.table_name}}
+        )
+        response_cache_table.grant_read_write_data(lambda_function)
+        # 增量部署时直接更新函数代码
+        cdk.CfnOutput(self, "LambdaFunctionName", value=lambda_function.function_name)
+        cdk.CfnOutput(self, "LambdaFunctionArn", value=lambda_function.function_arn)
+        
+        # 允许联系流调用该 Lambda（开场白）
+        connect.CfnIntegrationAssociation(
+            self, "VoiceOutboundLambdaAssociation",
+            instance_id=f"arn:aws:connect:{region}:{{self.account}}:instance/{connect_instance_id}",
+            integration_type="LAMBDA_FUNCTION",
+            integration_arn=lambda_function.function_arn
         )
         
         # 联系流 - 仅在文件存在时创建
         try:
             with open("voice_outbound_llm_flow.json", "r") as f:
                 flow_content = json.load(f)
+            # 联系流调用本堆栈的 Lambda，而不是流文件中导出时的函数
+            for action in flow_content.get("Actions", []):
+                if action.get("Type") == "InvokeLambdaFunction":
+                    action.setdefault("Parameters", {{}})["LambdaFunctionARN"] = lambda_function.function_arn
             
             contact_flow = connect.CfnContactFlow(
                 self, "VoiceOutboundFlow",
@@ -60,6 +91,8 @@ class VoiceOutboundStack(Stack):
                 type="CONTACT_FLOW",
                 content=json.dumps(flow_content)
             )
+            # 增量部署时直接更新联系流内容
+            cdk.CfnOutput(self, "ContactFlowArn", value=contact_flow.attr_contact_flow_arn)
         except FileNotFoundError:
             print("voice_outbound_llm_flow.json not found, skipping contact flow creation")
 
@@ -69,72 +102,29 @@ app.synth()
 '''
     return cdk_code
 
-def deploy_resources(aws_access_key, aws_secret_key, region, connect_instance_id, stack_name, use_default_credentials=False):
-    """部署AWS资源"""
-    try:
-        # 设置AWS凭证
-        if not use_default_credentials:
-            os.environ['AWS_ACCESS_KEY_ID'] = aws_access_key
-            os.environ['AWS_SECRET_ACCESS_KEY'] = aws_secret_key
-        os.environ['AWS_DEFAULT_REGION'] = region
-        
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # 创建CDK项目结构
-            app_py = os.path.join(temp_dir, "app.py")
-            with open(app_py, "w") as f:
-                f.write(create_cdk_app(aws_access_key, aws_secret_key, region, connect_instance_id, stack_name))
-            
-            # 复制必要文件
-            current_dir = Path(__file__).parent
-            for file_name in ["voice_outbound_llm_flow.json", "voice_outbound_llm_lambda.zip", "voice_outbound_llm_lex.zip"]:
-                src = current_dir / file_name
-                if src.exists():
-                    dst = os.path.join(temp_dir, file_name)
-                    if file_name.endswith('.zip'):
-                        import shutil
-                        shutil.copy2(src, dst)
-                    else:
-                        with open(src, 'r') as f_src, open(dst, 'w') as f_dst:
-                            f_dst.write(f_src.read())
-            
-            # 创建cdk.json
-            cdk_json = os.path.join(temp_dir, "cdk.json")
-            with open(cdk_json, "w") as f:
-                json.dump({
-                    "app": "python app.py",
-                    "watch": {
-                        "include": ["**"],
-                        "exclude": ["README.md", "cdk*.json", "requirements*.txt", "source.bat", "**/__pycache__", "**/*.pyc"]
-                    },
-                    "context": {
-                        "@aws-cdk/aws-lambda:recognizeLayerVersion": True,
-                        "@aws-cdk/core:checkSecretUsage": True,
-                        "@aws-cdk/core:target-partitions": ["aws", "aws-cn"]
-                    }
-                }, f, indent=2)
-            
-            # 创建requirements.txt
-            requirements = os.path.join(temp_dir, "requirements.txt")
-            with open(requirements, "w") as f:
-                f.write("aws-cdk-lib>=2.0.0\nconstructs>=10.0.0")
-            
-            # 安装依赖
-            subprocess.run(["pip", "install", "-r", "requirements.txt"], cwd=temp_dir, check=True)
-            
-            # Bootstrap CDK环境
-            bootstrap_result = subprocess.run(["cdk", "bootstrap"], 
-                                            cwd=temp_dir, capture_output=True, text=True)
-            if bootstrap_result.returncode != 0:
-                return False, bootstrap_result.stdout, f"Bootstrap失败: {bootstrap_result.stderr}"
-            
-            # 部署
-            result = subprocess.run(["cdk", "deploy", "--require-approval", "never"], 
-                                  cwd=temp_dir, capture_output=True, text=True)
-            
-            return result.returncode == 0, result.stdout, result.stderr
-            
-    except Exception as e:
-        return False, "", str(e)
+ASSET_FILES = ["voice_outbound_llm_flow.json", "voice_outbound_llm_lambda.zip", "voice_outbound_llm_lex.zip"]
+
+def deploy_resources(aws_access_key, aws_secret_key, region, connect_instance_id, stack_name, use_default_credentials=False, force=False):
+    """增量部署AWS资源：复用工作目录、虚拟环境与 cdk.out，只更新内容有变化的组件"""
+    # 凭证显式交给部署器（API 调用与 cdk 子进程），不写入本进程的环境变量
+    credentials = None
+    if not use_default_credentials:
+        credentials = {'aws_access_key_id': aws_access_key, 'aws_secret_access_key': aws_secret_key}
+    
+    current_dir = Path(__file__).parent
+    deployer = IncrementalDeployer(
+        stack_name,
+        create_cdk_app(aws_access_key, aws_secret_key, region, connect_instance_id, stack_name),
+        [current_dir / file_name for file_name in ASSET_FILES],
+        region,
+        # Lambda 代码与联系流内容可直接调用 API 更新；Lex zip 不在堆栈中，变化时按完整部署处理
+        hotswaps={
+            "voice_outbound_llm_lambda.zip": update_lambda_code("LambdaFunctionName"),
+            "voice_outbound_llm_flow.json": update_contact_flow("ContactFlowArn", "LambdaFunctionArn"),
+        },
+        credentials=credentials
+    )
+    return deployer.deploy(force=force)
 
 # Streamlit界面
 with st.form("deploy_form"):
@@ -152,7 +142,9 @@ with st.form("deploy_form"):
     
     st.subheader("Amazon Connect配置")
     connect_instance_id = st.text_input("Amazon Connect实例ID", placeholder="xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx")
-    stack_name = st.text_input("Stack名称", value="VoiceOutboundStack", placeholder="输入CDK Stack名称")
+    stack_name = st.text_input("Stack名称", value=DEFAULT_STACK_NAME, placeholder="输入CDK Stack名称",
+                               help="Lambda 函数名由 Stack 名称决定，不同 Stack 可部署在同一账号与区域")
+    force = st.checkbox("强制完整部署", help="忽略内容哈希，重新执行 cdk deploy")
     
     if st.form_submit_button("开始部署"):
         if use_default_credentials:
@@ -164,23 +156,25 @@ with st.form("deploy_form"):
             st.error("请填写所有必填字段")
         else:
             with st.spinner("正在部署资源..."):
-                success, stdout, stderr = deploy_resources(aws_access_key, aws_secret_key, region, connect_instance_id, stack_name, use_default_credentials)
+                result = deploy_resources(aws_access_key, aws_secret_key, region, connect_instance_id, stack_name, use_default_credentials, force)
                 
-                if success:
-                    st.success("部署成功！")
-                    if stdout:
-                        st.text_area("部署输出", stdout, height=200)
+                if result.success:
+                    st.success("部署成功！" if result.plan['action'] != 'skip' else "所有组件均未变化，跳过部署")
+                    st.info(f"外呼页面的「预生成Lambda函数」请填写: {lambda_function_name(stack_name)}")
+                    if result.stdout:
+                        st.text_area("部署输出", result.stdout, height=200)
                 else:
                     st.error("部署失败")
-                    if stderr:
-                        st.text_area("错误信息", stderr, height=200)
+                    if result.stderr:
+                        st.text_area("错误信息", result.stderr, height=200)
+                st.caption(f"部署方式: {result.plan['action']}（{result.plan['reason']}）")
+                st.table([{"阶段": phase, "耗时 (秒)": seconds} for phase, seconds in result.timings.items()])
 
 # 文件检查状态
 st.subheader("部署文件状态")
 current_dir = Path(__file__).parent
-required_files = ["voice_outbound_llm_flow.json", "voice_outbound_llm_lambda.zip", "voice_outbound_llm_lex.zip"]
 
-for file_name in required_files:
+for file_name in ASSET_FILES:
     file_path = current_dir / file_name
     if file_path.exists():
         st.success(f"✅ {file_name}")
@@ -0,0 +1,90 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound.campaign import CampaignAggregator
+
+
+def write_lines(path, records):
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def test_count_reads_counters_and_page_stops_early(tmp_path):
+    results = tmp_path / 'results.jsonl'
+    statuses = ['dialed', 'failed', 'dialed', 'dialed', 'failed']
+    write_lines(results, [
+        {'row': i, 'phone': f'+{i}', 'status': status, 'contact_id': f'c{i}'} for i, status in enumerate(statuses)
+    ])
+    aggregator = CampaignAggregator(str(results))
+    aggregator.poll()
+
+    assert aggregator.count() == 5
+    assert aggregator.count(status='dialed') == 3
+    assert aggregator.count(status='dialed', phone='+2') == 1
+
+    # 计数字段的筛选不扫描联系人表
+    rows, aggregator._rows = aggregator._rows, ExplodingRows(aggregator._rows)
+    assert aggregator.count(status='failed') == 2
+    aggregator._rows = rows
+
+    assert [r['row'] for r in aggregator.page(0, 2, status='dialed')] == [0, 2]
+    assert [r['row'] for r in aggregator.page(1, 2, newest_first=True, status='dialed')] == [2, 0]
+    assert [r['row'] for r in aggregator.page(3, 10, newest_first=True)] == [1, 0]
+
+
+class ExplodingRows(list):
+    def __iter__(self):
+        raise AssertionError('联系人表被遍历')
+
+
+def test_incremental_aggregation(tmp_path):
+    results = tmp_path / 'results.jsonl'
+    outcomes = tmp_path / 'outcomes.jsonl'
+    write_lines(results, [
+        {'row': 0, 'phone': '+1', 'status': 'dialed', 'contact_id': 'c0'},
+        {'row': 1, 'phone': '+2', 'status': 'retry', 'error': 'ThrottlingException'},
+    ])
+    # 终态结果先于外呼结果写出
+    write_lines(outcomes, [{'contact_id': 'c1', 'connected_to_system': 5.0, 'disconnected': 9.0, 'amd_result': 'VOICEMAIL_BEEP'}])
+    aggregator = CampaignAggregator(str(results), str(outcomes))
+    assert aggregator.poll() == 3
+    snapshot = aggregator.snapshot()
+    assert snapshot['statuses'] == {'dialed': 1, 'retry': 1}
+    assert snapshot['pending_outcomes'] == 1 and snapshot['connected'] == 0
+
+    # 续拨成功：同一行的新记录撤销旧计数，等待中的终态结果随之生效
+    with open(results, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'row': 1, 'phone': '+2', 'status': 'dialed', 'contact_id': 'c1'}) + '\n')
+        f.write('{"row": 2, "phone": "+3", "sta')
+    write_lines(outcomes, [
+        {'contact_id': 'c0', 'connected_to_system': 1.0, 'disconnected': 3.0, 'disconnect_reason': 'CUSTOMER_DISCONNECT',
+         'amd_result': 'HUMAN_ANSWERED'},
+        # 重复投递替换旧值
+        {'contact_id': 'c1', 'connected_to_system': 5.0, 'disconnected': 9.0, 'amd_result': 'HUMAN_ANSWERED'},
+        {'contact_id': None},
+    ])
+    with open(outcomes, 'a', encoding='utf-8') as f:
+        f.write('not json\n')
+    aggregator.poll()
+    snapshot = aggregator.snapshot()
+    assert snapshot['contacts'] == 2
+    assert snapshot['statuses'] == {'dialed': 2}
+    assert (snapshot['connected'], snapshot['disconnected']) == (2, 2)
+    assert snapshot['amd_results'] == {'HUMAN_ANSWERED': 2}
+    assert snapshot['disconnect_reasons'] == {'CUSTOMER_DISCONNECT': 1}
+    assert snapshot['pending_outcomes'] == 0 and snapshot['skipped'] == 2
+    assert aggregator.values('amd_result') == ['HUMAN_ANSWERED']
+
+    # 写完的半行在下次读取时处理
+    with open(results, 'a', encoding='utf-8') as f:
+        f.write('tus": "failed"}\n')
+    aggregator.poll()
+    assert aggregator.count(status='failed') == 1
+
+    # 文件被替换时从头重新汇总
+    results.write_text(json.dumps({'row': 0, 'phone': '+9', 'status': 'failed'}) + '\n', encoding='utf-8')
+    aggregator.poll()
+    assert aggregator.snapshot()['statuses'] == {'failed': 1}
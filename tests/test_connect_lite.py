@@ -0,0 +1,131 @@
+import socket
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+from connect_stub import start_stub
+from voice_outbound.call import connect_client
+from voice_outbound import connect_lite
+from voice_outbound.connect_lite import ConnectApiError, LiteConnectClient, sign_headers
+from voice_outbound.throttle import RETRYABLE, THROTTLE, call_with_retry, classify_error
+
+
+@pytest.fixture
+def stub():
+    server = start_stub(tps=1)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def client(endpoint_url, timeout=5.0):
+    return LiteConnectClient('us-east-1', 'AKIDEXAMPLE', 'secret', endpoint_url=endpoint_url, timeout=timeout)
+
+
+def start(lite):
+    return lite.start_outbound_voice_contact(
+        DestinationPhoneNumber='+12285332612', ContactFlowId='flow', InstanceId='instance', ClientToken='t1'
+    )
+
+
+def test_round_trip_returns_datetimes(stub):
+    lite = client(stub.endpoint_url)
+    contact_id = start(lite)['ContactId']
+    contact = lite.describe_contact(InstanceId='instance', ContactId=contact_id)['Contact']
+    assert contact['Id'] == contact_id
+    assert isinstance(contact['InitiationTimestamp'], datetime)
+    assert contact['InitiationTimestamp'].tzinfo is not None
+    lite.close()
+
+
+def test_throttle_error_matches_botocore(stub):
+    lite = client(stub.endpoint_url)
+    start(lite)
+    with pytest.raises(ConnectApiError) as info:
+        lite.start_outbound_voice_contact(DestinationPhoneNumber='+1', ContactFlowId='f', InstanceId='i')
+    assert info.value.response['Error']['Code'] == 'ThrottlingException'
+    assert classify_error(info.value) == THROTTLE
+    lite.close()
+
+
+def test_timeout_is_retryable():
+    # 接受连接但从不响应
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(8)
+    try:
+        lite = client('http://127.0.0.1:%d' % server.getsockname()[1], timeout=0.2)
+        calls = []
+
+        def attempt():
+            calls.append(1)
+            return start(lite)
+
+        with pytest.raises(socket.timeout) as info:
+            call_with_retry(attempt, max_attempts=3, sleep=lambda seconds: None)
+        assert classify_error(info.value) == RETRYABLE
+        assert len(calls) == 3
+    finally:
+        server.close()
+
+
+def test_connection_refused_is_retryable():
+    probe = socket.socket()
+    probe.bind(('127.0.0.1', 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    with pytest.raises(ConnectionError) as info:
+        start(client('http://127.0.0.1:%d' % port))
+    assert classify_error(info.value) == RETRYABLE
+
+
+def test_boto3_is_the_default(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'AKIDEXAMPLE')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'secret')
+    monkeypatch.setenv('AWS_REGION', 'us-east-1')
+    assert not isinstance(connect_client(), LiteConnectClient)
+    assert isinstance(connect_client(lite=True), LiteConnectClient)
+
+
+# AWS SigV4 测试套件 get-vanilla / post-vanilla（服务名 service）
+VECTOR_TIME = datetime(2015, 8, 30, 12, 36, tzinfo=timezone.utc)
+VECTOR_KEY = ('AKIDEXAMPLE', 'wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY')
+
+
+@pytest.mark.parametrize('method, signature', [
+    ('GET', '5fa00fa31553b73ebf1942676e86291e8372ff2a2260956d9b8aae1d763fbf31'),
+    ('POST', '5da7c1a2acd57cee7505fc6676e4e544621c30862966e37dddb68e92efbe5d6b'),
+])
+def test_sigv4_matches_the_aws_test_suite(monkeypatch, method, signature):
+    monkeypatch.setattr(connect_lite, 'SERVICE', 'service')
+    headers = sign_headers(method, 'example.amazonaws.com', '/', b'', 'us-east-1', *VECTOR_KEY, now=VECTOR_TIME)
+    assert headers['x-amz-date'] == '20150830T123600Z'
+    assert headers['authorization'] == (
+        'AWS4-HMAC-SHA256 Credential=AKIDEXAMPLE/20150830/us-east-1/service/aws4_request, '
+        f'SignedHeaders=host;x-amz-date, Signature={signature}'
+    )
+
+
+def test_sigv4_matches_botocore_for_connect_requests(monkeypatch):
+    auth_module = pytest.importorskip('botocore.auth')
+    from botocore.auth import SigV4Auth
+    from botocore.awsrequest import AWSRequest
+    from botocore.credentials import Credentials
+
+    host = 'connect.ap-northeast-1.amazonaws.com'
+    path = '/contacts/b7e4b4ed-1bdf/a%3Ab'
+    body = b'{"DestinationPhoneNumber": "+12285332612"}'
+    headers = sign_headers('PUT', host, path, body, 'ap-northeast-1', *VECTOR_KEY, session_token='token', now=VECTOR_TIME)
+
+    request = AWSRequest(method='PUT', url=f'https://{host}{path}', data=body,
+                         headers={'Content-Type': 'application/json'})
+    auth = SigV4Auth(Credentials(*VECTOR_KEY, token='token'), 'connect', 'ap-northeast-1')
+    monkeypatch.setattr(auth_module, 'get_current_datetime', lambda: VECTOR_TIME.replace(tzinfo=None))
+    auth.add_auth(request)
+    assert headers['authorization'] == request.headers['Authorization']
+    assert headers['x-amz-security-token'] == 'token'
@@ -0,0 +1,149 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound.deploy import IncrementalDeployer, lambda_function_name, update_contact_flow, update_lambda_code
+
+OUTPUTS = {'VoiceOutboundStack': {'LambdaFunctionName': 'voice-outbound-llm'}}
+
+
+class FakeSts:
+    def __init__(self, account):
+        self.account = account
+
+    def get_caller_identity(self):
+        return {'Account': self.account}
+
+
+class FakeCloudFormation:
+    def describe_stacks(self, StackName):
+        return {'Stacks': [{'StackStatus': 'CREATE_COMPLETE'}]}
+
+
+class FakeLambda:
+    def __init__(self):
+        self.updated = []
+
+    def update_function_code(self, FunctionName, ZipFile):
+        self.updated.append(FunctionName)
+
+    def get_waiter(self, name):
+        return self
+
+    def wait(self, FunctionName):
+        pass
+
+
+class FakeRun:
+    """记录子进程命令与环境变量；cdk deploy 写出堆栈输出"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, args, cwd, env, **kwargs):
+        self.calls.append((args, env))
+        if args[:2] == ['cdk', 'deploy']:
+            (Path(cwd) / 'outputs.json').write_text(json.dumps(OUTPUTS), encoding='utf-8')
+        return subprocess.CompletedProcess(args, 0, '', '')
+
+    def commands(self):
+        return [args[:2] for args, _ in self.calls]
+
+
+def deployer(tmp_path, account, run, lambda_client=None, credentials=None):
+    asset = tmp_path / 'voice_outbound_llm_lambda.zip'
+    deployer = IncrementalDeployer(
+        'VoiceOutboundStack', 'app = 1\n', [asset], 'us-east-1',
+        hotswaps={asset.name: update_lambda_code('LambdaFunctionName')},
+        workspace=tmp_path / 'workspace', run=run, credentials=credentials
+    )
+    deployer._clients = {'sts': FakeSts(account), 'cloudformation': FakeCloudFormation(), 'lambda': lambda_client}
+    return deployer
+
+
+def test_state_is_kept_per_account(tmp_path):
+    asset = tmp_path / 'voice_outbound_llm_lambda.zip'
+    asset.write_bytes(b'v1')
+    run = FakeRun()
+    first = deployer(tmp_path, '111111111111', run).deploy()
+    assert first.success and first.plan['action'] == 'full'
+
+    # 同一工作目录、换成另一个账号的凭证：不能沿用第一个账号的状态
+    other = deployer(tmp_path, '222222222222', run).deploy()
+    assert other.plan['action'] == 'full'
+    assert deployer(tmp_path, '222222222222', run).deploy().plan['action'] == 'skip'
+
+    asset.write_bytes(b'v2')
+    lambda_client = FakeLambda()
+    result = deployer(tmp_path, '111111111111', run, lambda_client).deploy()
+    assert result.plan['action'] == 'hotswap'
+    assert lambda_client.updated == ['voice-outbound-llm']
+
+    state = json.loads((tmp_path / 'workspace' / 'state.json').read_text(encoding='utf-8'))
+    assert set(state['targets']) == {'111111111111/us-east-1', '222222222222/us-east-1'}
+    assert state['targets']['222222222222/us-east-1']['hashes'] != state['targets']['111111111111/us-east-1']['hashes']
+
+
+def test_subprocesses_use_explicit_credentials(tmp_path, monkeypatch):
+    (tmp_path / 'voice_outbound_llm_lambda.zip').write_bytes(b'v1')
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'OLDKEY')
+    monkeypatch.setenv('AWS_SESSION_TOKEN', 'OLDTOKEN')
+    monkeypatch.setenv('AWS_PROFILE', 'old')
+    run = FakeRun()
+    credentials = {'aws_access_key_id': 'NEWKEY', 'aws_secret_access_key': 'NEWSECRET'}
+    result = deployer(tmp_path, '111111111111', run, credentials=credentials).deploy()
+
+    assert result.success
+    assert ['cdk', 'deploy'] in run.commands()
+    for _, env in run.calls:
+        assert env['AWS_ACCESS_KEY_ID'] == 'NEWKEY'
+        assert env['AWS_SECRET_ACCESS_KEY'] == 'NEWSECRET'
+        assert env['AWS_DEFAULT_REGION'] == 'us-east-1'
+        assert 'AWS_SESSION_TOKEN' not in env and 'AWS_PROFILE' not in env
+
+
+def test_sessions_are_not_shared_between_credentials(tmp_path):
+    def make(key):
+        credentials = {'aws_access_key_id': key, 'aws_secret_access_key': key.lower()}
+        return IncrementalDeployer('Stack', '', [], 'us-east-1', workspace=tmp_path, credentials=credentials)
+
+    first, second = make('A'), make('B')
+    assert first.client('sts') is not second.client('sts')
+    assert first.client('sts')._request_signer._credentials.access_key == 'A'
+    assert second.client('sts')._request_signer._credentials.access_key == 'B'
+
+
+def test_function_name_follows_the_stack_name():
+    assert lambda_function_name('VoiceOutboundStack') == 'voice-outbound-llm'
+    assert lambda_function_name('Prod_Stack-2') == 'voice-outbound-llm-prod-stack-2'
+    assert len(lambda_function_name('S' * 128)) <= 64
+
+
+class FakeConnect:
+    def __init__(self):
+        self.calls = []
+
+    def update_contact_flow_content(self, **kwargs):
+        self.calls.append(kwargs)
+
+
+def test_flow_hotswap_points_the_flow_at_the_stack_lambda(tmp_path):
+    flow = tmp_path / 'flow.json'
+    flow.write_text(json.dumps({'Actions': [
+        {'Type': 'InvokeLambdaFunction', 'Parameters': {'LambdaFunctionARN': 'arn:aws:lambda:us-east-1:1:function:voice-outbound-llm'}},
+        {'Type': 'MessageParticipant', 'Parameters': {'Text': 'hi'}},
+    ]}), encoding='utf-8')
+    arn = 'arn:aws:lambda:us-east-1:2:function:voice-outbound-llm-prod'
+    outputs = {
+        'ContactFlowArn': 'arn:aws:connect:us-east-1:2:instance/i-1/contact-flow/f-1',
+        'LambdaFunctionArn': arn,
+    }
+    connect = FakeConnect()
+    update_contact_flow('ContactFlowArn', 'LambdaFunctionArn')(str(flow), outputs, lambda name: connect)
+    call, = connect.calls
+    assert (call['InstanceId'], call['ContactFlowId']) == ('i-1', 'f-1')
+    actions = json.loads(call['Content'])['Actions']
+    assert actions[0]['Parameters']['LambdaFunctionARN'] == arn
+    assert actions[1]['Parameters'] == {'Text': 'hi'}
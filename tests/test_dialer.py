@@ -0,0 +1,114 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound import throttle
+from voice_outbound.dialer import BulkDialer, TokenBucket, load_contacts, sustainable_rate
+from voice_outbound.journal import DIALED, FAILED, RETRY, CampaignJournal
+
+
+class ClientError(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.response = {'Error': {'Code': code}, 'ResponseMetadata': {'HTTPStatusCode': 400}}
+
+
+class FakeConnect:
+    """按号码预设失败序列的 start_outbound_voice_contact"""
+
+    def __init__(self, failures=None):
+        self.failures = {phone: list(codes) for phone, codes in (failures or {}).items()}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def start_outbound_voice_contact(self, **params):
+        with self._lock:
+            self.calls.append(params)
+            codes = self.failures.get(params['DestinationPhoneNumber'])
+            if codes:
+                raise ClientError(codes.pop(0))
+        return {'ContactId': 'c-' + params['DestinationPhoneNumber']}
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(throttle, 'backoff_delay', lambda *args: 0)
+
+
+def dialer(client, **kwargs):
+    return BulkDialer(client, 'instance', 'flow', rate=1000, max_workers=4, **kwargs)
+
+
+def rows(*phones):
+    return [(i, {'phone': phone, 'UserName': f'user{i}'}, None) for i, phone in enumerate(phones)]
+
+
+def test_token_bucket_allows_burst_then_spaces_calls():
+    bucket = TokenBucket(50, burst=3)
+    started = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.monotonic() - started < 0.05
+    for _ in range(5):
+        bucket.acquire()
+    # 突发之后按 50 次/秒发放，5 个令牌约 0.1 秒
+    assert 0.08 <= time.monotonic() - started < 0.5
+
+
+def test_token_bucket_set_rate_caps_saved_tokens():
+    bucket = TokenBucket(100)
+    bucket.set_rate(2)
+    assert bucket.capacity == 2
+    bucket.acquire()
+    bucket.acquire()
+    started = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - started >= 0.3
+
+
+def test_sustainable_rate_respects_concurrency():
+    assert sustainable_rate(5) == 5
+    assert sustainable_rate(5, concurrent_calls=100, avg_call_seconds=60) == pytest.approx(100 / 60)
+    assert sustainable_rate(1, concurrent_calls=100, avg_call_seconds=60) == 1
+
+
+def test_run_dials_every_contact_and_retries_throttles():
+    client = FakeConnect({'+2': ['ThrottlingException'], '+3': ['InvalidParameterException']})
+    results = []
+    summary = dialer(client).run(rows('+1', '+2', '+3', ''), on_result=results.append)
+
+    by_phone = {r['phone']: r for r in results}
+    assert by_phone['+1'] == {'row': 0, 'phone': '+1', 'status': DIALED, 'contact_id': 'c-+1'}
+    assert by_phone['+2']['status'] == DIALED
+    assert by_phone['+3']['status'] == FAILED
+    assert by_phone['']['error'] == '缺少电话号码'
+    assert summary['rate_control']['throttles'] == 1
+
+    # 限流重试沿用同一个 ClientToken，属性原样传入
+    second = [c for c in client.calls if c['DestinationPhoneNumber'] == '+2']
+    assert len(second) == 2 and second[0]['ClientToken'] == second[1]['ClientToken']
+    assert second[0]['Attributes'] == {'UserName': 'user1'}
+
+
+def test_exhausted_retries_are_left_for_resume(tmp_path):
+    client = FakeConnect({'+1': ['ServiceUnavailableException'] * 2})
+    contacts = tmp_path / 'contacts.csv'
+    contacts.write_text('phone,UserName\n+1,a\n+2,b\n', encoding='utf-8')
+    journal = CampaignJournal(str(tmp_path / 'journal'), input_path=str(contacts))
+    results = []
+    dialer(client, journal=journal, max_attempts=2).run(load_contacts(str(contacts)), on_result=results.append)
+    assert {r['phone']: r['status'] for r in results} == {'+1': RETRY, '+2': DIALED}
+    journal.close()
+
+    # 续拨只重新外呼未完成的行，ClientToken 与第一次相同
+    first_token = client.calls[0]['ClientToken']
+    resumed = CampaignJournal(str(tmp_path / 'journal'), input_path=str(contacts))
+    results = []
+    dialer(client, journal=resumed).run(load_contacts(str(contacts)), on_result=results.append)
+    resumed.close()
+    assert results == [{'row': 0, 'phone': '+1', 'status': DIALED, 'contact_id': 'c-+1'}]
+    assert client.calls[-1]['ClientToken'] == first_token
@@ -0,0 +1,89 @@
+import base64
+import json
+import queue
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound.events import CONTACT_EVENT, ContactEventConsumer, drain_queue, main, replay_file
+from voice_outbound.outcomes import OutcomeStore, to_epoch
+
+
+def event(contact_id, event_type, time, **detail):
+    detail.update(contactId=contact_id, eventType=event_type)
+    return {'detail-type': CONTACT_EVENT, 'time': time, 'detail': detail}
+
+
+def ctr(contact_id, **fields):
+    record = {
+        'ContactId': contact_id,
+        'InitiationTimestamp': '2026-03-02T09:00:00Z',
+        'ConnectedToSystemTimestamp': '2026-03-02T09:00:05Z',
+        'DisconnectTimestamp': '2026-03-02T09:02:00Z',
+        'DisconnectReason': 'CUSTOMER_DISCONNECT',
+        'Attributes': {'amd_result': 'HUMAN_ANSWERED'},
+    }
+    record.update(fields)
+    return record
+
+
+def test_out_of_order_and_duplicate_events_keep_the_first_timestamps():
+    terminal = []
+    consumer = ContactEventConsumer(OutcomeStore(on_terminal=terminal.append))
+    consumer.consume([
+        event('c1', 'DISCONNECTED', '2026-03-02T09:02:00Z', disconnectReason='CUSTOMER_DISCONNECT'),
+        event('c1', 'INITIATED', '2026-03-02T09:00:00Z', initiationTimestamp='2026-03-02T09:00:00Z'),
+        event('c1', 'QUEUED', '2026-03-02T09:01:00Z', queueInfo={'enqueueTimestamp': '2026-03-02T09:01:00Z'}),
+        # 重复投递的 DISCONNECTED 不覆盖已有值，也不再次回调
+        event('c1', 'DISCONNECTED', '2026-03-02T09:09:00Z', disconnectReason='TELECOM_PROBLEM'),
+    ])
+    outcome = consumer.store.get('c1')
+    assert outcome.initiated == to_epoch('2026-03-02T09:00:00Z')
+    assert outcome.enqueued == to_epoch('2026-03-02T09:01:00Z')
+    assert outcome.disconnected == to_epoch('2026-03-02T09:02:00Z')
+    assert outcome.disconnect_reason == 'CUSTOMER_DISCONNECT'
+    assert terminal == [outcome]
+    assert consumer.processed == 4
+
+
+def test_ctr_is_authoritative_and_triggers_on_ctr():
+    ctrs = []
+    consumer = ContactEventConsumer(on_ctr=ctrs.append)
+    consumer.handle(event('c1', 'DISCONNECTED', '2026-03-02T09:03:00Z', answeringMachineDetectionStatus='VOICEMAIL_BEEP'))
+    consumer.handle(ctr('c1', Agent={'ConnectedToAgentTimestamp': '2026-03-02T09:00:30Z'}))
+
+    outcome, = ctrs
+    assert outcome.disconnected == to_epoch('2026-03-02T09:02:00Z')
+    assert outcome.connected_to_agent == to_epoch('2026-03-02T09:00:30Z')
+    # 联系属性中的 amd_result 优先于事件中的应答检测状态
+    assert outcome.amd_result == 'HUMAN_ANSWERED'
+
+
+def test_batched_deliveries_are_unwrapped():
+    kinesis = {'kinesis': {'data': base64.b64encode(json.dumps(ctr('c1')).encode()).decode()}}
+    sqs = {'body': json.dumps(event('c2', 'INITIATED', '2026-03-02T09:00:00Z'))}
+    sns = {'Sns': {'Message': json.dumps(ctr('c3'))}}
+    consumer = ContactEventConsumer()
+    consumer.handle(json.dumps({'Records': [kinesis, sqs, sns]}).encode())
+    consumer.handle({'unrelated': True})
+    consumer.handle(event('c4', 'CONTACT_DATA_UPDATED', '2026-03-02T09:00:00Z'))
+
+    assert consumer.processed == 3 and consumer.skipped == 2
+    assert consumer.store.counts() == {'INITIATED': 1, 'CONNECTED': 0, 'DISCONNECTED': 2}
+
+
+def test_replay_and_queue_sources(tmp_path, capsys):
+    path = tmp_path / 'events.jsonl'
+    path.write_text('\n'.join(json.dumps(ctr(f'c{i}')) for i in range(3)) + '\n\n', encoding='utf-8')
+    assert replay_file(str(path), ContactEventConsumer()) == 3
+
+    q = queue.Queue()
+    for record in (ctr('c1'), ctr('c2'), None):
+        q.put(record)
+    assert drain_queue(q, ContactEventConsumer()) == 2
+
+    output = tmp_path / 'outcomes.jsonl'
+    assert main([str(path), '--output', str(output)]) == 0
+    rows = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+    assert [row['contact_id'] for row in rows] == ['c0', 'c1', 'c2']
+    assert json.loads(capsys.readouterr().err)['contacts'] == 3
@@ -0,0 +1,62 @@
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound.export import TIMESTAMP_COLUMNS, ResultsSink, export_jsonl
+from voice_outbound.outcomes import ContactOutcome
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+DAY = datetime(2026, 3, 2, tzinfo=timezone.utc).timestamp()
+
+
+def test_enqueued_time_is_exported(tmp_path):
+    record = {
+        'contact_id': 'c1',
+        'initiated': DAY + 60,
+        'connected_to_system': DAY + 65,
+        'enqueued': DAY + 90,
+        'connected_to_agent': DAY + 120,
+        'disconnected': DAY + 300,
+        'disconnect_reason': 'CUSTOMER_DISCONNECT',
+        'amd_result': 'HUMAN_ANSWERED',
+    }
+    source = tmp_path / 'outcomes.jsonl'
+    source.write_text(json.dumps(record) + '\n', encoding='utf-8')
+    assert export_jsonl(str(source), str(tmp_path / 'out')) == 1
+
+    table = pq.read_table(str(next((tmp_path / 'out' / 'dt=2026-03-02').glob('*.parquet'))))
+    row = table.to_pylist()[0]
+    assert 'enqueued' in TIMESTAMP_COLUMNS
+    for name in TIMESTAMP_COLUMNS:
+        assert row[name].timestamp() == record[name]
+
+
+def test_results_are_partitioned_by_day_in_row_groups(tmp_path):
+    sink = ResultsSink(str(tmp_path), batch_size=2)
+    for i in range(5):
+        sink.add({'contact_id': f'a{i}', 'initiated': DAY + i, 'disconnected': DAY + i + 60})
+    outcome = ContactOutcome('b0')
+    outcome.initiated = DAY + 86400
+    outcome.amd_result = 'VOICEMAIL_BEEP'
+    outcome.attributes = {'UserName': '康先生'}
+    sink(outcome)
+    sink.add({'contact_id': 'x'})
+    # 满一批即写出，未满的批次留在内存
+    assert sink.rows_written == 4
+    sink.close()
+    assert sink.rows_written == 7
+
+    files = {p.parent.name: pq.ParquetFile(str(p)) for p in tmp_path.glob('dt=*/*.parquet')}
+    assert sorted(files) == ['dt=2026-03-02', 'dt=2026-03-03', 'dt=unknown']
+    first = files['dt=2026-03-02']
+    assert first.metadata.num_row_groups == 3 and first.metadata.num_rows == 5
+
+    row, = files['dt=2026-03-03'].read().to_pylist()
+    assert row['amd_result'] == 'VOICEMAIL_BEEP'
+    assert row['attributes'] == [('UserName', '康先生')]
+    assert row['disconnected'] is None
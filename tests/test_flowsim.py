@@ -0,0 +1,132 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from voice_outbound.flowsim import Flow, FlowSimulator, main, speech_seconds, summarize
+
+IVR_FLOW = str(ROOT / 'ivr' / 'voice_outbound_ivr_flow.json')
+
+
+def prompts(path):
+    return [text for _, text in path['prompts']]
+
+
+def test_ivr_flow_falls_back_without_message():
+    # Go 命令行、单通外呼与默认的批量外呼都不设置 Message
+    simulator = FlowSimulator(Flow.load(IVR_FLOW), attributes={'UserName': '康先生'})
+    paths = simulator.paths()
+    assert paths and all(not path['problems'] for path in paths)
+    for path in paths:
+        assert '尊敬的康先生' in prompts(path)[0]
+        assert '4478.67' in prompts(path)[0]
+    assert simulator.unreachable() == []
+
+
+def test_ivr_flow_plays_rendered_message():
+    attributes = {'UserName': '康先生', 'Message': '<speak>您好，张三</speak>'}
+    path = FlowSimulator(Flow.load(IVR_FLOW), attributes=attributes).run(['1'])
+    assert not path['problems']
+    assert prompts(path)[0] == '<speak>您好，张三</speak>'
+    assert all('4478.67' not in text for text in prompts(path))
+
+
+def action(identifier, type, parameters=None, next=None, conditions=None, errors=None):
+    transitions = {}
+    if next:
+        transitions['NextAction'] = next
+    if conditions:
+        transitions['Conditions'] = [
+            {'NextAction': target, 'Condition': {'Operator': 'Equals', 'Operands': [value]}}
+            for value, target in conditions.items()
+        ]
+    if errors:
+        transitions['Errors'] = [{'ErrorType': error, 'NextAction': target} for error, target in errors.items()]
+    return {'Identifier': identifier, 'Type': type, 'Parameters': parameters or {}, 'Transitions': transitions}
+
+
+# 按 1 转人工，按 2 调 Lambda 后播报，超时重播一次菜单
+MENU_FLOW = {
+    'StartAction': 'menu',
+    'Actions': [
+        action('menu', 'GetParticipantInput', {'Text': '您好$.Attributes.UserName，按1转人工，按2查询', 'InputTimeLimitSeconds': '5'},
+               conditions={'1': 'queue', '2': 'lambda'},
+               errors={'InputTimeLimitExceeded': 'menu', 'NoMatchingCondition': 'bye'}),
+        action('queue', 'TransferContactToQueue', errors={'QueueAtCapacity': 'bye'}),
+        action('lambda', 'InvokeLambdaFunction', {'InvocationTimeLimitSeconds': '4'}, next='say',
+               errors={'NoMatchingError': 'bye'}),
+        action('say', 'MessageParticipant', {'Text': '余额$.External.Balance元'}, next='bye'),
+        action('bye', 'DisconnectParticipant'),
+        action('orphan', 'MessageParticipant', {'Text': '不会播报'}, next='bye'),
+    ],
+}
+
+
+def simulator(**kwargs):
+    return FlowSimulator(Flow(json.loads(json.dumps(MENU_FLOW))), attributes={'UserName': '张三'},
+                         external={'Balance': '100'}, dtmf_seconds=2.0, lambda_seconds=0.5, **kwargs)
+
+
+def test_speech_seconds_counts_text_breaks_and_rate():
+    assert speech_seconds('') == 0.0
+    assert speech_seconds('一二三四五六七八九') == pytest.approx(2.0)
+    assert speech_seconds('<speak>hello world<break time="500ms"/><break/></speak>') == pytest.approx(0.8 + 1.0)
+    assert speech_seconds('<speak><prosody rate="50%">一二三四五六七八九</prosody></speak>') == pytest.approx(4.0)
+    assert speech_seconds('&lt;一&gt;') == pytest.approx(1 / 4.5)
+
+
+def test_paths_enumerate_every_branch():
+    paths = simulator().paths()
+    timeout = 'InputTimeLimitExceeded'
+    # 每轮菜单: 转人工（排队 / 队列已满）、Lambda（成功 / 失败），超时重播，第四次进入菜单视为循环
+    expected = []
+    for retries in range(3):
+        prefix = [timeout] * retries
+        expected += [
+            (prefix + ['1'], 'queue', 'Queued'),
+            (prefix + ['1'], 'disconnect', 'QueueAtCapacity'),
+            (prefix + ['2'], 'disconnect', 'Success'),
+            (prefix + ['2'], 'disconnect', 'NoMatchingError'),
+        ]
+    expected.append(([timeout] * 3, 'loop', timeout))
+    expected += [([timeout] * retries + ['NoMatchingCondition'], 'disconnect', 'NoMatchingCondition') for retries in (2, 1, 0)]
+    assert [(p['inputs'], p['end'], p['outcomes'][-1][1]) for p in paths] == expected
+    assert [p['end'] for p in simulator(max_visits=1).paths() if p['inputs'][0] == timeout] == ['loop']
+
+    summary = summarize(paths)
+    assert summary['paths'] == 16 and summary['ends'] == {'queue': 3, 'disconnect': 12, 'loop': 1}
+    assert summary['talk_seconds_min'] <= summary['talk_seconds_mean'] <= summary['talk_seconds_max']
+
+
+def test_run_follows_inputs_and_estimates_talk_time():
+    path = simulator().run(['2'])
+    assert path['prompts'] == [('menu', '您好张三，按1转人工，按2查询'), ('say', '余额100元')]
+    menu, say = speech_seconds('您好张三，按1转人工，按2查询'), speech_seconds('余额100元')
+    assert path['talk_seconds'] == round(menu + 2.0 + 0.5 + say, 1)
+
+    # Lambda 失败时按超时计时，$.External 为空
+    failed = simulator().run(['timeout', '2'], outcomes={'lambda': 'NoMatchingError'})
+    assert failed['inputs'] == ['InputTimeLimitExceeded', '2']
+    assert failed['talk_seconds'] == round(2 * menu + 5 + 2.0 + 4, 1)
+    with pytest.raises(ValueError, match='不接受输入'):
+        simulator().run(outcomes={'lambda': 'Timeout'}, inputs=['2'])
+
+
+def test_problems_and_unreachable_actions_are_reported(tmp_path, capsys):
+    sim = simulator()
+    assert sim.unreachable() == ['orphan']
+    # 队列未设置、Lambda 没有返回 Balance
+    queued = sim.run(['1'])
+    assert queued['problems'] == ['queue: 转入队列前未设置目标队列']
+    no_external = FlowSimulator(Flow(MENU_FLOW)).run(['2'])
+    assert 'menu: 播报内容引用了未设置的 $.Attributes.UserName' in no_external['problems']
+    assert 'say: 播报内容引用了未设置的 $.External.Balance' in no_external['problems']
+
+    broken = dict(MENU_FLOW, Actions=[action('menu', 'MessageParticipant', {'Text': 'hi'}, next='missing')])
+    path = tmp_path / 'flow.json'
+    path.write_text(json.dumps(broken), encoding='utf-8')
+    assert main([str(path)]) == 1
+    assert '跳转到不存在的动作 missing' in json.loads(capsys.readouterr().err)['problems']
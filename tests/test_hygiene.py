@@ -0,0 +1,68 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound.hygiene import (
+    DNC, DUPLICATE, INVALID, KEPT, RECENT, SuppressionList, clean, normalize, normalize_e164, to_e164
+)
+
+np = pytest.importorskip('numpy')
+
+EDGE_CASES = [
+    '+1 (228) 533-2612', '2285332612', '12285332612', '1-228-533-2612', '0012285332612', '+12285332612',
+    '1285332612', '2281332612', '+1 228 533 2612 ext 5', '228.533.2612', '(228)5332612', '228/533\\2612',
+    '+8613800000001', '008613800000001', '13800000001', '013800000001', '+447911123456', '07911123456',
+    '+0123456789', '+1234567', '+1234567890123456', '', ' ', '+', '++12285332612', '12+2285332612',
+    '２２８５３３２６１２', 'abc', '2285332612x', '\t2285332612\t', '+1' + ' ' * 40 + '2285332612',
+    '+49 30 123456', '+33 1 23 45 67 89', '1' * 15, '9' * 16,
+]
+ALPHABET = '0123456789' * 4 + ' -+().x０/'
+
+
+def fuzz(count, seed=7):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 20))) for _ in range(count)]
+
+
+@pytest.mark.parametrize('country', ['1', '86', '44', '33'])
+def test_vectorized_normalize_matches_scalar(country):
+    raw = EDGE_CASES + fuzz(20000)
+    values, valid = normalize(raw, country)
+    vectorized = [f'+{v}' if ok else None for v, ok in zip(values.tolist(), valid.tolist())]
+    expected = [normalize_e164(value, country) for value in raw]
+    mismatches = [(r, v, e) for r, v, e in zip(raw, vectorized, expected) if v != e]
+    assert mismatches == []
+    assert sum(e is not None for e in expected) > 100
+
+
+def test_input_containers_agree():
+    pa = pytest.importorskip('pyarrow')
+    raw = EDGE_CASES * 3
+    expected = normalize(raw)
+    for column in (np.array(raw), pa.array(raw), pa.chunked_array([raw[:10], raw[10:]])):
+        values, valid = normalize(column)
+        assert values.tolist() == expected[0].tolist()
+        assert valid.tolist() == expected[1].tolist()
+    values, valid = normalize(pa.array(['2285332612', None]))
+    assert valid.tolist() == [True, False]
+    assert normalize([])[0].shape == (0,)
+
+
+def test_clean_statuses_and_suppression_lists(tmp_path):
+    raw = ['2285332612', '+1 228 533 2612', 'bad', '3125550100', '4155550100', '4155550100', '6175550100']
+    dnc = SuppressionList.build(normalize(['312-555-0100'])[0])
+    recent = SuppressionList.build(normalize(['4155550100', '6175550100', '4155550100'])[0], [100, 50, 200])
+    recent.save(str(tmp_path / 'recent'))
+    recent = SuppressionList.open(str(tmp_path / 'recent'))
+    assert len(recent) == 2 and recent.last_contact.tolist() == [200, 50]
+
+    result = clean(raw, dnc=dnc, recent=recent, recent_since=100)
+    assert result.status.tolist() == [KEPT, DUPLICATE, INVALID, DNC, RECENT, RECENT, KEPT]
+    assert to_e164(result.values[result.kept]) == ['+12285332612', '+16175550100']
+    assert result.counts() == {'kept': 2, 'invalid': 1, 'dnc': 1, 'recent': 2, 'duplicate': 1}
+
+    merged = dnc.merge(SuppressionList.build(normalize(['2285332612', '3125550100'])[0]))
+    assert to_e164(merged.numbers) == ['+12285332612', '+13125550100']
@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'llm' / 'lambda'))
+from conversation_memory import ConversationMemory
+from intent_router import (
+    CLOSING, CONFIRM, HANGUP, IDENTITY, PAYMENT, REFUSE, RULES, TRANSFER, WRONG_NUMBER, IntentRouter
+)
+
+router = IntentRouter()
+
+REMINDER_ZH = '您好康先生，您的信用卡有一笔5000元的账单将于8月4日到期，请问您能按时还款吗？'
+REMINDER_EN = 'Hi, this is a reminder that your credit card payment of $5,000 is due on August 4. Will you be able to pay on time?'
+
+
+def stage(memory, locale='zh_CN'):
+    return router.stage(memory.turn_count, memory.last_reply(), locale)
+
+
+def route(text, memory, locale='zh_CN'):
+    return router.classify(text, locale, stage(memory, locale))
+
+
+def test_stages_follow_conversation_memory():
+    memory = ConversationMemory()
+    assert stage(memory) == IDENTITY
+    memory.add_turn('是我', REMINDER_ZH)
+    assert stage(memory) == PAYMENT
+    memory.add_turn('好的', RULES['zh_CN']['replies'][CONFIRM])
+    assert stage(memory) == CLOSING
+    # 第一轮之后的其他追问无法确定阶段
+    memory = ConversationMemory(turns=[['是', REMINDER_ZH], ['我想延期', '可以为您延后7天，期间可能产生额外费用，您看可以吗？']])
+    assert stage(memory) is None
+
+
+def test_identity_turn_does_not_confirm_payment():
+    memory = ConversationMemory()
+    assert route('是', memory) is None
+    assert route('是我', memory) is None
+    assert route('好的', memory) is None
+    assert route('yes', memory, 'en_US') is None
+
+
+def test_wrong_number_closes_the_intent():
+    memory = ConversationMemory()
+    for text in ('不是', '不是我', '打错了'):
+        assert router.route(text, 'zh_CN', stage(memory)) == (WRONG_NUMBER, 'CloseIntent', None)
+    assert route('no', memory, 'en_US') == WRONG_NUMBER
+    # 打错电话在任何阶段都直接结束
+    memory.add_turn('是我', REMINDER_ZH)
+    assert route('你打错了', memory) == WRONG_NUMBER
+    assert route('不是', memory) is None
+
+
+def test_payment_turn_confirms_and_refuses():
+    memory = ConversationMemory(turns=[['是我', REMINDER_ZH]])
+    assert route('好的', memory) == CONFIRM
+    assert route('可以，我下周还款', memory) == CONFIRM
+    assert route('我现在还不了', memory) == REFUSE
+    assert route('没有了', memory) is None
+
+    memory = ConversationMemory(turns=[['yes speaking', REMINDER_EN]])
+    assert route('yes', memory, 'en_US') == CONFIRM
+    assert route('no', memory, 'en_US') == REFUSE
+
+
+def test_no_after_anything_else_hangs_up():
+    memory = ConversationMemory(turns=[['yes', REMINDER_EN], ['yes', RULES['en_US']['replies'][CONFIRM]]])
+    assert stage(memory, 'en_US') == CLOSING
+    assert route('no', memory, 'en_US') == HANGUP
+    assert route('No thanks.', memory, 'en_US') == HANGUP
+
+    memory = ConversationMemory(turns=[['是', REMINDER_ZH], ['好的', RULES['zh_CN']['replies'][CONFIRM]]])
+    assert route('没有了', memory) == HANGUP
+    assert route('好的', memory) is None
+
+
+def test_negated_transfer_goes_to_model():
+    for text in ("I don't want an agent", 'I do not need to talk to a human', 'never mind the operator'):
+        assert router.classify(text, 'en_US', CLOSING) is None
+    for text in ('我不想转人工', '我不需要人工客服', '不要转人工，你直接说'):
+        assert router.classify(text, 'zh_CN', PAYMENT) is None
+    assert router.classify('no, I want an agent', 'en_US', CLOSING) == TRANSFER
+    assert router.classify('帮我转人工', 'zh_CN') == TRANSFER
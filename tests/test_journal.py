@@ -0,0 +1,105 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound.journal import DIALED, FAILED, PENDING, RETRY, CampaignJournal
+
+
+def test_retry_row_keeps_done_rows_compact(tmp_path):
+    journal = CampaignJournal(str(tmp_path), snapshot_every=100, sync=False)
+    journal.record(0, DIALED, offset=10)
+    journal.record(1, RETRY)
+    for row_id in range(2, 5000):
+        journal.record(row_id, DIALED if row_id % 7 else FAILED, offset=(row_id + 1) * 10)
+    assert journal.resume_point() == (1, 10)
+    assert journal.is_done(4999) and not journal.is_done(1) and not journal.is_done(5000)
+    journal.close()
+
+    index = json.loads((tmp_path / 'index.json').read_text(encoding='utf-8'))
+    assert index['done'] == [[2, 4999, 50000]]
+
+    # 续拨时重试成功，水位线越过整个区间
+    journal = CampaignJournal(str(tmp_path), sync=False)
+    journal.record(1, DIALED, offset=20)
+    assert journal.resume_point() == (5000, 50000)
+    journal.close()
+
+
+def test_out_of_order_rows_merge_into_ranges(tmp_path):
+    journal = CampaignJournal(str(tmp_path), sync=False)
+    for row_id in (5, 3, 9, 4, 8, 10):
+        journal.record(row_id, DIALED, offset=row_id * 100)
+    assert journal._done == [[3, 5, 500], [8, 10, 1000]]
+    journal.record(6, PENDING)
+    assert not journal.is_done(6) and not journal.is_done(7) and journal.is_done(8)
+    for row_id in (0, 1, 2):
+        journal.record(row_id, DIALED, offset=row_id * 100)
+    assert journal.resume_point() == (6, 500)
+    journal.close()
+
+
+def test_journal_refuses_a_different_contacts_file(tmp_path):
+    contacts = tmp_path / 'due.jsonl'
+    contacts.write_text('{"phone": "+8613800000001"}\n', encoding='utf-8')
+    directory = str(tmp_path / 'job')
+    journal = CampaignJournal(directory, sync=False, input_path=str(contacts))
+    journal.record(0, DIALED, offset=29)
+    journal.close()
+
+    # 同一文件：正常续拨
+    journal = CampaignJournal(directory, sync=False, input_path=str(contacts))
+    assert journal.resume_point() == (1, 29)
+    journal.close()
+
+    contacts.write_text('{"phone": "+8613800000002"}\n{"phone": "+8613800000003"}\n', encoding='utf-8')
+    with pytest.raises(ValueError, match='另一个联系人文件'):
+        CampaignJournal(directory, sync=False, input_path=str(contacts))
+
+
+def test_crash_replays_only_the_tail_and_drops_a_torn_line(tmp_path):
+    journal = CampaignJournal(str(tmp_path), snapshot_every=4, sync=False)
+    token = journal.client_token(0)
+    for row_id in range(5):
+        journal.record(row_id, DIALED, contact_id=f'c{row_id}', offset=(row_id + 1) * 10)
+    journal.record(5, PENDING, target='secondary')
+    # 模拟崩溃：不调用 close()，最后一行只写了一半
+    journal._file.write(b'{"row": 6, "status": "dia')
+    journal._file.flush()
+
+    index = json.loads((tmp_path / 'index.json').read_text(encoding='utf-8'))
+    assert index['watermark'] == 3
+
+    resumed = CampaignJournal(str(tmp_path), sync=False)
+    assert resumed.resume_point() == (5, 50)
+    assert resumed.client_token(0) == token
+    assert resumed.target(5) == 'secondary'
+    assert not resumed.is_done(5)
+    resumed.record(5, DIALED, offset=60)
+    resumed.close()
+
+    # 写了一半的行被截断，日志仍可逐行解析
+    entries = list(CampaignJournal(str(tmp_path), sync=False).entries())
+    assert [e['row'] for e in entries] == [0, 1, 2, 3, 4, 5, 5]
+    assert all(e['token'] == resumed.client_token(e['row']) for e in entries)
+
+
+def test_client_tokens_differ_between_campaigns(tmp_path):
+    first = CampaignJournal(str(tmp_path / 'a'), sync=False)
+    second = CampaignJournal(str(tmp_path / 'b'), sync=False)
+    assert first.client_token(0) == first.client_token(0)
+    assert first.client_token(0) != first.client_token(1)
+    assert first.client_token(0) != second.client_token(0)
+    first.close()
+    second.close()
+
+
+def test_failed_rows_are_done_but_retry_rows_are_not(tmp_path):
+    journal = CampaignJournal(str(tmp_path), sync=False)
+    journal.record(0, FAILED, offset=10, error='缺少电话号码')
+    journal.record(1, RETRY, error='ServiceUnavailableException')
+    assert journal.is_done(0) and not journal.is_done(1)
+    assert journal.resume_point() == (1, 10)
+    journal.close()
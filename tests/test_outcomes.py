@@ -0,0 +1,50 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound.events import ContactEventConsumer
+from voice_outbound.outcomes import OutcomeStore
+
+ATTRIBUTES = {'amd_result': 'HUMAN_ANSWERED', 'UserName': '康先生', 'Message': '<speak>' + 'x' * 2000 + '</speak>'}
+
+
+def contact(contact_id):
+    return {
+        'Id': contact_id,
+        'InitiationTimestamp': '2026-03-02T09:00:00Z',
+        'DisconnectTimestamp': '2026-03-02T09:01:00Z',
+        'Attributes': ATTRIBUTES,
+    }
+
+
+def test_store_keeps_only_amd_result_by_default():
+    store = OutcomeStore()
+    outcome = store.merge_contact(contact('c1'))
+    assert outcome.amd_result == 'HUMAN_ANSWERED'
+    assert outcome.attributes is None
+    assert outcome.terminal
+
+
+def test_store_keeps_requested_attributes():
+    store = OutcomeStore(attribute_keys=['UserName', 'Missing'])
+    outcome = store.merge_contact(contact('c1'))
+    assert outcome.attributes == {'UserName': '康先生'}
+    assert outcome.to_dict()['amd_result'] == 'HUMAN_ANSWERED'
+
+
+def test_ctr_attributes_follow_the_store_keys():
+    ctr = {
+        'ContactId': 'c2',
+        'InitiationTimestamp': '2026-03-02T09:00:00Z',
+        'DisconnectTimestamp': '2026-03-02T09:01:00Z',
+        'Attributes': ATTRIBUTES,
+    }
+    compact = ContactEventConsumer()
+    compact.handle(ctr)
+    assert compact.store.get('c2').attributes is None
+
+    keeping = ContactEventConsumer(OutcomeStore(attribute_keys=['UserName']))
+    keeping.handle(ctr)
+    outcome = keeping.store.get('c2')
+    assert outcome.attributes == {'UserName': '康先生'}
+    assert outcome.amd_result == 'HUMAN_ANSWERED'
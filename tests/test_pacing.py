@@ -0,0 +1,113 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound.events import ContactEventConsumer
+from voice_outbound.outcomes import OutcomeStore
+from voice_outbound.pacing import OutcomeFeed, PacingEngine
+
+
+def outcome(contact_id, amd_result=None, connected=None, enqueued=None, agent=None, disconnected=100.0):
+    return {
+        'contact_id': contact_id,
+        'initiated': 1.0,
+        'connected_to_system': connected,
+        'enqueued': enqueued,
+        'connected_to_agent': agent,
+        'disconnected': disconnected,
+        'disconnect_reason': 'CUSTOMER_DISCONNECT',
+        'amd_result': amd_result,
+        'attributes': None,
+    }
+
+
+# 10 通外呼：4 通真人接通，其中 2 通转人工，1 通在排队中放弃
+RECORDS = [
+    outcome('c0', 'HUMAN_ANSWERED', connected=10.0),
+    outcome('c1', 'HUMAN', connected=10.0),
+    outcome('c2', 'HUMAN', connected=10.0, enqueued=40.0, agent=45.0),
+    outcome('c3', 'HUMAN', connected=10.0, enqueued=40.0),
+    outcome('c4', 'VOICEMAIL_BEEP', connected=10.0),
+    outcome('c5', 'AMD_UNANSWERED'),
+    outcome('c6'),
+    outcome('c7'),
+    outcome('c8'),
+    outcome('c9'),
+]
+
+
+def engine():
+    # 先验权重为 0，比率即观测值
+    engine = PacingEngine()
+    for ratio in (engine.answers, engine.transfers):
+        ratio.prior_weight = 0
+    return engine
+
+
+def test_feed_drives_engine_from_outcome_records():
+    feed = OutcomeFeed(engine())
+    for record in RECORDS:
+        feed.dialed(record['contact_id'])
+    for record in RECORDS:
+        feed.observe(record)
+
+    assert feed.observed == 10
+    assert feed.engine.answers.observed == 0.4
+    assert feed.engine.transfers.observed == 0.5
+    assert feed.engine.abandons.observed == 0.5
+
+
+def test_feed_ignores_unknown_duplicate_and_open_contacts():
+    feed = OutcomeFeed(engine())
+    feed.dialed('c2')
+    feed.dialed('c3')
+
+    assert feed.observe(outcome('other', 'HUMAN', connected=10.0)) is False
+    assert feed.observe(outcome('c3', 'HUMAN', connected=10.0, enqueued=40.0, disconnected=None)) is False
+    assert feed.observe(RECORDS[2]) is True
+    assert feed.observe(RECORDS[2]) is False
+    assert feed.observe(RECORDS[3]) is True
+
+    assert len(feed.engine.answers.samples) == 2
+    assert feed.engine.abandons.observed == 0.5
+
+
+def test_feed_tails_outcomes_file(tmp_path):
+    path = tmp_path / 'outcomes.jsonl'
+    feed = OutcomeFeed(engine(), str(path))
+    for record in RECORDS:
+        feed.dialed(record['contact_id'])
+
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in RECORDS[:4]:
+            f.write(json.dumps(record) + '\n')
+        # 尚未写完的行留到下次读取
+        line = json.dumps(RECORDS[4]) + '\n'
+        f.write(line[:20])
+    assert feed.poll() == 4
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(line[20:])
+        for record in RECORDS[5:]:
+            f.write(json.dumps(record) + '\n')
+    assert feed.poll() == 6
+    assert feed.poll() == 0
+    assert feed.engine.answers.observed == 0.4
+
+
+def test_store_callback_feeds_contact_events():
+    feed = OutcomeFeed(engine())
+    feed.dialed('c1')
+    consumer = ContactEventConsumer(OutcomeStore(on_terminal=lambda o: feed.observe(o.to_dict())))
+
+    def event(event_type, **detail):
+        detail.update(contactId='c1', eventType=event_type)
+        return {'detail-type': 'Amazon Connect Contact Event', 'time': '2024-05-01T00:00:00Z', 'detail': detail}
+
+    consumer.handle(event('CONNECTED_TO_SYSTEM', answeringMachineDetectionStatus='HUMAN_ANSWERED'))
+    consumer.handle(event('QUEUED', queueInfo={'enqueueTimestamp': '2024-05-01T00:01:00Z'}))
+    consumer.handle(event('DISCONNECTED', disconnectReason='CUSTOMER_DISCONNECT'))
+
+    assert feed.observed == 1
+    assert feed.engine.transfers.observed == 1.0
+    assert feed.engine.abandons.observed == 1.0
@@ -0,0 +1,90 @@
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound.router import DialRouter, DialTarget
+from voice_outbound.throttle import FATAL, RETRYABLE, THROTTLE
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def target(name, clock, **kwargs):
+    kwargs.setdefault('rate', 10.0)
+    return DialTarget(name, None, f'{name}-instance', f'{name}-flow', clock=clock, **kwargs)
+
+
+def routed(router, count, phone='+12285332612'):
+    return [router.route(phone)[0].name for _ in range(count)]
+
+
+def test_smooth_weighted_round_robin():
+    clock = Clock()
+    router = DialRouter([target('a', clock, weight=5), target('b', clock, weight=1), target('c', clock, weight=1)], clock)
+    # 平滑加权：a 的份额均匀分散，不会连续 5 次
+    assert routed(router, 7) == ['a', 'a', 'b', 'a', 'c', 'a', 'a']
+    assert Counter(routed(router, 700)) == {'a': 500, 'b': 100, 'c': 100}
+
+
+def test_throttled_target_gets_a_smaller_share():
+    clock = Clock()
+    slow, fast = target('slow', clock, weight=1), target('fast', clock, weight=1)
+    router = DialRouter([slow, fast], clock)
+    slow.controller.on_throttle()
+    assert slow.effective_weight() == pytest.approx(0.5)
+    assert Counter(routed(router, 300)) == {'fast': 200, 'slow': 100}
+
+
+def test_circuit_breaker_opens_and_recovers():
+    clock = Clock()
+    a, b = target('a', clock, failure_threshold=3, cooldown=30), target('b', clock)
+    router = DialRouter([a, b], clock)
+
+    # 限流与参数错误不计入熔断，成功清零连续失败
+    for kind in (THROTTLE, FATAL, RETRYABLE, RETRYABLE):
+        a.report(ok=False, kind=kind)
+    a.report(ok=True)
+    assert a.consecutive_failures == 0 and a.healthy()
+
+    for _ in range(3):
+        a.report(ok=False, kind=RETRYABLE)
+    assert not a.healthy() and a.snapshot()['weight'] == 0
+    assert set(routed(router, 10)) == {'b'}
+
+    # 全部熔断时选最先恢复的目标
+    b.unhealthy_until = clock.now + 60
+    assert set(routed(router, 3)) == {'a'}
+
+    clock.now += 30
+    assert a.healthy() and not b.healthy()
+    clock.now += 30
+    assert set(routed(router, 4)) == {'a', 'b'}
+    assert a.snapshot()['dialed'] == 1 and a.snapshot()['failed'] == 7
+
+
+def test_source_number_pools_and_pinned_targets():
+    clock = Clock()
+    us = target('us', clock, source_numbers={'+1': ['+13070000001', '+13070000002'], '+1307': ['+13079999999']})
+    cn = target('cn', clock, source_numbers=['+8610000000'])
+    router = DialRouter([us, cn], clock)
+
+    assert [us.source_number('+12285332612') for _ in range(3)] == ['+13070000001', '+13070000002', '+13070000001']
+    assert us.source_number('+13075550000') == '+13079999999'
+    assert not us.accepts('+8613800000001')
+    # 只有 cn 配置了缺省号码池
+    assert {router.route('+8613800000001')[0].name for _ in range(5)} == {'cn'}
+    # 续拨沿用日志记录的目标
+    assert router.route('+12285332612', 'cn') == (cn, '+8610000000')
+
+    with pytest.raises(ValueError, match='号码池不匹配'):
+        DialRouter([us], clock).route('+8613800000001')
+    with pytest.raises(ValueError):
+        DialRouter([])
@@ -0,0 +1,89 @@
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound.scheduler import AttemptHistory, RetryScheduler, main, plan
+
+# 2026-03-02（周一）UTC
+DAY = datetime(2026, 3, 2, tzinfo=timezone.utc).timestamp()
+PHONE = '+8613800000001'
+
+
+def write_round(tmp_path, name, contact_id, initiated):
+    results = tmp_path / f'{name}_results.jsonl'
+    outcomes = tmp_path / f'{name}_outcomes.jsonl'
+    results.write_text(json.dumps({'contact_id': contact_id, 'phone': PHONE}) + '\n', encoding='utf-8')
+    outcome = {'contact_id': contact_id, 'initiated': initiated, 'amd_result': 'AMD_UNANSWERED'}
+    outcomes.write_text(json.dumps(outcome) + '\n', encoding='utf-8')
+    return str(results), str(outcomes)
+
+
+def scheduler(now):
+    return RetryScheduler(max_attempts=3, max_daily_attempts=2, calling_hours=(0, 24), clock=lambda: now)
+
+
+def local_day(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).date()
+
+
+def test_caps_count_attempts_from_earlier_rounds(tmp_path):
+    history = AttemptHistory(str(tmp_path / 'attempts.jsonl'))
+    first = write_round(tmp_path, 'round1', 'c1', DAY + 9 * 3600)
+    second = write_round(tmp_path, 'round2', 'c2', DAY + 11 * 3600)
+
+    round1 = scheduler(DAY + 10 * 3600)
+    plan(round1, *first, history=history)
+    assert local_day(round1.next_due()) == local_day(DAY)
+
+    # 第二轮只传入本轮文件：当日已外呼两次（含第一轮），顺延到次日
+    round2 = scheduler(DAY + 12 * 3600)
+    plan(round2, *second, history=history)
+    assert round2.numbers[PHONE].attempts == 2
+    assert local_day(round2.next_due()) > local_day(DAY)
+
+    # 没有历史时只看到本轮的一次外呼
+    alone = scheduler(DAY + 12 * 3600)
+    plan(alone, *second)
+    assert local_day(alone.next_due()) == local_day(DAY)
+
+    # 第三轮达到总次数上限，不再重拨
+    third = write_round(tmp_path, 'round3', 'c3', DAY + 86400 + 10 * 3600)
+    round3 = scheduler(DAY + 86400 + 11 * 3600)
+    plan(round3, *third, history=history)
+    assert len(round3) == 0
+
+
+def test_replanning_the_same_round_does_not_double_count(tmp_path):
+    history = AttemptHistory(str(tmp_path / 'attempts.jsonl'))
+    files = write_round(tmp_path, 'round1', 'c1', DAY + 9 * 3600)
+    for _ in range(3):
+        again = scheduler(DAY + 10 * 3600)
+        plan(again, *files, history=history)
+        assert again.numbers[PHONE].attempts == 1
+        assert len(again) == 1
+    assert len(list(history.records())) == 1
+
+
+def test_plan_merges_into_the_existing_plan(tmp_path):
+    output = tmp_path / 'retries.jsonl'
+    other = '+8613800000002'
+    # 以往轮次留下的两条未到期重拨
+    output.write_text(
+        json.dumps({'phone': PHONE, 'due_at': DAY + 86400}) + '\n'
+        + json.dumps({'phone': other, 'Name': '李四', 'due_at': DAY + 2 * 86400}) + '\n',
+        encoding='utf-8'
+    )
+    results, outcomes = write_round(tmp_path, 'round2', 'c2', DAY + 11 * 3600)
+    assert main([
+        'plan', results, outcomes, '--output', str(output), '--calling-hours', '0-24', '--max-daily-attempts', '2'
+    ]) == 0
+
+    rows = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+    assert sorted(row['phone'] for row in rows) == [PHONE, other]
+    # 未外呼的号码保留原安排，本轮外呼过的号码按本轮结果重新安排
+    kept = next(row for row in rows if row['phone'] == other)
+    assert kept == {'phone': other, 'Name': '李四', 'due_at': DAY + 2 * 86400}
+    assert next(row for row in rows if row['phone'] == PHONE)['due_at'] != DAY + 86400
+    assert rows == sorted(rows, key=lambda row: row['due_at'])
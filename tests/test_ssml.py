@@ -0,0 +1,65 @@
+import sys
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound.ssml import SSMLTemplate, compile_template, escape, ivr_demo_template, ivr_reminder_template
+
+FIELDS = {
+    'UserName': '康先生',
+    'LoanDate': '2025/07/01',
+    'LoanAmount': '50,000',
+    'DueDate': '08-01',
+    'DueAmount': '4478.67',
+    'MinimumPayment': '447.87',
+    'Hotline': '877-842-2670',
+}
+
+
+def test_attribute_values_cannot_inject_ssml():
+    template = compile_template('<speak>您好，{UserName}</speak>')
+    hostile = '</speak><audio src="http://evil"/>"\'&'
+    ssml = template.render({'UserName': hostile})
+    assert ssml == '<speak>您好，&lt;/speak&gt;&lt;audio src=&quot;http://evil&quot;/&gt;&quot;&apos;&amp;</speak>'
+    # 仍是单个 speak 元素，原文本按字面朗读
+    root = ET.fromstring(ssml)
+    assert root.tag == 'speak' and list(root) == []
+    assert root.text == '您好，' + hostile
+
+
+def test_say_as_formatting():
+    ssml = ivr_reminder_template().render(FIELDS)
+    ET.fromstring(ssml)
+    assert '<say-as interpret-as="date" format="yyyymmdd">20250701</say-as>' in ssml
+    assert '<say-as interpret-as="cardinal">50000</say-as>' in ssml
+    assert '<say-as interpret-as="date" format="yyyymmdd">????0801</say-as>' in ssml
+    assert '<say-as interpret-as="digits">8778422670</say-as>' in ssml
+
+
+@pytest.mark.parametrize('field, value, message', [
+    ('LoanAmount', 'abc', '无效的金额'),
+    ('LoanAmount', 'NaN', '无效的金额'),
+    ('LoanDate', '2025-13-01', '无效的日期'),
+    ('Hotline', 'none', '无效的数字串'),
+    ('DueAmount', '', '缺少字段 DueAmount'),
+])
+def test_invalid_values_fail_the_row(field, value, message):
+    with pytest.raises(ValueError, match=message):
+        ivr_reminder_template().render(dict(FIELDS, **{field: value}))
+
+
+def test_defaults_only_for_the_demo_template():
+    ssml = ivr_demo_template().render({'UserName': '李四'})
+    assert '李四' in ssml and '<say-as interpret-as="cardinal">4478.67</say-as>' in ssml
+    with pytest.raises(ValueError, match='缺少字段 LoanDate'):
+        ivr_reminder_template().render({'UserName': '李四'})
+
+
+def test_literal_braces_and_unknown_formats():
+    assert SSMLTemplate('{{x}} {v} }}').render({'v': '{y}'}) == '{x} {y} }'
+    with pytest.raises(ValueError, match='未知的格式'):
+        SSMLTemplate('{v:money}')
+    assert compile_template('<speak>{v}</speak>') is compile_template('<speak>{v}</speak>')
+    assert escape(5) == '5'
@@ -0,0 +1,131 @@
+import socket
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound import throttle
+from voice_outbound.throttle import (
+    FATAL, RETRYABLE, THROTTLE, AdaptiveRateController, backoff_delay, call_with_retry, classify_error
+)
+
+
+class Limiter:
+    def __init__(self, rate):
+        self.rate = rate
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+
+    def set_rate(self, rate):
+        self.rate = rate
+
+
+class ClientError(Exception):
+    def __init__(self, code, status=400):
+        super().__init__(code)
+        self.response = {'Error': {'Code': code}, 'ResponseMetadata': {'HTTPStatusCode': status}}
+
+
+def failing(code, status=400):
+    def fn():
+        raise ClientError(code, status)
+    return fn
+
+
+def test_final_throttled_attempt_still_slows_down():
+    limiter = Limiter(10.0)
+    controller = AdaptiveRateController(limiter, decrease_cooldown=0)
+    with pytest.raises(ClientError):
+        call_with_retry(failing('ThrottlingException'), controller, max_attempts=1, sleep=lambda _: None)
+    assert controller.throttles == 1
+    assert controller.retries == 0
+    assert limiter.rate == 5.0
+
+
+def test_exhausted_retries_count_every_throttle():
+    controller = AdaptiveRateController(Limiter(8.0), decrease_cooldown=0)
+    with pytest.raises(ClientError):
+        call_with_retry(failing('TooManyRequestsException'), controller, max_attempts=3, sleep=lambda _: None)
+    assert controller.snapshot() == {'rate': 1.0, 'throttles': 3, 'retries': 2}
+
+
+class EndpointConnectionError(Exception):
+    pass
+
+
+@pytest.mark.parametrize('exc, kind', [
+    (ClientError('ThrottlingException'), THROTTLE),
+    (ClientError('LimitExceededException'), THROTTLE),
+    (ClientError('SomethingNew', status=429), THROTTLE),
+    (ClientError('InternalServiceException'), RETRYABLE),
+    (ClientError('SomethingNew', status=503), RETRYABLE),
+    (ClientError('InvalidParameterException'), FATAL),
+    (EndpointConnectionError('down'), RETRYABLE),
+    (socket.timeout('read'), RETRYABLE),
+    (ValueError('bug'), FATAL),
+])
+def test_classify_error(exc, kind):
+    assert classify_error(exc) == kind
+
+
+def test_backoff_delay_is_capped_full_jitter():
+    for attempt in range(1, 12):
+        cap = min(10.0, 0.2 * 2 ** attempt)
+        delays = [backoff_delay(attempt) for _ in range(50)]
+        assert all(0 <= d <= cap for d in delays)
+    assert max(backoff_delay(30) for _ in range(50)) <= 10.0
+
+
+def test_aimd_increases_additively_and_decreases_multiplicatively(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(throttle.time, 'monotonic', lambda: now[0])
+    limiter = Limiter(4.0)
+    controller = AdaptiveRateController(limiter, max_rate=6.0, increase_step=1.0, increase_interval=2.0)
+
+    # 限流时减半，冷却期内的其他限流不再降速
+    controller.on_throttle()
+    controller.on_throttle()
+    assert limiter.rate == 2.0 and controller.throttles == 2
+
+    # 每个 increase_interval 最多加一个步长，且不超过上限
+    controller.on_success()
+    assert limiter.rate == 2.0
+    for _ in range(6):
+        now[0] += 2.0
+        controller.on_success()
+    assert limiter.rate == 6.0
+
+    now[0] += 2.0
+    controller.on_throttle()
+    assert limiter.rate == 3.0
+    for _ in range(20):
+        now[0] += 1.0
+        controller.on_throttle()
+    assert limiter.rate == controller.min_rate
+
+
+def test_retryable_errors_retry_without_slowing_down():
+    limiter = Limiter(4.0)
+    controller = AdaptiveRateController(limiter)
+    outcomes = [ClientError('InternalServiceException'), ClientError('InternalServiceException'), 'ok']
+
+    def fn():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    sleeps = []
+    assert call_with_retry(fn, controller, max_attempts=5, sleep=sleeps.append) == 'ok'
+    assert len(sleeps) == 2 and limiter.acquired == 3
+    assert controller.snapshot() == {'rate': 4.0, 'throttles': 0, 'retries': 2}
+
+
+def test_fatal_errors_are_not_retried():
+    limiter = Limiter(4.0)
+    with pytest.raises(ClientError):
+        call_with_retry(failing('AccessDeniedException'), AdaptiveRateController(limiter), sleep=lambda _: None)
+    assert limiter.acquired == 1
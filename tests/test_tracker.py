@@ -0,0 +1,86 @@
+import itertools
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from voice_outbound.outcomes import CONNECTED, DISCONNECTED, INITIATED, OutcomeStore
+from voice_outbound.tracker import ContactTracker
+
+
+class ClientError(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.response = {'Error': {'Code': code}, 'ResponseMetadata': {'HTTPStatusCode': 400}}
+
+
+class FakeConnect:
+    """describe_contact 依次返回预设的联系状态（或异常）"""
+
+    def __init__(self, states):
+        self.states = {contact_id: list(items) for contact_id, items in states.items()}
+        self.calls = []
+
+    def describe_contact(self, InstanceId, ContactId):
+        self.calls.append(ContactId)
+        state = self.states[ContactId].pop(0)
+        if isinstance(state, Exception):
+            raise state
+        contact = {'Id': ContactId, 'InitiationTimestamp': 1000.0}
+        if state in (CONNECTED, DISCONNECTED):
+            contact['ConnectedToSystemTimestamp'] = 1010.0
+        if state == DISCONNECTED:
+            contact['DisconnectTimestamp'] = 1100.0
+            contact['DisconnectReason'] = 'CUSTOMER_DISCONNECT'
+        return {'Contact': contact}
+
+
+def intervals(tracker, contact_id, polls):
+    """逐次轮询，返回每次轮询后排定的间隔；联系进入终态后为 None"""
+    result = []
+    for _ in range(polls):
+        tracker._inflight += 1
+        tracker._poll(contact_id)
+        entry = tracker._active.get(contact_id)
+        result.append(entry[1] if entry else None)
+    return result
+
+
+def test_backoff_grows_per_state_and_resets_on_change():
+    states = [INITIATED] * 4 + [CONNECTED] * 5 + [DISCONNECTED]
+    client = FakeConnect({'c1': states})
+    tracker = ContactTracker(client, 'instance', rate=1000, clock=lambda: 0.0)
+    tracker.add('c1')
+    assert tracker._active['c1'] == [INITIATED, 3.0, 0]
+
+    assert intervals(tracker, 'c1', 10) == [4.5, 6.75, 10.0, 10.0, 10.0, 20.0, 40.0, 60.0, 60.0, None]
+    assert tracker.store.get('c1').disconnect_reason == 'CUSTOMER_DISCONNECT'
+    assert tracker.api_calls == 10 and tracker.active_count == 0
+
+
+def test_not_found_is_retried_a_bounded_number_of_times():
+    not_found = ClientError('ResourceNotFoundException')
+    client = FakeConnect({'c1': [not_found, not_found, INITIATED], 'c2': [not_found] * 3})
+    tracker = ContactTracker(client, 'instance', rate=1000, max_not_found=2, clock=lambda: 0.0)
+    tracker.add('c1')
+    tracker.add('c2')
+
+    # 刚发起的联系短暂查不到：按原间隔退避，查到后计数清零
+    assert intervals(tracker, 'c1', 3) == [4.5, 6.75, 10.0]
+    assert tracker._active['c1'][2] == 0
+    # 连续查不到超过上限后放弃跟踪
+    assert intervals(tracker, 'c2', 3) == [4.5, 6.75, None]
+
+
+def test_run_skips_contacts_finished_by_the_event_stream():
+    client = FakeConnect({'c1': [CONNECTED, DISCONNECTED], 'c2': []})
+    store = OutcomeStore()
+    ticks = itertools.count(step=100.0)
+    tracker = ContactTracker(client, 'instance', store=store, rate=1000, max_workers=1, clock=lambda: next(ticks))
+    tracker.add('c1')
+    tracker.add('c2')
+    # 事件流已先行报告 c2 挂断
+    store.merge_contact({'Id': 'c2', 'DisconnectTimestamp': 1100.0})
+
+    assert tracker.run() is store
+    assert client.calls == ['c1', 'c1']
+    assert store.counts() == {INITIATED: 0, CONNECTED: 0, DISCONNECTED: 2}
@@ -0,0 +1 @@
+"""语音外呼公共模块，供 ivr / lex / llm 各页面与命令行批量任务共用"""
@@ -0,0 +1,138 @@
+"""命令行入口：单通外呼、联系查询，以及各批量工具的统一入口
+
+子命令对应的模块在选中时才导入；call / describe 的模块只导入标准库，boto3 在创建客户端时才导入。
+加 --lite 且环境变量中有静态凭证（AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY 与 AWS_REGION）时
+完全不导入 boto3，适合 cron 与 worker 进程。
+
+用法:
+    python -m voice_outbound call +12285332612 --user-name 康先生 --attribute DueAmount=4478.67 --lite ...
+    python -m voice_outbound describe <ContactId> --instance-id ...
+    python -m voice_outbound dial contacts.csv --tps 5      # 等同 python -m voice_outbound.dialer
+"""
+import argparse
+import json
+import sys
+
+# 子命令 -> 模块（均提供 main(argv)）
+COMMANDS = {
+    'dial': 'voice_outbound.dialer',
+    'track': 'voice_outbound.tracker',
+    'events': 'voice_outbound.events',
+    'export': 'voice_outbound.export',
+    'hygiene': 'voice_outbound.hygiene',
+    'schedule': 'voice_outbound.scheduler',
+    'pacing': 'voice_outbound.pacing',
+    'campaign': 'voice_outbound.campaign',
+    'ssml': 'voice_outbound.ssml',
+    'flowsim': 'voice_outbound.flowsim',
+}
+
+
+def _parse_attribute(text):
+    name, sep, value = text.partition('=')
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"属性格式应为 名称=值: {text}")
+    return name, value
+
+
+def _connection_args(parser):
+    parser.add_argument('--region', default=None, help='AWS 区域')
+    parser.add_argument('--endpoint-url', default=None, help='自定义 Connect endpoint (例如本地桩服务)')
+    parser.add_argument('--lite', action='store_true',
+                        help='使用只依赖标准库的轻量客户端（需环境变量中的静态凭证与区域，否则仍用 boto3），冷启动更快')
+
+
+def _client(args):
+    from voice_outbound.call import connect_client
+
+    return connect_client(args.region, args.endpoint_url, lite=args.lite)
+
+
+def call(args):
+    from voice_outbound.call import start_outbound_voice_call
+    from voice_outbound.hygiene import normalize_e164
+
+    phone_number = normalize_e164(args.phone_number, args.country_code)
+    if not phone_number:
+        print(f"无效的电话号码: {args.phone_number}", file=sys.stderr)
+        return 2
+    attributes = {'UserName': args.user_name, 'Language': args.language}
+    attributes.update(args.attribute)
+    if args.ivr_message:
+        from voice_outbound.ssml import MESSAGE_ATTRIBUTE, ivr_reminder_template
+
+        attributes[MESSAGE_ATTRIBUTE] = ivr_reminder_template().render(attributes)
+    response = start_outbound_voice_call(
+        phone_number,
+        args.instance_id,
+        args.contact_flow_id,
+        attributes,
+        source_phone_number=args.source_phone_number or None,
+        client_token=args.client_token,
+        client=_client(args)
+    )
+    print(json.dumps({'phone': phone_number, 'contact_id': response['ContactId']}, ensure_ascii=False))
+    return 0
+
+
+def describe(args):
+    from voice_outbound.call import describe_contact
+    from voice_outbound.outcomes import parse_contact
+
+    contact = describe_contact(args.instance_id, args.contact_id, client=_client(args))
+    outcome = parse_contact(contact)
+    if args.raw:
+        print(json.dumps(contact, ensure_ascii=False, default=str))
+    else:
+        print(json.dumps(dict([('ContactId', args.contact_id)] + outcome.rows()), ensure_ascii=False))
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in COMMANDS:
+        import importlib
+
+        return importlib.import_module(COMMANDS[argv[0]]).main(argv[1:])
+
+    from voice_outbound.call import DEFAULT_CONTACT_FLOW_ID, DEFAULT_INSTANCE_ID, DEFAULT_SOURCE_PHONE_NUMBER
+
+    parser = argparse.ArgumentParser(
+        prog='python -m voice_outbound',
+        description='Amazon Connect 语音外呼',
+        epilog='批量工具: ' + ', '.join(COMMANDS) + '（参数见 python -m voice_outbound <命令> --help）'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    parser_call = subparsers.add_parser('call', help='发起一通外呼')
+    parser_call.add_argument('phone_number', help='目标号码，不带国家码时按 --country-code 补全')
+    parser_call.add_argument('--user-name', default='康先生', help='Attributes.UserName')
+    parser_call.add_argument('--language', default='ZH', help='Attributes.Language')
+    parser_call.add_argument('--attribute', action='append', type=_parse_attribute, default=[], metavar='名称=值',
+                             help='其他联系流属性，可重复')
+    parser_call.add_argument('--ivr-message', action='store_true', help='按内置还款提醒模板渲染 Message 属性（字段需用 --attribute 提供，缺失时报错）')
+    parser_call.add_argument('--country-code', default='1', help='缺省国家码')
+    parser_call.add_argument('--instance-id', default=DEFAULT_INSTANCE_ID, help='Amazon Connect 实例 ID')
+    parser_call.add_argument('--contact-flow-id', default=DEFAULT_CONTACT_FLOW_ID, help='联系流 ID')
+    parser_call.add_argument('--source-phone-number', default=DEFAULT_SOURCE_PHONE_NUMBER, help='主叫号码 (留空则不传)')
+    parser_call.add_argument('--client-token', default=None, help='幂等 ClientToken（cron 重跑时传同一个值避免重复外呼）')
+    _connection_args(parser_call)
+    parser_call.set_defaults(handler=call)
+
+    parser_describe = subparsers.add_parser('describe', help='查询联系状态')
+    parser_describe.add_argument('contact_id', help='ContactId')
+    parser_describe.add_argument('--instance-id', default=DEFAULT_INSTANCE_ID, help='Amazon Connect 实例 ID')
+    parser_describe.add_argument('--raw', action='store_true', help='输出完整的 Contact')
+    _connection_args(parser_describe)
+    parser_describe.set_defaults(handler=describe)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except Exception as e:
+        print(f"{args.command} 失败: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
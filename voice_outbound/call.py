@@ -0,0 +1,75 @@
+"""单通外呼与联系查询，供 ivr / lex / llm 页面与命令行（python -m voice_outbound call）共用
+
+本模块及其依赖只导入标准库：客户端在第一次调用时才创建（此时才导入 boto3）。
+connect_client(lite=True) 在环境变量中有静态凭证时改用 connect_lite 的轻量客户端，由命令行 --lite 显式启用。
+
+用法:
+    from voice_outbound.call import start_outbound_voice_call
+    response = start_outbound_voice_call('+12285332612', instance_id, contact_flow_id, {'UserName': '康先生'})
+"""
+import os
+import uuid
+
+from voice_outbound.throttle import call_with_retry
+
+# 默认参数与 ivr/voice_outbound_ivr.py 保持一致
+DEFAULT_INSTANCE_ID = 'b7e4b4ed-1bdf-4b14-b624-d9328f08725a'
+DEFAULT_CONTACT_FLOW_ID = '9168f50a-d81e-4060-a2cb-a127fe3d9198'
+DEFAULT_SOURCE_PHONE_NUMBER = '+13072633584'
+
+
+def connect_client(region_name=None, endpoint_url=None, lite=False):
+    """返回 Connect 客户端：默认为缓存的 boto3 客户端；lite 且有静态凭证时为 LiteConnectClient（不导入 boto3）"""
+    if lite:
+        from voice_outbound.connect_lite import lite_client
+
+        client = lite_client(region_name, endpoint_url)
+        if client is not None:
+            return client
+    from voice_outbound.clients import get_client
+
+    # botocore 只读取 AWS_DEFAULT_REGION，这里与轻量客户端一样也接受 AWS_REGION
+    return get_client('connect', region_name=region_name or os.environ.get('AWS_REGION'), endpoint_url=endpoint_url)
+
+
+_default_client = None
+
+
+def _client(client):
+    global _default_client
+    if client is not None:
+        return client
+    if _default_client is None:
+        _default_client = connect_client()
+    return _default_client
+
+
+def start_outbound_voice_call(
+    phone_number,
+    connect_instance_id,
+    contact_flow_id,
+    attributes=None,
+    source_phone_number=None,
+    client_token=None,
+    client=None,
+    max_attempts=5
+):
+    """发起一通外呼并返回 StartOutboundVoiceContact 响应；限流与临时错误自动退避重试"""
+    params = {
+        'DestinationPhoneNumber': phone_number,
+        'ContactFlowId': contact_flow_id,
+        'InstanceId': connect_instance_id,
+        'Attributes': attributes or {},
+        # 重试时沿用同一个 ClientToken，避免重复外呼
+        'ClientToken': client_token or str(uuid.uuid4())
+    }
+    if source_phone_number:
+        params['SourcePhoneNumber'] = source_phone_number
+    client = _client(client)
+    return call_with_retry(lambda: client.start_outbound_voice_contact(**params), max_attempts=max_attempts)
+
+
+def describe_contact(connect_instance_id, contact_id, client=None):
+    """返回 describe_contact 的 Contact"""
+    response = _client(client).describe_contact(InstanceId=connect_instance_id, ContactId=contact_id)
+    return response['Contact']
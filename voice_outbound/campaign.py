@@ -0,0 +1,320 @@
+"""外呼任务实时汇总：后台线程增量读取结果文件，维护计数器与可分页的联系人表
+
+数据来源（均为只追加的 JSONL，可在外呼进行中读取）:
+    results   dialer 输出的结果 {row, phone, status, contact_id, error}
+    outcomes  tracker / events 输出的终态结果 {contact_id, connected_to_system, disconnected, disconnect_reason, amd_result, ...}
+
+每次轮询只读取上次位置之后新增的完整行，计数器随之增减，不重新扫描文件；
+同一行（续拨）或同一联系（重复投递）的新记录会先撤销旧记录的计数再累加。
+页面按需取一页数据（page），总行数直接读取计数器（count），不把整个任务交给前端渲染。
+
+用法:
+    python -m voice_outbound.campaign results.jsonl --outcomes outcomes.jsonl --follow
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from voice_outbound.journal import DIALED
+
+# calls/second 的统计窗口（秒）
+RATE_WINDOW = 60.0
+# 表格列，与 CampaignRow 字段一致
+COLUMNS = ('row', 'phone', 'status', 'contact_id', 'error', 'connected', 'disconnected', 'disconnect_reason', 'amd_result')
+
+
+class CampaignRow:
+    __slots__ = COLUMNS
+
+    def __init__(self, row):
+        self.row = row
+        self.phone = None
+        self.status = None
+        self.contact_id = None
+        self.error = None
+        self.connected = None
+        self.disconnected = None
+        self.disconnect_reason = None
+        self.amd_result = None
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in COLUMNS}
+
+
+class FileTail:
+    """增量读取只追加文件中的完整行；文件被截断或替换时从头读取"""
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.inode = None
+
+    def read(self):
+        """返回 (lines, reset)，reset 为 True 表示文件已被截断或替换"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return [], False
+        reset = False
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            reset = self.inode is not None
+            self.inode = stat.st_ino
+            self.offset = 0
+        if stat.st_size == self.offset:
+            return [], reset
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(stat.st_size - self.offset)
+        # 最后一行可能尚未写完，留到下次读取
+        end = data.rfind(b'\n') + 1
+        self.offset += end
+        return data[:end].decode('utf-8').splitlines(), reset
+
+
+class CampaignAggregator:
+    """线程安全的外呼任务汇总；start() 后台轮询，也可直接调用 poll()"""
+
+    def __init__(self, results_path, outcomes_path=None, interval=1.0):
+        self.interval = interval
+        self._tails = [FileTail(results_path), FileTail(outcomes_path) if outcomes_path else None]
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._reset()
+
+    def _reset(self):
+        self._rows = []
+        self._by_row = {}
+        self._by_contact = {}
+        # 结果文件中尚未出现的联系（终态结果先于外呼结果写出）
+        self._orphans = {}
+        self.statuses = Counter()
+        self.amd_results = Counter()
+        self.disconnect_reasons = Counter()
+        self.connected = 0
+        self.disconnected = 0
+        self.skipped = 0
+        # 结果文件无时间戳：首次读取的历史记录不计入 calls/second
+        self._dials = deque()
+        self._live_since = None
+        self.updated = None
+
+    # ---- 计数 ----
+
+    def _count_outcome(self, item, sign):
+        if item.connected is not None:
+            self.connected += sign
+        if item.disconnected is not None:
+            self.disconnected += sign
+        if item.amd_result:
+            self.amd_results[item.amd_result] += sign
+        if item.disconnect_reason:
+            self.disconnect_reasons[item.disconnect_reason] += sign
+
+    def _apply_result(self, record, now):
+        row_id = record.get('row')
+        if row_id is None:
+            self.skipped += 1
+            return
+        item = self._by_row.get(row_id)
+        if item is None:
+            item = self._by_row[row_id] = CampaignRow(row_id)
+            self._rows.append(item)
+        else:
+            self.statuses[item.status] -= 1
+        item.phone = record.get('phone')
+        item.status = record.get('status')
+        item.error = record.get('error')
+        self.statuses[item.status] += 1
+        contact_id = record.get('contact_id')
+        if contact_id and contact_id != item.contact_id:
+            item.contact_id = contact_id
+            self._by_contact[contact_id] = item
+            orphan = self._orphans.pop(contact_id, None)
+            if orphan:
+                self._apply_outcome(orphan)
+        if item.status == DIALED and self._live_since is not None:
+            self._dials.append(now)
+
+    def _apply_outcome(self, record):
+        contact_id = record.get('contact_id')
+        item = self._by_contact.get(contact_id)
+        if item is None:
+            if contact_id:
+                self._orphans[contact_id] = record
+            else:
+                self.skipped += 1
+            return
+        self._count_outcome(item, -1)
+        connected = record.get('connected_to_system') or record.get('connected_to_agent')
+        item.connected = connected if connected is not None else item.connected
+        item.disconnected = record.get('disconnected') or item.disconnected
+        item.disconnect_reason = record.get('disconnect_reason') or item.disconnect_reason
+        item.amd_result = record.get('amd_result') or item.amd_result
+        self._count_outcome(item, 1)
+
+    def _records(self, lines):
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                self.skipped += 1
+
+    def poll(self):
+        """读取新增记录并更新汇总，返回本次处理的行数"""
+        batches = []
+        reset = False
+        for tail in self._tails:
+            lines, truncated = tail.read() if tail else ([], False)
+            batches.append(lines)
+            reset = reset or truncated
+        if reset:
+            # 文件被替换：重新读取全部内容
+            for tail in self._tails:
+                if tail:
+                    tail.inode, tail.offset = None, 0
+            with self._lock:
+                self._reset()
+            return self.poll()
+
+        now = time.monotonic()
+        processed = 0
+        with self._lock:
+            for record in self._records(batches[0]):
+                self._apply_result(record, now)
+                processed += 1
+            for record in self._records(batches[1]):
+                self._apply_outcome(record)
+                processed += 1
+            while self._dials and self._dials[0] < now - RATE_WINDOW:
+                self._dials.popleft()
+            if self._live_since is None:
+                self._live_since = now
+            if processed:
+                self.updated = time.time()
+        return processed
+
+    # ---- 后台线程 ----
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"汇总外呼结果失败: {e}", file=sys.stderr)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='campaign-aggregator', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    # ---- 读取 ----
+
+    def snapshot(self):
+        """当前计数器（dict），供页面指标与命令行输出"""
+        with self._lock:
+            now = time.monotonic()
+            while self._dials and self._dials[0] < now - RATE_WINDOW:
+                self._dials.popleft()
+            window = min(RATE_WINDOW, now - self._live_since) if self._live_since is not None else 0
+            return {
+                'contacts': len(self._rows),
+                'dialed': self.statuses[DIALED],
+                'statuses': {k: v for k, v in self.statuses.items() if v},
+                'connected': self.connected,
+                'disconnected': self.disconnected,
+                'amd_results': {k: v for k, v in self.amd_results.most_common() if v},
+                'disconnect_reasons': {k: v for k, v in self.disconnect_reasons.most_common() if v},
+                'calls_per_second': round(len(self._dials) / window, 2) if window > 0 else 0.0,
+                'pending_outcomes': len(self._orphans),
+                'skipped': self.skipped,
+                'updated': self.updated,
+            }
+
+    def _counter(self, field):
+        return {'status': self.statuses, 'amd_result': self.amd_results,
+                'disconnect_reason': self.disconnect_reasons}.get(field)
+
+    def count(self, **filters):
+        """匹配行数；无筛选或按单个计数字段筛选时直接读取计数器，不扫描联系人表"""
+        filters = {k: v for k, v in filters.items() if v is not None}
+        with self._lock:
+            if not filters:
+                return len(self._rows)
+            if len(filters) == 1:
+                (field, value), = filters.items()
+                counter = self._counter(field)
+                if counter is not None:
+                    return counter[value]
+            return sum(1 for r in self._rows if all(getattr(r, k) == v for k, v in filters.items()))
+
+    def page(self, start=0, size=100, newest_first=False, **filters):
+        """返回一页行的 dict 列表；filters 为字段精确匹配，例如 status='failed'
+
+        有筛选时从页首开始逐行匹配，取满一页即停止，不遍历整个联系人表。
+        """
+        filters = {k: v for k, v in filters.items() if v is not None}
+        with self._lock:
+            rows = self._rows
+            if not filters:
+                if newest_first:
+                    stop = max(len(rows) - start, 0)
+                    selected = rows[max(stop - size, 0):stop][::-1]
+                else:
+                    selected = rows[start:start + size]
+                return [r.to_dict() for r in selected]
+            selected = []
+            skip = start
+            for r in (reversed(rows) if newest_first else rows):
+                if len(selected) >= size:
+                    break
+                if all(getattr(r, k) == v for k, v in filters.items()):
+                    if skip:
+                        skip -= 1
+                    else:
+                        selected.append(r.to_dict())
+            return selected
+
+    def values(self, field):
+        """某字段当前出现过的取值（用于页面筛选项）"""
+        with self._lock:
+            counter = self._counter(field)
+            return sorted(k for k, v in counter.items() if v and k is not None)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='汇总外呼任务结果')
+    parser.add_argument('results', help='dialer 输出的结果 JSONL')
+    parser.add_argument('--outcomes', default=None, help='tracker / events 输出的终态结果 JSONL')
+    parser.add_argument('--follow', action='store_true', help='持续读取新增记录，每隔 --interval 秒输出一次汇总')
+    parser.add_argument('--interval', type=float, default=5.0, help='--follow 时的输出间隔（秒）')
+    args = parser.parse_args(argv)
+
+    aggregator = CampaignAggregator(args.results, args.outcomes)
+    while True:
+        aggregator.poll()
+        print(json.dumps(aggregator.snapshot(), ensure_ascii=False), flush=True)
+        if not args.follow:
+            return 0
+        try:
+            time.sleep(args.interval)
+        except KeyboardInterrupt:
+            return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""进程级 boto3 客户端缓存
+
+每次 boto3.client(...) 都要重新解析凭证、加载 endpoint/服务模型并建立新的 TLS 连接。
+这里按 (服务, 区域, 凭证, endpoint) 缓存客户端，复用其连接池与 keep-alive 连接。
+botocore 客户端创建后可被多线程共享，但创建过程（Session）不是线程安全的，因此加锁创建。
+"""
+import hashlib
+import threading
+
+# 连接池大小需不小于并发调用线程数，否则多余的请求会新建连接后丢弃
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+
+_lock = threading.Lock()
+_clients = {}
+
+
+def _credential_key(aws_access_key_id, aws_secret_access_key, aws_session_token):
+    # 缓存键中不保存明文密钥
+    if not aws_access_key_id:
+        return None
+    digest = hashlib.sha256(f"{aws_secret_access_key}:{aws_session_token}".encode('utf-8')).hexdigest()
+    return aws_access_key_id, digest
+
+
+def get_client(
+    service_name,
+    region_name=None,
+    aws_access_key_id=None,
+    aws_secret_access_key=None,
+    aws_session_token=None,
+    profile_name=None,
+    endpoint_url=None,
+    max_pool_connections=DEFAULT_MAX_POOL_CONNECTIONS,
+    max_attempts=None
+):
+    """返回缓存的 boto3 客户端，相同参数在进程内只创建一次
+
+    max_attempts 为 botocore 内置重试次数；由 throttle.call_with_retry 自行重试的调用方应传 1。
+    """
+    key = (
+        service_name,
+        region_name,
+        _credential_key(aws_access_key_id, aws_secret_access_key, aws_session_token),
+        profile_name,
+        endpoint_url,
+        max_pool_connections,
+        max_attempts,
+    )
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            import boto3
+            from botocore.config import Config
+
+            retries = {'mode': 'standard'}
+            if max_attempts:
+                retries['total_max_attempts'] = max_attempts
+            session = boto3.session.Session(
+                aws_access_key_id=aws_access_key_id,
+                aws_secret_access_key=aws_secret_access_key,
+                aws_session_token=aws_session_token,
+                profile_name=profile_name,
+                region_name=region_name
+            )
+            client = session.client(
+                service_name,
+                endpoint_url=endpoint_url,
+                config=Config(
+                    max_pool_connections=max_pool_connections,
+                    tcp_keepalive=True,
+                    retries=retries
+                )
+            )
+            _clients[key] = client
+    return client
+
+
+def clear_clients():
+    """清空缓存（例如凭证轮换后）"""
+    with _lock:
+        _clients.clear()
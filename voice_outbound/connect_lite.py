@@ -0,0 +1,160 @@
+"""只依赖标准库的 Amazon Connect 轻量客户端，供命令行冷启动使用
+
+导入 boto3 并创建 connect 客户端需要数百毫秒（加载服务模型与 endpoint 规则），单次外呼的 cron /
+worker 进程大部分时间都花在这里。本模块用 http.client + SigV4 签名直接调用
+StartOutboundVoiceContact 与 DescribeContact 两个 REST-JSON 接口，方法名与参数与 boto3 客户端一致。
+
+只支持静态凭证（参数或 AWS_ACCESS_KEY_ID / AWS_SECRET_ACCESS_KEY / AWS_SESSION_TOKEN 环境变量）；
+凭证或区域缺失时 lite_client 返回 None，调用方改用 boto3（完整凭证链：配置文件、SSO、实例角色等）。
+错误以 ConnectApiError 抛出，其 response 与 botocore ClientError 结构相同，可直接交给 throttle.call_with_retry；
+超时与连接错误保持 socket.timeout / ConnectionError，由 throttle.classify_error 归为可重试。
+响应中的 *Timestamp 字段与 boto3 一样转换为带时区的 datetime。
+"""
+import hashlib
+import hmac
+import http.client
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from urllib.parse import quote, urlsplit
+
+SERVICE = 'connect'
+DEFAULT_TIMEOUT = 10.0
+
+
+class ConnectApiError(Exception):
+    """与 botocore ClientError 相同的 response 结构: {'Error': {'Code', 'Message'}, 'ResponseMetadata': {'HTTPStatusCode'}}"""
+
+    def __init__(self, status, code, message, operation):
+        super().__init__(f"An error occurred ({code}) when calling the {operation} operation: {message}")
+        self.response = {
+            'Error': {'Code': code, 'Message': message},
+            'ResponseMetadata': {'HTTPStatusCode': status},
+        }
+
+
+def _hmac(key, text):
+    return hmac.new(key, text.encode('utf-8'), hashlib.sha256).digest()
+
+
+def sign_headers(method, host, path, body, region, access_key, secret_key, session_token=None, now=None):
+    """返回带 SigV4 签名的请求头；path 为已编码的路径"""
+    now = now or datetime.now(timezone.utc)
+    amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+    date_stamp = amz_date[:8]
+    headers = {'host': host, 'x-amz-date': amz_date}
+    if body:
+        headers['content-type'] = 'application/json'
+    if session_token:
+        headers['x-amz-security-token'] = session_token
+    signed = sorted(headers)
+    canonical_request = '\n'.join([
+        method,
+        # 非 S3 服务的路径再编码一次
+        quote(path, safe='/~'),
+        '',
+        ''.join(f"{name}:{headers[name]}\n" for name in signed),
+        ';'.join(signed),
+        hashlib.sha256(body).hexdigest(),
+    ])
+    scope = f"{date_stamp}/{region}/{SERVICE}/aws4_request"
+    string_to_sign = '\n'.join([
+        'AWS4-HMAC-SHA256', amz_date, scope, hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()
+    ])
+    key = _hmac(('AWS4' + secret_key).encode('utf-8'), date_stamp)
+    for part in (region, SERVICE, 'aws4_request'):
+        key = _hmac(key, part)
+    signature = hmac.new(key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+    headers['authorization'] = (
+        f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, SignedHeaders={';'.join(signed)}, Signature={signature}"
+    )
+    return headers
+
+
+def _parse_timestamps(value):
+    """把 *Timestamp 字段的 epoch 秒转换为 UTC datetime（与 boto3 的返回类型一致）"""
+    if isinstance(value, dict):
+        return {
+            key: datetime.fromtimestamp(item, timezone.utc)
+            if key.endswith('Timestamp') and isinstance(item, (int, float)) and not isinstance(item, bool)
+            else _parse_timestamps(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_parse_timestamps(item) for item in value]
+    return value
+
+
+class LiteConnectClient:
+    """复用一条 keep-alive 连接的 Connect 客户端，线程安全（请求串行）"""
+
+    def __init__(self, region_name, aws_access_key_id, aws_secret_access_key, aws_session_token=None,
+                 endpoint_url=None, timeout=DEFAULT_TIMEOUT):
+        self.region_name = region_name
+        self._credentials = (aws_access_key_id, aws_secret_access_key, aws_session_token)
+        url = urlsplit(endpoint_url or f"https://{SERVICE}.{region_name}.amazonaws.com")
+        self._https = url.scheme == 'https'
+        self._host = url.netloc
+        self._base_path = url.path.rstrip('/')
+        self.timeout = timeout
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        if self._conn is None:
+            cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            self._conn = cls(self._host, timeout=self.timeout)
+        return self._conn
+
+    def _request(self, operation, method, path, payload=None):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        path = self._base_path + path
+        headers = sign_headers(method, self._host, path, body, self.region_name, *self._credentials)
+        with self._lock:
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=body or None, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except Exception:
+                # 连接状态未知，下次请求重新建立
+                conn.close()
+                self._conn = None
+                raise
+        if response.status >= 300:
+            try:
+                error = json.loads(data or b'{}')
+            except ValueError:
+                error = {}
+            code = (response.getheader('x-amzn-ErrorType') or error.get('__type') or error.get('code') or str(response.status))
+            code = code.split(':', 1)[0].rsplit('#', 1)[-1]
+            message = error.get('Message') or error.get('message') or response.reason
+            raise ConnectApiError(response.status, code, message, operation)
+        return _parse_timestamps(json.loads(data or b'{}'))
+
+    def start_outbound_voice_contact(self, **params):
+        return self._request('StartOutboundVoiceContact', 'PUT', '/contact/outbound-voice', params)
+
+    def describe_contact(self, InstanceId, ContactId):
+        path = f"/contacts/{quote(InstanceId, safe='')}/{quote(ContactId, safe='')}"
+        return self._request('DescribeContact', 'GET', path)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def lite_client(region_name=None, endpoint_url=None, aws_access_key_id=None, aws_secret_access_key=None,
+                aws_session_token=None):
+    """有静态凭证与区域时返回 LiteConnectClient，否则返回 None"""
+    if not aws_access_key_id:
+        aws_access_key_id = os.environ.get('AWS_ACCESS_KEY_ID')
+        aws_secret_access_key = os.environ.get('AWS_SECRET_ACCESS_KEY')
+        aws_session_token = os.environ.get('AWS_SESSION_TOKEN')
+    region_name = region_name or os.environ.get('AWS_REGION') or os.environ.get('AWS_DEFAULT_REGION')
+    if not (aws_access_key_id and aws_secret_access_key and region_name):
+        return None
+    return LiteConnectClient(region_name, aws_access_key_id, aws_secret_access_key, aws_session_token, endpoint_url)
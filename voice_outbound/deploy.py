@@ -0,0 +1,363 @@
+"""增量部署：持久化 CDK 工作目录，缓存虚拟环境与 cdk.out，按内容哈希只更新有变化的组件
+
+工作目录（缺省 ~/.voice_outbound/deploy/<stack>，可用 VOICE_OUTBOUND_DEPLOY_DIR 指定上级目录）中保存
+app.py、cdk.json、.venv、cdk.out 与 state.json。state.json 按「账号/区域」分别记录上次成功部署时各组件的内容哈希、
+堆栈输出与已检测到的 bootstrap，换用其他账号的凭证部署同名堆栈时不会沿用另一个账号的状态。
+
+每次部署按以下规则选择最小的更新方式:
+    - 堆栈代码（app.py / cdk.json）变化、首次部署或 force=True：完整 cdk deploy
+    - 只有带快速更新方式的资源变化（例如 Lambda zip、联系流 JSON）：直接调用对应 API 更新，不经过 CloudFormation
+    - 其他资源变化：完整 cdk deploy
+    - 都没有变化：跳过
+zip 按其中每个文件的名称与解压后内容计算哈希，与打包时间戳无关。
+CDKToolkit 堆栈存在时跳过 cdk bootstrap，并按账号 / 区域记住检测结果；依赖未变化时不重新 pip install。
+凭证显式传入（credentials），API 调用与 cdk 子进程都使用这组凭证，不依赖进程级的客户端缓存与环境变量。
+
+用法:
+    deployer = IncrementalDeployer('VoiceOutboundStack', app_code, assets, region='us-east-1',
+                                   hotswaps={'voice_outbound_llm_lambda.zip': update_lambda_code('LambdaFunctionName')},
+                                   credentials={'aws_access_key_id': ..., 'aws_secret_access_key': ...})
+    result = deployer.deploy()
+    result.timings    # {'account': 0.1, 'workspace': 0.01, 'venv': 0.0, 'bootstrap': 0.2, 'deploy': 3.1, 'total': 3.5}
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+
+CDK_REQUIREMENTS = "aws-cdk-lib>=2.0.0\nconstructs>=10.0.0\n"
+DEFAULT_STACK_NAME = 'VoiceOutboundStack'
+LAMBDA_FUNCTION_PREFIX = 'voice-outbound-llm'
+# Lambda 函数名上限 64 个字符
+LAMBDA_NAME_LIMIT = 64
+BOOTSTRAP_STACK = 'CDKToolkit'
+STATE_FILE = 'state.json'
+OUTPUTS_FILE = 'outputs.json'
+STACK_COMPONENT = 'stack'
+CDK_CONTEXT = {
+    "@aws-cdk/aws-lambda:recognizeLayerVersion": True,
+    "@aws-cdk/core:checkSecretUsage": True,
+    "@aws-cdk/core:target-partitions": ["aws", "aws-cn"]
+}
+
+
+def default_workspace(stack_name):
+    root = os.environ.get('VOICE_OUTBOUND_DEPLOY_DIR') or Path.home() / '.voice_outbound' / 'deploy'
+    return Path(root) / stack_name
+
+
+def content_hash(path):
+    """文件内容的 sha256；zip 按成员名称与解压后内容计算，不受时间戳与压缩参数影响"""
+    digest = hashlib.sha256()
+    path = Path(path)
+    if path.suffix == '.zip' and zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            for name in sorted(zf.namelist()):
+                if name.endswith('/'):
+                    continue
+                digest.update(name.encode('utf-8') + b'\0')
+                digest.update(hashlib.sha256(zf.read(name)).digest())
+        return digest.hexdigest()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class PhaseTimer:
+    """按阶段记录耗时（秒）"""
+
+    def __init__(self):
+        self.timings = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(self.timings.get(name, 0.0) + time.perf_counter() - started, 3)
+
+    def finish(self):
+        self.timings['total'] = round(time.perf_counter() - self._started, 3)
+        return self.timings
+
+
+class DeployResult:
+    __slots__ = ('success', 'stdout', 'stderr', 'plan', 'timings')
+
+    def __init__(self, success, stdout, stderr, plan, timings):
+        self.success = success
+        self.stdout = stdout
+        self.stderr = stderr
+        self.plan = plan
+        self.timings = timings
+
+
+def lambda_function_name(stack_name):
+    """按堆栈名生成 Lambda 函数名：默认堆栈沿用 voice-outbound-llm，其他堆栈加上堆栈名后缀，同一账号/区域可部署多套"""
+    if stack_name == DEFAULT_STACK_NAME:
+        return LAMBDA_FUNCTION_PREFIX
+    suffix = re.sub(r'[^a-z0-9-]+', '-', stack_name.lower()).strip('-')
+    return f"{LAMBDA_FUNCTION_PREFIX}-{suffix}"[:LAMBDA_NAME_LIMIT].rstrip('-')
+
+
+def bind_flow_lambda(flow, function_arn):
+    """把联系流中所有 InvokeLambdaFunction 动作指向 function_arn，返回修改后的 flow"""
+    for action in flow.get('Actions', []):
+        if action.get('Type') == 'InvokeLambdaFunction':
+            action.setdefault('Parameters', {})['LambdaFunctionARN'] = function_arn
+    return flow
+
+
+def update_lambda_code(output_key):
+    """快速更新：用 zip 直接更新堆栈输出 output_key 指定的 Lambda 函数代码"""
+    def hotswap(path, outputs, client):
+        client = client('lambda')
+        function_name = outputs[output_key]
+        with open(path, 'rb') as f:
+            client.update_function_code(FunctionName=function_name, ZipFile=f.read())
+        client.get_waiter('function_updated_v2').wait(FunctionName=function_name)
+        return f"已更新 Lambda {function_name} 代码"
+    return hotswap
+
+
+def update_contact_flow(output_key, lambda_arn_key=None):
+    """快速更新：直接替换堆栈输出 output_key（联系流 ARN）指定的联系流内容
+
+    lambda_arn_key 为堆栈输出中的 Lambda ARN，联系流调用的 Lambda 与完整部署时一样替换为本堆栈的函数。
+    """
+    def hotswap(path, outputs, client):
+        arn = outputs[output_key]
+        # arn:aws:connect:<region>:<account>:instance/<instance-id>/contact-flow/<flow-id>
+        resource = arn.split(':', 5)[5].split('/')
+        with open(path, 'r', encoding='utf-8') as f:
+            flow = json.load(f)
+        if lambda_arn_key:
+            bind_flow_lambda(flow, outputs[lambda_arn_key])
+        content = json.dumps(flow)
+        client('connect').update_contact_flow_content(
+            InstanceId=resource[1], ContactFlowId=resource[3], Content=content)
+        return f"已更新联系流 {resource[3]} 内容"
+    return hotswap
+
+
+class IncrementalDeployer:
+    """在持久化工作目录中部署 CDK 堆栈，只更新内容有变化的组件
+
+    assets 为需要复制到工作目录的资源文件路径；hotswaps 为 {文件名: hotswap(path, outputs, client)}，
+    该文件是唯一变化时调用 hotswap 代替完整部署（依赖上次部署的堆栈输出，client(服务名) 返回部署账号的客户端）。
+    credentials 为 {'aws_access_key_id', 'aws_secret_access_key', 'aws_session_token'}，为 None 时使用默认凭证链。
+    """
+
+    def __init__(self, stack_name, app_code, assets, region, hotswaps=None, workspace=None, run=subprocess.run,
+                 credentials=None):
+        self.stack_name = stack_name
+        self.app_code = app_code
+        self.assets = [Path(p) for p in assets]
+        self.region = region
+        self.hotswaps = hotswaps or {}
+        self.workspace = Path(workspace) if workspace else default_workspace(stack_name)
+        self.run = run
+        self.credentials = {name: value for name, value in (credentials or {}).items() if value}
+        self.state = self._load_state()
+        self._stdout = []
+        self._stderr = []
+        self._session = None
+        self._clients = {}
+        self._account_id = None
+
+    def _load_state(self):
+        try:
+            with open(self.workspace / STATE_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_state(self):
+        temp = self.workspace / (STATE_FILE + '.tmp')
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(temp, self.workspace / STATE_FILE)
+
+    def client(self, service_name):
+        """部署账号与区域的 boto3 客户端；每个部署器使用自己的 Session，凭证变化后不会沿用旧账号的客户端"""
+        client = self._clients.get(service_name)
+        if client is None:
+            if self._session is None:
+                import boto3
+
+                self._session = boto3.session.Session(region_name=self.region, **self.credentials)
+            client = self._clients[service_name] = self._session.client(service_name)
+        return client
+
+    def _env(self):
+        """cdk 子进程的环境变量：显式传入的凭证覆盖进程环境中的凭证与配置文件"""
+        env = dict(os.environ, AWS_DEFAULT_REGION=self.region, AWS_REGION=self.region)
+        if self.credentials:
+            for name in ('AWS_PROFILE', 'AWS_SESSION_TOKEN'):
+                env.pop(name, None)
+            for name, value in self.credentials.items():
+                env[name.upper()] = value
+        return env
+
+    @property
+    def account(self):
+        if self._account_id is None:
+            self._account_id = self.client('sts').get_caller_identity()['Account']
+        return self._account_id
+
+    def target_state(self):
+        """当前账号 / 区域的部署状态: hashes、outputs、bootstrapped"""
+        return self.state.setdefault('targets', {}).setdefault(f"{self.account}/{self.region}", {})
+
+    @property
+    def venv_python(self):
+        scripts = 'Scripts' if sys.platform == 'win32' else 'bin'
+        suffix = '.exe' if sys.platform == 'win32' else ''
+        return self.workspace / '.venv' / scripts / f'python{suffix}'
+
+    def _cdk_json(self):
+        return json.dumps({
+            "app": f'"{self.venv_python}" app.py',
+            "output": "cdk.out",
+            "context": CDK_CONTEXT
+        }, indent=2)
+
+    def hashes(self):
+        """当前各组件的内容哈希：stack（堆栈代码）与每个资源文件"""
+        hashes = {STACK_COMPONENT: _text_hash(self.app_code + self._cdk_json())}
+        for path in self.assets:
+            if path.exists():
+                hashes[path.name] = content_hash(path)
+        return hashes
+
+    def plan(self, force=False, hashes=None):
+        """返回 {'action': full / hotswap / skip, 'changed': [...], 'reason': ...}"""
+        hashes = hashes or self.hashes()
+        target = self.target_state()
+        deployed = target.get('hashes', {})
+        changed = [name for name, value in hashes.items() if deployed.get(name) != value]
+        if force:
+            return {'action': 'full', 'changed': changed, 'reason': '强制完整部署'}
+        if not deployed:
+            return {'action': 'full', 'changed': changed, 'reason': '首次部署到该账号 / 区域'}
+        if not changed:
+            return {'action': 'skip', 'changed': [], 'reason': '所有组件均未变化'}
+        if STACK_COMPONENT in changed:
+            return {'action': 'full', 'changed': changed, 'reason': '堆栈代码或参数变化'}
+        slow = [name for name in changed if name not in self.hotswaps]
+        if slow:
+            return {'action': 'full', 'changed': changed, 'reason': f"{', '.join(slow)} 没有快速更新方式"}
+        if not target.get('outputs'):
+            return {'action': 'full', 'changed': changed, 'reason': '缺少上次部署的堆栈输出'}
+        return {'action': 'hotswap', 'changed': changed, 'reason': '只有可快速更新的资源变化'}
+
+    def _exec(self, args, check=True):
+        result = self.run(args, cwd=self.workspace, capture_output=True, text=True, env=self._env())
+        if result.stdout:
+            self._stdout.append(result.stdout)
+        if result.stderr:
+            self._stderr.append(result.stderr)
+        if check and result.returncode != 0:
+            raise RuntimeError(f"{' '.join(str(a) for a in args[:3])} 失败 (退出码 {result.returncode})")
+        return result
+
+    def _prepare_workspace(self, hashes):
+        self.workspace.mkdir(parents=True, exist_ok=True)
+        files = {'app.py': self.app_code, 'cdk.json': self._cdk_json(), 'requirements.txt': CDK_REQUIREMENTS}
+        for name, text in files.items():
+            target = self.workspace / name
+            if not target.exists() or target.read_text(encoding='utf-8') != text:
+                target.write_text(text, encoding='utf-8')
+        copied = self.state.setdefault('copied', {})
+        for path in self.assets:
+            target = self.workspace / path.name
+            if path.name in hashes and (copied.get(path.name) != hashes[path.name] or not target.exists()):
+                shutil.copy2(path, target)
+                copied[path.name] = hashes[path.name]
+
+    def _ensure_venv(self):
+        requirements = _text_hash(CDK_REQUIREMENTS + sys.version)
+        if self.venv_python.exists() and self.state.get('requirements') == requirements:
+            return
+        if not self.venv_python.exists():
+            self._exec([sys.executable, '-m', 'venv', str(self.workspace / '.venv')])
+        self._exec([str(self.venv_python), '-m', 'pip', 'install', '-q', '-r', 'requirements.txt'])
+        self.state['requirements'] = requirements
+        self._save_state()
+
+    def _ensure_bootstrap(self):
+        target = self.target_state()
+        if target.get('bootstrapped'):
+            return
+        try:
+            stack = self.client('cloudformation').describe_stacks(StackName=BOOTSTRAP_STACK)['Stacks'][0]
+            ready = stack['StackStatus'].endswith('_COMPLETE') and not stack['StackStatus'].startswith('DELETE')
+        except Exception:
+            ready = False
+        if not ready:
+            self._exec(['cdk', 'bootstrap', f"aws://{self.account}/{self.region}"])
+        target['bootstrapped'] = True
+        self._save_state()
+
+    def _full_deploy(self):
+        self._exec(['cdk', 'deploy', self.stack_name, '--require-approval', 'never', '--outputs-file', OUTPUTS_FILE])
+        target = self.target_state()
+        try:
+            with open(self.workspace / OUTPUTS_FILE, 'r', encoding='utf-8') as f:
+                target['outputs'] = json.load(f).get(self.stack_name, {})
+        except (FileNotFoundError, ValueError):
+            target['outputs'] = {}
+
+    def deploy(self, force=False):
+        """部署并返回 DeployResult；timings 为各阶段耗时（秒）"""
+        timer = PhaseTimer()
+        self._stdout, self._stderr = [], []
+        plan = {'action': 'full', 'changed': [], 'reason': ''}
+        try:
+            with timer.phase('account'):
+                # 部署状态按账号记录；凭证无效时在这里失败
+                target = self.target_state()
+            with timer.phase('hash'):
+                hashes = self.hashes()
+                plan = self.plan(force, hashes)
+            self._stdout.append(f"部署计划: {plan['action']}（{plan['reason']}），变化的组件: {', '.join(plan['changed']) or '无'}\n")
+            if plan['action'] == 'skip':
+                return DeployResult(True, ''.join(self._stdout), '', plan, timer.finish())
+            with timer.phase('workspace'):
+                self._prepare_workspace(hashes)
+            if plan['action'] == 'hotswap':
+                deployed = target.setdefault('hashes', {})
+                for name in plan['changed']:
+                    with timer.phase(f"hotswap:{name}"):
+                        message = self.hotswaps[name](self.workspace / name, target['outputs'], self.client)
+                    self._stdout.append(message + '\n')
+                    # 逐个记录，部分失败时已更新的组件下次不再重复
+                    deployed[name] = hashes[name]
+                    self._save_state()
+            else:
+                with timer.phase('venv'):
+                    self._ensure_venv()
+                with timer.phase('bootstrap'):
+                    self._ensure_bootstrap()
+                with timer.phase('deploy'):
+                    self._full_deploy()
+                target['hashes'] = hashes
+                self._save_state()
+            return DeployResult(True, ''.join(self._stdout), ''.join(self._stderr), plan, timer.finish())
+        except Exception as e:
+            self._stderr.append(str(e))
+            return DeployResult(False, ''.join(self._stdout), ''.join(self._stderr), plan, timer.finish())
@@ -0,0 +1,387 @@
+"""批量外呼：从 CSV/JSONL 读取联系人，经线程池并发、令牌桶限速调用 StartOutboundVoiceContact
+
+用法:
+    python -m voice_outbound.dialer contacts.csv --tps 5 --concurrent-calls 100 --avg-call-seconds 60
+
+联系人文件需包含 phone 列（或 phone_number / DestinationPhoneNumber），
+其余列（UserName、Language 等）原样作为联系流属性传入。
+指定 --message-template 时，每行按 SSML 模板渲染的个性化话术作为 Message 属性传入（已有 Message 列的行保持不变），
+缺少模板字段的行记为失败。
+"""
+import argparse
+import csv
+import json
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from voice_outbound.call import DEFAULT_CONTACT_FLOW_ID, DEFAULT_INSTANCE_ID, DEFAULT_SOURCE_PHONE_NUMBER
+from voice_outbound.clients import get_client
+from voice_outbound.journal import DIALED, FAILED, PENDING, RETRY, CampaignJournal
+from voice_outbound.ssml import MESSAGE_ATTRIBUTE, compile_template, ivr_reminder_template
+from voice_outbound.stats import LatencyStats
+from voice_outbound.throttle import FATAL, AdaptiveRateController, call_with_retry, classify_error
+
+
+# 识别为目标号码的列名，其余列作为联系流属性
+PHONE_FIELDS = ('phone', 'phone_number', 'DestinationPhoneNumber')
+
+
+class TokenBucket:
+    """线程安全的令牌桶限速器，rate 为每秒令牌数"""
+
+    def __init__(self, rate, burst=None):
+        self._lock = threading.Lock()
+        self.rate = float(rate)
+        self._burst = burst
+        self.capacity = float(burst or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+
+    def set_rate(self, rate):
+        """运行中调整速率，已积累的令牌不超过新的桶容量"""
+        with self._lock:
+            self._refill()
+            self.rate = float(rate)
+            self.capacity = float(self._burst or max(1.0, self.rate))
+            self._tokens = min(self._tokens, self.capacity)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self):
+        """阻塞直到取得一个令牌"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def sustainable_rate(tps, concurrent_calls=None, avg_call_seconds=None):
+    """按 API TPS 配额与并发通话配额（Little 定律: 并发 = 速率 × 平均通话时长）取较小的拨号速率"""
+    rate = float(tps)
+    if concurrent_calls and avg_call_seconds:
+        rate = min(rate, float(concurrent_calls) / float(avg_call_seconds))
+    return rate
+
+
+def load_contacts(path, start_row=0, start_offset=None):
+    """逐行读取 CSV 或 JSONL 联系人文件，返回 (行号, 行数据, 该行之后的字节位置) 的迭代器，不会一次性载入内存
+
+    续拨时传入 journal 记录的 start_row 与 start_offset，直接定位到未完成的部分。
+    CSV 按行解析，不支持字段内换行。
+    """
+    is_jsonl = path.endswith(('.jsonl', '.ndjson', '.json'))
+    with open(path, 'rb') as f:
+        fieldnames = None
+        if not is_jsonl:
+            fieldnames = next(csv.reader([f.readline().decode('utf-8-sig')]))
+        if start_offset is not None:
+            f.seek(start_offset)
+        row_id = start_row
+        for raw in iter(f.readline, b''):
+            line = raw.decode('utf-8-sig').strip()
+            if not line:
+                continue
+            if is_jsonl:
+                row = json.loads(line)
+            else:
+                row = dict(zip(fieldnames, next(csv.reader([line]))))
+            yield row_id, row, f.tell()
+            row_id += 1
+
+
+def split_row(row, default_attributes=None):
+    """将一行联系人数据拆分为目标号码与联系流属性"""
+    attributes = dict(default_attributes or {})
+    phone_number = None
+    for key, value in row.items():
+        if key in PHONE_FIELDS:
+            phone_number = str(value).strip()
+        elif value is not None and value != '':
+            # 联系流属性只接受字符串
+            attributes[key] = str(value)
+    return phone_number, attributes
+
+
+class BulkDialer:
+    """批量外呼执行器：线程池并发发起外呼，令牌桶控制速率，限流时 AIMD 自适应调整"""
+
+    def __init__(
+        self,
+        connect_client,
+        connect_instance_id,
+        contact_flow_id,
+        source_phone_number=None,
+        rate=1.0,
+        max_workers=8,
+        default_attributes=None,
+        max_rate=None,
+        max_attempts=5,
+        journal=None,
+        message_template=None,
+        router=None
+    ):
+        self.connect_client = connect_client
+        self.connect_instance_id = connect_instance_id
+        self.contact_flow_id = contact_flow_id
+        self.source_phone_number = source_phone_number
+        self.limiter = TokenBucket(rate)
+        self.controller = AdaptiveRateController(self.limiter, max_rate=max_rate or rate)
+        self.max_attempts = max_attempts
+        self.journal = journal
+        self.max_workers = max_workers
+        self.default_attributes = default_attributes or {}
+        # 编译后的 SSMLTemplate；为 None 时不附加 Message 属性
+        self.message_template = message_template
+        # router.DialRouter：设置后按其选择的实例 / 联系流 / 主叫号码外呼，各目标独立限速
+        self.router = router
+        # 配额允许的速率上限；预测式节奏只能在此之下调整
+        self._quotas = {t.name: t.controller.max_rate for t in router.targets} if router else {None: self.controller.max_rate}
+        self.pacer = None
+        self.stats = LatencyStats()
+
+    def set_max_rate(self, rate):
+        """设置总拨号速率（不超过配额）；多实例时按各目标权重分配"""
+        if not self.router:
+            self.controller.set_max_rate(min(rate, self._quotas[None]))
+            return
+        total = sum(t.weight for t in self.router.targets)
+        for target in self.router.targets:
+            target.controller.set_max_rate(min(rate * target.weight / total, self._quotas[target.name]))
+
+    def build_params(self, phone_number, attributes, client_token, target=None, source_phone_number=None):
+        """准备 StartOutboundVoiceContact 调用参数；target 为路由选中的外呼目标"""
+        params = {
+            'DestinationPhoneNumber': phone_number,
+            'ContactFlowId': target.contact_flow_id if target else self.contact_flow_id,
+            'InstanceId': target.instance_id if target else self.connect_instance_id,
+            'Attributes': attributes,
+            # 重试沿用同一个 ClientToken，由 Connect 去重
+            'ClientToken': client_token
+        }
+        if target is None:
+            source_phone_number = self.source_phone_number
+        if source_phone_number:
+            params['SourcePhoneNumber'] = source_phone_number
+        return params
+
+    def dial(self, row_id, row, offset=None):
+        """发起单个外呼，返回结果字典（不抛出异常）；journal 中已完成的行返回 None"""
+        journal = self.journal
+        if journal and journal.is_done(row_id):
+            return None
+
+        phone_number, attributes = split_row(row, self.default_attributes)
+        result = {'row': row_id, 'phone': phone_number}
+        error = None if phone_number else '缺少电话号码'
+        if not error and self.message_template and MESSAGE_ATTRIBUTE not in attributes:
+            try:
+                attributes[MESSAGE_ATTRIBUTE] = self.message_template.render(attributes)
+            except ValueError as e:
+                error = f"话术渲染失败: {e}"
+        target = source_phone_number = None
+        if not error and self.router:
+            try:
+                target, source_phone_number = self.router.route(phone_number, journal.target(row_id) if journal else None)
+            except ValueError as e:
+                error = str(e)
+        if error:
+            result.update(status=FAILED, error=error)
+            if journal:
+                journal.record(row_id, FAILED, offset=offset, error=result['error'])
+            return result
+
+        if journal:
+            client_token = journal.client_token(row_id)
+            journal.record(row_id, PENDING, target=target.name if target else None)
+        else:
+            client_token = str(uuid.uuid4())
+        if target:
+            client, controller = target.connect_client, target.controller
+            result['target'] = target.name
+        else:
+            client, controller = self.connect_client, self.controller
+        params = self.build_params(phone_number, attributes, client_token, target, source_phone_number)
+
+        def attempt():
+            started = time.monotonic()
+            try:
+                return client.start_outbound_voice_contact(**params)
+            finally:
+                self.stats.observe(time.monotonic() - started)
+
+        try:
+            response = call_with_retry(attempt, controller, max_attempts=self.max_attempts)
+            self.stats.count(ok=True)
+            result.update(status=DIALED, contact_id=response['ContactId'])
+            if target:
+                target.report(ok=True)
+            if self.pacer:
+                self.pacer.dialed(response['ContactId'])
+        except Exception as e:
+            self.stats.count(ok=False)
+            kind = classify_error(e)
+            if target:
+                target.report(ok=False, kind=kind)
+            # 参数错误等不可重试的失败为终态；重试耗尽的留待续拨时再试
+            status = FAILED if kind == FATAL else RETRY
+            result.update(status=status, error=str(e))
+        if journal:
+            journal.record(row_id, result['status'], contact_id=result.get('contact_id'), offset=offset, error=result.get('error'))
+        return result
+
+    def run(self, rows, on_result=None):
+        """分发所有联系人；提交队列有上限，避免大文件一次性排队占用内存"""
+        pending = threading.BoundedSemaphore(self.max_workers * 2)
+
+        def task(row_id, row, offset):
+            try:
+                result = self.dial(row_id, row, offset)
+                if result and on_result:
+                    on_result(result)
+            finally:
+                pending.release()
+
+        if self.pacer:
+            self.pacer.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for row_id, row, offset in rows:
+                    pending.acquire()
+                    executor.submit(task, row_id, row, offset)
+        finally:
+            if self.pacer:
+                self.pacer.stop()
+        self.stats.stop()
+        summary = self.stats.summary()
+        if self.router:
+            summary['targets'] = self.router.snapshot()
+        else:
+            summary['rate_control'] = self.controller.snapshot()
+        if self.pacer:
+            summary['pacing'] = self.pacer.engine.snapshot()
+        return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='批量外呼')
+    parser.add_argument('contacts', help='联系人文件 (CSV 或 JSONL)')
+    parser.add_argument('--instance-id', default=DEFAULT_INSTANCE_ID, help='Amazon Connect 实例 ID')
+    parser.add_argument('--contact-flow-id', default=DEFAULT_CONTACT_FLOW_ID, help='联系流 ID')
+    parser.add_argument('--source-phone-number', default=DEFAULT_SOURCE_PHONE_NUMBER, help='主叫号码 (留空则不传)')
+    parser.add_argument('--language', default='ZH', help='缺省的 Attributes.Language')
+    parser.add_argument('--message-template', default='none',
+                        help='Message 属性的 SSML 模板文件；ivr 为内置的还款提醒话术，none 为不附加（默认）。缺少模板字段的行记为失败')
+    parser.add_argument('--region', default=None, help='AWS 区域')
+    parser.add_argument('--endpoint-url', default=None, help='自定义 Connect endpoint (例如本地桩服务)')
+    parser.add_argument('--tps', type=float, default=5.0, help='实例 StartOutboundVoiceContact 的 TPS 配额')
+    parser.add_argument('--max-tps', type=float, default=None, help='AIMD 自适应上调的速率上限 (默认等于起始速率)')
+    parser.add_argument('--max-attempts', type=int, default=5, help='限流/临时错误的最大尝试次数')
+    parser.add_argument('--concurrent-calls', type=int, default=None, help='实例并发通话配额')
+    parser.add_argument('--avg-call-seconds', type=float, default=None, help='预估平均通话时长 (秒)')
+    parser.add_argument('--workers', type=int, default=16, help='并发线程数')
+    parser.add_argument('--output', default=None, help='结果输出 JSONL 文件 (默认输出到标准输出)')
+    parser.add_argument('--targets', default=None, help='多实例外呼目标配置 JSON（见 voice_outbound/router.py）；设置后忽略实例、联系流、主叫号码与 TPS 参数')
+    parser.add_argument('--journal', default=None, help='任务日志目录；中断后用同一目录重跑即可续拨，不会重复外呼')
+    parser.add_argument('--pacing-queue-id', default=None, help='坐席队列 ID；设置后按队列空闲坐席预测式调整拨号速率（见 voice_outbound/pacing.py）')
+    parser.add_argument('--answer-rate', type=float, default=0.3, help='预测式节奏：预估真人接通率')
+    parser.add_argument('--transfer-rate', type=float, default=0.2, help='预测式节奏：预估接通后转人工的比例')
+    parser.add_argument('--target-abandon', type=float, default=0.03, help='预测式节奏：排队放弃率上限')
+    parser.add_argument('--patience', type=float, default=20.0, help='预测式节奏：客户平均排队耐心 (秒)')
+    parser.add_argument('--aht', type=float, default=180.0, help='预测式节奏：读不到历史指标时的平均处理时长 (秒)')
+    parser.add_argument('--pacing-interval', type=float, default=5.0, help='预测式节奏：读取队列指标的间隔 (秒)')
+    parser.add_argument('--pacing-outcomes', default=None,
+                        help='预测式节奏：events 消费者写出的终态结果 JSONL；不指定时在进程内用 DescribeContact 跟踪本次外呼（多实例外呼时需指定）')
+    parser.add_argument('--pacing-track-rate', type=float, default=5.0, help='预测式节奏：进程内跟踪的 DescribeContact 调用速率上限 (次/秒)')
+    args = parser.parse_args(argv)
+
+    # 连接池大小与并发线程数一致；重试由 call_with_retry 负责，关闭 botocore 内置重试
+    connect_client = get_client(
+        'connect',
+        region_name=args.region,
+        endpoint_url=args.endpoint_url,
+        max_pool_connections=args.workers,
+        max_attempts=1
+    )
+
+    rate = sustainable_rate(args.tps, args.concurrent_calls, args.avg_call_seconds)
+    router = None
+    if args.targets:
+        from voice_outbound.router import load_targets
+        router = load_targets(args.targets, args.avg_call_seconds, args.workers, args.endpoint_url)
+        rate = router.total_rate
+    try:
+        journal = CampaignJournal(args.journal, input_path=args.contacts) if args.journal else None
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if args.message_template == 'none':
+        message_template = None
+    elif args.message_template == 'ivr':
+        message_template = ivr_reminder_template()
+    else:
+        with open(args.message_template, 'r', encoding='utf-8') as f:
+            message_template = compile_template(f.read().strip())
+    dialer = BulkDialer(
+        connect_client,
+        args.instance_id,
+        args.contact_flow_id,
+        source_phone_number=args.source_phone_number or None,
+        rate=rate,
+        max_workers=args.workers,
+        default_attributes={'Language': args.language},
+        max_rate=args.max_tps,
+        max_attempts=args.max_attempts,
+        journal=journal,
+        message_template=message_template,
+        router=router
+    )
+    if args.pacing_queue_id:
+        from voice_outbound.pacing import OutcomeFeed, PacingEngine, Pacer, QueueMetricsReader
+        engine = PacingEngine(args.target_abandon, args.patience, args.answer_rate, args.transfer_rate)
+        # 队列指标从单实例参数指定的实例读取（多实例时即坐席所在实例）
+        reader = QueueMetricsReader(connect_client, args.instance_id, args.pacing_queue_id, default_aht=args.aht)
+        # 接通 / 转人工 / 放弃的观测来自本次外呼联系的终态结果
+        feed = OutcomeFeed(engine, args.pacing_outcomes)
+        tracker = None
+        if not args.pacing_outcomes:
+            from voice_outbound.outcomes import OutcomeStore
+            from voice_outbound.tracker import ContactTracker
+            store = OutcomeStore(on_terminal=lambda outcome: feed.observe(outcome.to_dict()))
+            tracker = ContactTracker(connect_client, args.instance_id, store=store, rate=args.pacing_track_rate)
+        dialer.pacer = Pacer(engine, reader, dialer.set_max_rate, args.pacing_interval, outcomes=feed, tracker=tracker)
+
+    start_row, start_offset = journal.resume_point() if journal else (0, None)
+    if start_row:
+        print(f"从第 {start_row} 行续拨", file=sys.stderr)
+
+    out = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+    out_lock = threading.Lock()
+
+    def on_result(result):
+        with out_lock:
+            out.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+    print(f"拨号速率 {rate:.2f} calls/s，线程数 {args.workers}", file=sys.stderr)
+    try:
+        summary = dialer.run(load_contacts(args.contacts, start_row, start_offset), on_result=on_result)
+    finally:
+        if journal:
+            journal.close()
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""消费 Amazon Connect 联系事件流，代替逐个 describe_contact 轮询
+
+支持的记录格式:
+    - EventBridge 联系事件 (detail-type = "Amazon Connect Contact Event")，
+      按 eventType INITIATED / CONNECTED_TO_SYSTEM / QUEUED / CONNECTED_TO_AGENT / DISCONNECTED 更新状态
+    - 联系记录 CTR（Kinesis 数据流导出），含完整时间戳、DisconnectReason 与 Attributes.amd_result
+    - Kinesis / SQS 批量投递 ({"Records": [...]})，逐条解码后按上述格式处理
+
+用法（离线回放，JSONL 每行一条记录）:
+    python -m voice_outbound.events events.jsonl --output outcomes.jsonl
+"""
+import argparse
+import base64
+import json
+import sys
+import time
+
+from voice_outbound.export import ResultsSink
+from voice_outbound.outcomes import OutcomeStore, pick_attributes, to_epoch
+
+CONTACT_EVENT = 'Amazon Connect Contact Event'
+
+# eventType -> (ContactOutcome 字段, detail 中对应的时间戳键)
+EVENT_TIMESTAMPS = {
+    'INITIATED': ('initiated', 'initiationTimestamp'),
+    'CONNECTED_TO_SYSTEM': ('connected_to_system', 'connectedToSystemTimestamp'),
+    'QUEUED': ('enqueued', 'enqueueTimestamp'),
+    'CONNECTED_TO_AGENT': ('connected_to_agent', 'connectedToAgentTimestamp'),
+    'DISCONNECTED': ('disconnected', 'disconnectTimestamp'),
+}
+
+
+class ContactEventConsumer:
+    """把联系事件与 CTR 合并进 OutcomeStore；重复与乱序到达的事件不会覆盖已有值
+
+    DISCONNECTED 事件先于 CTR 到达，此时 amd_result 可能尚未知；需要完整结果时
+    用 on_ctr 回调（每收到一条 CTR 调用一次）代替 OutcomeStore 的 on_terminal。
+    """
+
+    def __init__(self, store=None, on_ctr=None):
+        self.store = store if store is not None else OutcomeStore()
+        self.on_ctr = on_ctr
+        self.processed = 0
+        self.skipped = 0
+
+    def handle(self, record):
+        """处理一条记录（dict、JSON 字符串或 bytes）"""
+        if isinstance(record, (bytes, str)):
+            record = json.loads(record)
+        if 'Records' in record:
+            for item in record['Records']:
+                self.handle(_unwrap(item))
+        elif record.get('detail-type') == CONTACT_EVENT:
+            self._handle_event(record)
+        elif 'ContactId' in record:
+            self._handle_ctr(record)
+        else:
+            self.skipped += 1
+
+    def _handle_event(self, event):
+        detail = event['detail']
+        fields = EVENT_TIMESTAMPS.get(detail.get('eventType'))
+        if fields is None:
+            # CONTACT_DATA_UPDATED 等只可能带来属性更新
+            if not detail.get('attributes'):
+                self.skipped += 1
+                return
+        slot, key = fields or (None, None)
+        value = detail.get(key) if key else None
+        if slot == 'connected_to_agent':
+            value = value or (detail.get('agentInfo') or {}).get('connectedToAgentTimestamp')
+        elif slot == 'enqueued':
+            value = value or (detail.get('queueInfo') or {}).get('enqueueTimestamp')
+        # 事件中没有对应时间戳时以事件时间代替
+        timestamp = to_epoch(value or event.get('time')) if slot else None
+        reason = detail.get('disconnectReason')
+        attributes = detail.get('attributes')
+        amd = detail.get('answeringMachineDetectionStatus')
+
+        def update(outcome):
+            if slot and getattr(outcome, slot) is None:
+                setattr(outcome, slot, timestamp)
+            if reason and not outcome.disconnect_reason:
+                outcome.disconnect_reason = reason
+            self._merge_attributes(outcome, attributes, amd)
+
+        self.store.merge(detail['contactId'], update)
+        self.processed += 1
+
+    def _handle_ctr(self, ctr):
+        agent = ctr.get('Agent') or {}
+        values = {
+            'initiated': ctr.get('InitiationTimestamp'),
+            'connected_to_system': ctr.get('ConnectedToSystemTimestamp'),
+            'enqueued': (ctr.get('Queue') or {}).get('EnqueueTimestamp'),
+            'connected_to_agent': agent.get('ConnectedToAgentTimestamp'),
+            'disconnected': ctr.get('DisconnectTimestamp'),
+        }
+        values = {slot: to_epoch(value) for slot, value in values.items() if value}
+        reason = ctr.get('DisconnectReason')
+        attributes = ctr.get('Attributes')
+        amd = ctr.get('AnsweringMachineDetectionStatus')
+
+        def update(outcome):
+            # CTR 是最终记录，以其时间戳为准
+            for slot, value in values.items():
+                setattr(outcome, slot, value)
+            if reason:
+                outcome.disconnect_reason = reason
+            self._merge_attributes(outcome, attributes, amd)
+
+        outcome = self.store.merge(ctr['ContactId'], update)
+        self.processed += 1
+        if self.on_ctr:
+            self.on_ctr(outcome)
+
+    def _merge_attributes(self, outcome, attributes, amd_status):
+        pick_attributes(outcome, attributes, self.store.attribute_keys)
+        if amd_status and not outcome.amd_result:
+            outcome.amd_result = amd_status
+
+    def consume(self, records):
+        """处理一个可迭代的记录序列，返回处理条数"""
+        for record in records:
+            self.handle(record)
+        return self.processed
+
+
+def _unwrap(item):
+    """解出 Kinesis (base64) / SQS (body) / SNS (Message) 投递的原始记录"""
+    if 'kinesis' in item:
+        return json.loads(base64.b64decode(item['kinesis']['data']))
+    if 'body' in item:
+        return json.loads(item['body'])
+    if 'Sns' in item:
+        return json.loads(item['Sns']['Message'])
+    return item
+
+
+def replay_file(path, consumer):
+    """从 JSONL 文件回放事件（本地替代 EventBridge / Kinesis）"""
+    with open(path, 'rb') as f:
+        return consumer.consume(line for line in f if line.strip())
+
+
+def drain_queue(q, consumer, sentinel=None):
+    """从 queue.Queue 持续消费直到收到 sentinel（本地替代事件队列，供多线程生产者使用）"""
+    def records():
+        while True:
+            record = q.get()
+            if record is sentinel:
+                return
+            yield record
+    return consumer.consume(records())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='回放 Connect 联系事件 / CTR')
+    parser.add_argument('events', help='事件 JSONL 文件')
+    parser.add_argument('--output', default=None, help='终态结果输出 JSONL 文件')
+    parser.add_argument('--parquet-dir', default=None, help='同时将终态结果流式写入按天分区的 Parquet 目录')
+    parser.add_argument('--on-ctr', action='store_true', help='收到 CTR 时才输出结果（含 amd_result），而不是在 DISCONNECTED 事件时')
+    parser.add_argument('--keep-attribute', action='append', default=[], metavar='NAME',
+                        help='随结果输出的联系属性名，可重复指定（默认只保留 amd_result）')
+    args = parser.parse_args(argv)
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else None
+    sink = ResultsSink(args.parquet_dir) if args.parquet_dir else None
+
+    def on_terminal(outcome):
+        if out:
+            out.write(json.dumps(outcome.to_dict(), ensure_ascii=False) + '\n')
+        if sink:
+            sink.add(outcome)
+
+    if args.on_ctr:
+        consumer = ContactEventConsumer(OutcomeStore(attribute_keys=args.keep_attribute), on_ctr=on_terminal)
+    else:
+        consumer = ContactEventConsumer(OutcomeStore(on_terminal=on_terminal, attribute_keys=args.keep_attribute))
+    started = time.perf_counter()
+    try:
+        processed = replay_file(args.events, consumer)
+    finally:
+        if sink:
+            sink.close()
+        if out:
+            out.close()
+    elapsed = time.perf_counter() - started
+    summary = {
+        'events': processed,
+        'skipped': consumer.skipped,
+        'contacts': len(consumer.store),
+        'events_per_second': round(processed / elapsed) if elapsed > 0 else 0,
+        'states': consumer.store.counts(),
+    }
+    print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""外呼结果流式导出为按天分区的 Parquet
+
+结果按发起日期写入 <root>/dt=YYYY-MM-DD/part-<id>.parquet，每积累 batch_size 条写出一个
+row group，内存中只保留未写出的一批，不会持有整个任务的结果。分区目录为 Hive 风格，
+Athena / Spark / DuckDB / pandas 可直接按 dt 裁剪读取。
+
+依赖 pyarrow（可选依赖，仅导出时需要）。
+
+用法:
+    python -m voice_outbound.export outcomes.jsonl --output-dir results/
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+
+from voice_outbound.outcomes import ContactOutcome
+
+TIMESTAMP_COLUMNS = ('initiated', 'connected_to_system', 'enqueued', 'connected_to_agent', 'disconnected')
+STRING_COLUMNS = ('contact_id', 'disconnect_reason', 'amd_result')
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("导出 Parquet 需要安装 pyarrow: pip install pyarrow")
+    return pa, pq
+
+
+def _schema(pa):
+    fields = [pa.field('contact_id', pa.string())]
+    fields += [pa.field(name, pa.timestamp('ms', tz='UTC')) for name in TIMESTAMP_COLUMNS]
+    fields += [
+        pa.field('disconnect_reason', pa.string()),
+        pa.field('amd_result', pa.string()),
+        pa.field('attributes', pa.map_(pa.string(), pa.string())),
+    ]
+    return pa.schema(fields)
+
+
+def _partition(record):
+    """按发起时间（缺失时按挂断时间）的 UTC 日期分区"""
+    epoch = record.get('initiated') or record.get('disconnected')
+    if epoch is None:
+        return 'unknown'
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+class ResultsSink:
+    """线程安全的 Parquet 结果写入器，可直接作为 OutcomeStore 的 on_terminal 回调"""
+
+    def __init__(self, root_dir, batch_size=10000, compression='zstd'):
+        self.pa, self.pq = _import_pyarrow()
+        self.schema = _schema(self.pa)
+        self.root_dir = root_dir
+        self.batch_size = batch_size
+        self.compression = compression
+        self.rows_written = 0
+        self._lock = threading.Lock()
+        # 分区 -> 尚未写出的行；分区 -> ParquetWriter
+        self._buffers = {}
+        self._writers = {}
+        self._part_id = uuid.uuid4().hex[:12]
+
+    def __call__(self, outcome):
+        self.add(outcome)
+
+    def add(self, outcome):
+        """添加一条结果（ContactOutcome 或其 to_dict() 字典）"""
+        record = outcome.to_dict() if isinstance(outcome, ContactOutcome) else outcome
+        partition = _partition(record)
+        with self._lock:
+            buffer = self._buffers.setdefault(partition, [])
+            buffer.append(record)
+            if len(buffer) >= self.batch_size:
+                self._flush(partition)
+
+    def _flush(self, partition):
+        records = self._buffers.pop(partition, None)
+        if not records:
+            return
+        pa = self.pa
+        columns = {name: [r.get(name) for r in records] for name in STRING_COLUMNS}
+        for name in TIMESTAMP_COLUMNS:
+            # epoch 秒 -> 毫秒整数，避免逐行构造 datetime
+            columns[name] = [None if r.get(name) is None else int(r[name] * 1000) for r in records]
+        columns['attributes'] = [list((r.get('attributes') or {}).items()) or None for r in records]
+        table = pa.Table.from_pydict(columns, schema=self.schema)
+
+        writer = self._writers.get(partition)
+        if writer is None:
+            directory = os.path.join(self.root_dir, f"dt={partition}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-{self._part_id}.parquet")
+            writer = self._writers[partition] = self.pq.ParquetWriter(path, self.schema, compression=self.compression)
+        writer.write_table(table)
+        self.rows_written += len(records)
+
+    def flush(self):
+        """写出所有分区的未满批次"""
+        with self._lock:
+            for partition in list(self._buffers):
+                self._flush(partition)
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            for writer in self._writers.values():
+                writer.close()
+            self._writers.clear()
+
+
+def export_jsonl(path, root_dir, batch_size=10000):
+    """将 tracker / events 输出的结果 JSONL 流式转换为分区 Parquet，返回写出的行数"""
+    sink = ResultsSink(root_dir, batch_size=batch_size)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    sink.add(json.loads(line))
+    finally:
+        sink.close()
+    return sink.rows_written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='外呼结果导出为按天分区的 Parquet')
+    parser.add_argument('outcomes', help='结果 JSONL 文件')
+    parser.add_argument('--output-dir', required=True, help='输出根目录')
+    parser.add_argument('--batch-size', type=int, default=10000, help='每个 row group 的行数')
+    args = parser.parse_args(argv)
+    rows = export_jsonl(args.outcomes, args.output_dir, args.batch_size)
+    print(f"已导出 {rows} 条结果到 {args.output_dir}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,452 @@
+"""联系流离线模拟：加载导出的 Amazon Connect 联系流 JSON，用合成的 DTMF / Lex 输入执行，枚举全部路径并估算每条路径的通话时长
+
+用法:
+    python -m voice_outbound.flowsim ivr/voice_outbound_ivr_flow.json --attr UserName=康先生 --attr "Message=<speak>...</speak>"
+    python -m voice_outbound.flowsim llm/voice_outbound_llm_flow.json --external "OpeningSSML=<speak>您好</speak>"
+    python -m voice_outbound.flowsim ivr/voice_outbound_ivr_flow.json --input 1   # 只执行一条路径
+
+支持的动作: MessageParticipant、GetParticipantInput、ConnectParticipantWithLexBot、InvokeLambdaFunction、
+UpdateContactAttributes、UpdateFlowAttributes、Compare（按当前属性求值，只走匹配的分支）、TransferContactToQueue、DisconnectParticipant，
+其余动作（日志、录音、语音、队列设置等）只沿 NextAction 前进。
+
+路径上的问题（跳转到不存在的动作、未配置的分支、播报内容引用了未设置的属性、未设置队列即转队列等）
+与从入口不可达的动作会被报告，有问题时命令返回 1，可用于 CI 检查。
+通话时长按播报文本长度、<break> 停顿与 prosody 语速估算，加上等待按键、Lex 对话与 Lambda 调用的时间；
+转入队列后的排队时间不计入。
+"""
+import argparse
+import html
+import json
+import re
+import sys
+from functools import lru_cache
+
+# 语速估算：Polly 中文神经语音约每秒 4.5 个汉字（数字按字计），英文约每秒 2.5 个单词
+CJK_CHARS_PER_SECOND = 4.5
+WORDS_PER_SECOND = 2.5
+# 未指定 time 的 <break/>（strength=medium）
+DEFAULT_BREAK_SECONDS = 0.5
+# 客户按键所需时间
+DTMF_SECONDS = 3.0
+# 一次 Lex 对话（多轮）的平均时长，无法从联系流静态推算
+LEX_SECONDS = 60.0
+# Lambda 调用耗时（成功时）；失败时按 InvocationTimeLimitSeconds 计
+LAMBDA_SECONDS = 0.5
+# 同一路径中单个动作最多执行的次数，超过即视为循环并结束该路径
+MAX_VISITS = 3
+
+# 消耗合成输入（按键 / Lex 意图）的动作
+INPUT_ACTIONS = ('GetParticipantInput', 'ConnectParticipantWithLexBot')
+# 输入用尽或 run() 未指定时各动作的默认分支
+DEFAULT_OUTCOMES = {
+    'GetParticipantInput': 'InputTimeLimitExceeded',
+    'ConnectParticipantWithLexBot': 'InputTimeLimitExceeded',
+    'InvokeLambdaFunction': 'Success',
+    'TransferContactToQueue': 'Queued',
+}
+
+_REFERENCE = re.compile(r'\$\.(Attributes|FlowAttributes|External)\.([A-Za-z0-9_-]+)|\$\.ContactId')
+_TAG = re.compile(r'<[^>]*>')
+_BREAK = re.compile(r'<break\b([^>]*)>')
+_BREAK_TIME = re.compile(r'time\s*=\s*["\'](\d+(?:\.\d+)?)\s*(ms|s)["\']')
+_RATE = re.compile(r'<prosody\b[^>]*\brate\s*=\s*["\'](\d+(?:\.\d+)?)%["\']')
+_WORD = re.compile(r'[A-Za-z]+(?:\'[A-Za-z]+)?')
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _numeric(test):
+    return lambda value, operand: None not in (_number(value), _number(operand)) and test(_number(value), _number(operand))
+
+
+# Compare（检查联系属性）的条件运算符
+COMPARE_OPERATORS = {
+    'Equals': lambda value, operand: value == operand,
+    'TextContains': lambda value, operand: operand in value,
+    'TextStartsWith': lambda value, operand: value.startswith(operand),
+    'TextEndsWith': lambda value, operand: value.endswith(operand),
+    'NumberGreaterThan': _numeric(lambda a, b: a > b),
+    'NumberGreaterOrEqualTo': _numeric(lambda a, b: a >= b),
+    'NumberLessThan': _numeric(lambda a, b: a < b),
+    'NumberLessOrEqualTo': _numeric(lambda a, b: a <= b),
+}
+
+
+@lru_cache(maxsize=4096)
+def speech_seconds(text):
+    """估算一段文本或 SSML 的播报时长（秒）"""
+    if not text:
+        return 0.0
+    pauses = 0.0
+    for attributes in _BREAK.findall(text):
+        match = _BREAK_TIME.search(attributes)
+        if match:
+            value = float(match.group(1))
+            pauses += value / 1000 if match.group(2) == 'ms' else value
+        else:
+            pauses += DEFAULT_BREAK_SECONDS
+    rate = _RATE.search(text)
+    plain = html.unescape(_TAG.sub(' ', text))
+    chars = sum(1 for ch in plain if ch.isdigit() or '\u3400' <= ch <= '\u9fff')
+    words = len(_WORD.findall(plain))
+    speaking = chars / CJK_CHARS_PER_SECOND + words / WORDS_PER_SECOND
+    if rate:
+        speaking /= float(rate.group(1)) / 100
+    return speaking + pauses
+
+
+class _Node:
+    """预处理后的动作：分支表在加载时建好，模拟时只做字典查找"""
+
+    __slots__ = ('id', 'type', 'params', 'next', 'conditions', 'tests', 'errors', 'prompt')
+
+    def __init__(self, action):
+        self.id = action['Identifier']
+        self.type = action['Type']
+        self.params = action.get('Parameters') or {}
+        transitions = action.get('Transitions') or {}
+        self.next = transitions.get('NextAction')
+        self.conditions = {}
+        # Compare 求值用: [(分支名, 运算符, 操作数)]
+        self.tests = []
+        for condition in transitions.get('Conditions') or []:
+            spec = condition.get('Condition') or {}
+            operands = spec.get('Operands') or []
+            label = operands[0] if spec.get('Operator') == 'Equals' and len(operands) == 1 \
+                else f"{spec.get('Operator')}:{','.join(operands)}"
+            self.conditions[label] = condition.get('NextAction')
+            self.tests.append((label, spec.get('Operator'), operands[0] if operands else ''))
+        self.errors = {e['ErrorType']: e.get('NextAction') for e in transitions.get('Errors') or []}
+        self.prompt = self.params.get('SSML') or self.params.get('Text')
+
+    def options(self, include_errors=False):
+        """该动作可能走向的分支"""
+        t = self.type
+        if t == 'DisconnectParticipant':
+            return []
+        if t in INPUT_ACTIONS:
+            options = list(self.conditions) if self.conditions else ['Success']
+            for error in ('InputTimeLimitExceeded', 'NoMatchingCondition'):
+                if error in self.errors:
+                    options.append(error)
+        elif t == 'InvokeLambdaFunction':
+            options = ['Success'] + [e for e in self.errors if e != 'Success']
+            return options
+        elif t == 'Compare':
+            options = list(self.conditions) + ['NoMatchingCondition']
+        elif t == 'TransferContactToQueue':
+            options = ['Queued'] + (['QueueAtCapacity'] if 'QueueAtCapacity' in self.errors else [])
+        else:
+            options = ['Success']
+        if include_errors:
+            options += [e for e in self.errors if e not in options]
+        return options
+
+    def match(self, value, options):
+        """把合成输入（按键、意图名、timeout 或分支名）映射为分支"""
+        if value in options:
+            return value
+        if value in (None, '', 'timeout'):
+            default = DEFAULT_OUTCOMES.get(self.type)
+            return default if default in options else options[0]
+        if self.type in INPUT_ACTIONS and self.conditions:
+            return 'NoMatchingCondition'
+        raise ValueError(f"动作 {self.id} ({self.type}) 不接受输入 {value!r}，可选: {options}")
+
+
+class Flow:
+    """导出的联系流"""
+
+    def __init__(self, data, name=None):
+        self.name = name
+        self.start = data['StartAction']
+        self.nodes = {action['Identifier']: _Node(action) for action in data['Actions']}
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), name=path)
+
+
+class _State:
+    """一条路径的执行状态；属性字典写时复制，分叉时只复制引用"""
+
+    __slots__ = ('attributes', 'flow_attributes', 'external', 'queue', 'inputs', 'outcomes', 'seconds', 'problems', 'prompts')
+
+    def fork(self):
+        state = _State()
+        for name in self.__slots__:
+            setattr(state, name, getattr(self, name))
+        return state
+
+
+class FlowSimulator:
+    """执行联系流：run() 按给定输入走一条路径，paths() 枚举全部路径"""
+
+    def __init__(
+        self,
+        flow,
+        attributes=None,
+        external=None,
+        contact_id='00000000-0000-0000-0000-000000000000',
+        dtmf_seconds=DTMF_SECONDS,
+        lex_seconds=LEX_SECONDS,
+        lambda_seconds=LAMBDA_SECONDS,
+        max_visits=MAX_VISITS
+    ):
+        self.flow = flow
+        self.attributes = dict(attributes or {})
+        # InvokeLambdaFunction 成功时返回的 $.External
+        self.external = dict(external or {})
+        self.contact_id = contact_id
+        self.dtmf_seconds = dtmf_seconds
+        self.lex_seconds = lex_seconds
+        self.lambda_seconds = lambda_seconds
+        self.max_visits = max_visits
+
+    def _initial_state(self):
+        state = _State()
+        state.attributes = self.attributes
+        state.flow_attributes = {}
+        state.external = {}
+        state.queue = None
+        state.inputs = ()
+        state.outcomes = ()
+        state.seconds = 0.0
+        state.problems = ()
+        state.prompts = ()
+        return state
+
+    def _resolve(self, value, state, node_id=None, strict=False):
+        """替换 $.Attributes.X / $.FlowAttributes.X / $.External.X / $.ContactId；strict 时记录未设置的引用"""
+        if not isinstance(value, str) or '$.' not in value:
+            return value
+        missing = []
+
+        def replace(match):
+            scope, key = match.group(1), match.group(2)
+            if scope is None:
+                return self.contact_id
+            values = state.attributes if scope == 'Attributes' else \
+                state.flow_attributes if scope == 'FlowAttributes' else state.external
+            if key not in values:
+                missing.append(match.group(0))
+                return ''
+            return values[key]
+
+        resolved = _REFERENCE.sub(replace, value)
+        if strict and missing:
+            state.problems += tuple(f"{node_id}: 播报内容引用了未设置的 {ref}" for ref in missing)
+        return resolved
+
+    def _enter(self, node, state):
+        """执行动作本身（播报、设置属性），返回可选分支"""
+        t = node.type
+        params = node.params
+        if node.prompt is not None:
+            text = self._resolve(node.prompt, state, node.id, strict=True)
+            state.seconds += speech_seconds(text)
+            state.prompts += ((node.id, text),)
+        elif t in ('MessageParticipant', 'GetParticipantInput') and 'PromptId' in params:
+            state.problems += (f"{node.id}: 音频提示 {params['PromptId']} 无法估算时长",)
+        if t == 'UpdateContactAttributes':
+            updates = {k: self._resolve(v, state) for k, v in (params.get('Attributes') or {}).items()}
+            state.attributes = {**state.attributes, **updates}
+        elif t == 'UpdateFlowAttributes':
+            updates = {
+                k: self._resolve(v.get('Value') if isinstance(v, dict) else v, state)
+                for k, v in (params.get('FlowAttributes') or {}).items()
+            }
+            state.flow_attributes = {**state.flow_attributes, **updates}
+        elif t == 'UpdateContactTargetQueue':
+            state.queue = params.get('QueueId')
+
+    def _compare(self, node, state):
+        """Compare 动作按当前属性求值：第一个成立的条件，都不成立时为 NoMatchingCondition"""
+        value = self._resolve(node.params.get('ComparisonValue', ''), state) or ''
+        for label, operator, operand in node.tests:
+            test = COMPARE_OPERATORS.get(operator)
+            if test is not None and test(value, operand):
+                return label
+        return 'NoMatchingCondition'
+
+    def _take(self, node, outcome, state):
+        """走向分支 outcome，返回下一个动作 ID；路径结束时返回 (None, 结束原因)"""
+        t = node.type
+        state.outcomes += ((node.id, outcome),)
+        if t == 'GetParticipantInput':
+            if outcome == 'InputTimeLimitExceeded':
+                state.seconds += float(node.params.get('InputTimeLimitSeconds') or 5)
+            else:
+                state.seconds += self.dtmf_seconds
+        elif t == 'ConnectParticipantWithLexBot':
+            state.seconds += self.lex_seconds
+        elif t == 'InvokeLambdaFunction':
+            if outcome == 'Success':
+                state.seconds += self.lambda_seconds
+                state.external = self.external
+            else:
+                state.seconds += float(node.params.get('InvocationTimeLimitSeconds') or 8)
+                state.external = {}
+        elif t == 'TransferContactToQueue' and outcome == 'Queued':
+            if not state.queue and not node.params.get('QueueId'):
+                state.problems += (f"{node.id}: 转入队列前未设置目标队列",)
+            return None, 'queue'
+
+        if outcome in node.conditions:
+            target = node.conditions[outcome]
+        elif outcome == 'Success':
+            target = node.next
+        else:
+            target = node.errors.get(outcome)
+        if target is None:
+            state.problems += (f"{node.id}: 未配置 {outcome} 分支",)
+            return None, 'error'
+        return target, None
+
+    def _finish(self, state, end):
+        return {
+            'inputs': list(state.inputs),
+            'outcomes': list(state.outcomes),
+            'end': end,
+            'talk_seconds': round(state.seconds, 1),
+            'problems': list(state.problems),
+            'prompts': list(state.prompts),
+        }
+
+    def _walk(self, action_id, state, visits, choose, results, include_errors):
+        while True:
+            node = self.flow.nodes.get(action_id)
+            if node is None:
+                state.problems += (f"跳转到不存在的动作 {action_id}",)
+                results.append(self._finish(state, 'error'))
+                return
+            count = visits.get(action_id, 0) + 1
+            if count > self.max_visits:
+                results.append(self._finish(state, 'loop'))
+                return
+            visits[action_id] = count
+            self._enter(node, state)
+            options = node.options(include_errors)
+            if node.type == 'Compare':
+                # 由数据决定的分支，不作为输入展开
+                options = [self._compare(node, state)]
+            if not options:
+                results.append(self._finish(state, 'disconnect'))
+                return
+            chosen = choose(node, options)
+            # 除最后一个分支外都从当前状态分叉递归展开，结果按分支顺序排列
+            for outcome in chosen[:-1]:
+                branch = state.fork()
+                target = self._branch(node, outcome, branch, results)
+                if target is not None:
+                    self._walk(target, branch, dict(visits), choose, results, include_errors)
+            action_id = self._branch(node, chosen[-1], state, results)
+            if action_id is None:
+                return
+
+    def _branch(self, node, outcome, state, results):
+        if node.type in INPUT_ACTIONS:
+            state.inputs += (outcome,)
+        target, end = self._take(node, outcome, state)
+        if target is None:
+            results.append(self._finish(state, end))
+        return target
+
+    def run(self, inputs=(), outcomes=None):
+        """按输入执行一条路径：inputs 依次提供给按键 / Lex 动作（按键、意图名、timeout 或分支名），
+        outcomes 按动作 ID 指定 Lambda、转队列等动作的分支；未指定时走默认分支"""
+        pending = list(inputs)
+        overrides = outcomes or {}
+
+        def choose(node, options):
+            if node.type in INPUT_ACTIONS:
+                return [node.match(pending.pop(0) if pending else None, options)]
+            return [node.match(overrides.get(node.id), options)]
+
+        results = []
+        self._walk(self.flow.start, self._initial_state(), {}, choose, results, include_errors=True)
+        return results[0]
+
+    def paths(self, include_errors=False):
+        """枚举全部路径；include_errors 时同时展开各动作的 NoMatchingError 等错误分支"""
+        results = []
+        self._walk(self.flow.start, self._initial_state(), {}, lambda node, options: options, results, include_errors)
+        return results
+
+    def unreachable(self):
+        """从入口沿所有分支都无法到达的动作"""
+        nodes = self.flow.nodes
+        seen = set()
+        stack = [self.flow.start]
+        while stack:
+            action_id = stack.pop()
+            if action_id in seen or action_id not in nodes:
+                continue
+            seen.add(action_id)
+            node = nodes[action_id]
+            stack.extend(t for t in [node.next, *node.conditions.values(), *node.errors.values()] if t)
+        return sorted(set(nodes) - seen)
+
+
+def summarize(paths):
+    """路径数、结束方式分布、通话时长的最小 / 平均 / 最大值"""
+    seconds = [p['talk_seconds'] for p in paths]
+    ends = {}
+    for p in paths:
+        ends[p['end']] = ends.get(p['end'], 0) + 1
+    return {
+        'paths': len(paths),
+        'ends': ends,
+        'talk_seconds_min': min(seconds, default=0),
+        'talk_seconds_mean': round(sum(seconds) / len(seconds), 1) if seconds else 0,
+        'talk_seconds_max': max(seconds, default=0),
+        'problems': sorted({problem for p in paths for problem in p['problems']}),
+    }
+
+
+def _pairs(values):
+    result = {}
+    for item in values or []:
+        key, _, value = item.partition('=')
+        result[key] = value
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='联系流离线模拟：枚举路径、估算通话时长、检查流程错误')
+    parser.add_argument('flow', help='导出的联系流 JSON 文件')
+    parser.add_argument('--attr', action='append', help='联系属性 KEY=VALUE，可重复')
+    parser.add_argument('--external', action='append', help='Lambda 成功时返回的 $.External KEY=VALUE，可重复')
+    parser.add_argument('--input', action='append', help='只执行一条路径：依次提供的按键 / Lex 意图 / timeout，可重复')
+    parser.add_argument('--errors', action='store_true', help='同时展开各动作的错误分支')
+    parser.add_argument('--dtmf-seconds', type=float, default=DTMF_SECONDS, help='客户按键所需时间 (秒)')
+    parser.add_argument('--lex-seconds', type=float, default=LEX_SECONDS, help='一次 Lex 对话的平均时长 (秒)')
+    parser.add_argument('--verbose', action='store_true', help='输出每条路径的播报内容')
+    args = parser.parse_args(argv)
+
+    simulator = FlowSimulator(
+        Flow.load(args.flow),
+        attributes=_pairs(args.attr),
+        external=_pairs(args.external),
+        dtmf_seconds=args.dtmf_seconds,
+        lex_seconds=args.lex_seconds
+    )
+    paths = [simulator.run(args.input)] if args.input else simulator.paths(include_errors=args.errors)
+    for path in paths:
+        if not args.verbose:
+            path = {k: v for k, v in path.items() if k != 'prompts'}
+        print(json.dumps(path, ensure_ascii=False))
+    summary = summarize(paths)
+    summary['unreachable'] = simulator.unreachable()
+    print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+    return 1 if summary['problems'] or summary['unreachable'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,511 @@
+"""外呼名单清洗：向量化 E.164 规范化、去重、免打扰与近期已联系号码屏蔽
+
+号码规范化后表示为 int64（E.164 最多 15 位数字，省略 +），整列按字节位置逐列向量化处理，
+不逐行调用 Python。规则:
+    - 允许数字、空格与 + - ( ) . / 分隔符，含其他字符（字母、分机号、全角字符）的视为无效
+    - + 或 00 开头为国际格式；否则按缺省国家码补全：国内号码位数（如北美 10 位）、
+      已带国家码（如 12285332612）或带长途前缀 0（如 07911123456）
+    - 规范化后 8~15 位，国家码不以 0 开头；北美号码（+1）的区号与局号首位为 2~9
+
+屏蔽名单为排序去重的 int64 数组（可附带同序的最近联系时间），保存为目录下的 .npy 文件，
+以内存映射方式打开，上亿条号码也不必整体读入内存，查找用二分搜索。
+
+依赖 numpy；读写联系人文件需要 pyarrow（均为可选依赖，仅清洗名单时需要）。
+
+用法:
+    python -m voice_outbound.hygiene build dnc.csv --output dnc/
+    python -m voice_outbound.hygiene build results.jsonl --output recent/ --contacted-at now --append
+    python -m voice_outbound.hygiene clean contacts.csv --dnc dnc/ --recent recent/ --recent-days 7 --output clean.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+# 国家码 -> 国内号码位数（不含长途前缀 0），用于补全不带国家码的号码
+NATIONAL_DIGITS = {'1': 10, '44': 10, '52': 10, '81': 10, '86': 11, '33': 9, '49': 11}
+MIN_DIGITS = 8
+MAX_DIGITS = 15
+# 超过该长度的原始字符串视为无效
+MAX_WIDTH = 32
+SEPARATORS = ' \t-().\\/'
+
+# 清洗结果状态，按优先级：无效 > 免打扰 > 近期已联系 > 重复
+KEPT, INVALID, DNC, RECENT, DUPLICATE = range(5)
+STATUS_NAMES = ('kept', 'invalid', 'dnc', 'recent', 'duplicate')
+
+
+def _import_numpy():
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("名单清洗需要安装 numpy: pip install numpy")
+    return np
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        raise ImportError("读写联系人文件需要安装 pyarrow: pip install pyarrow")
+    return pa, pc
+
+
+def _complete(digits, country):
+    """国内格式的数字串按缺省国家码补全为国际格式，无法识别时返回 None"""
+    national = NATIONAL_DIGITS.get(country, 10)
+    if len(digits) == national and digits[0] != '0':
+        return country + digits
+    if len(digits) == len(country) + national and digits.startswith(country):
+        return digits
+    if len(digits) == national + 1 and digits[0] == '0':
+        return country + digits[1:]
+    return None
+
+
+def normalize_e164(raw, default_country='1'):
+    """单个号码规范化为 E.164 字符串（如 +12285332612），无效时返回 None；规则与 normalize 一致"""
+    raw = str(raw) if raw is not None else ''
+    if not raw or len(raw.encode('utf-8')) > MAX_WIDTH:
+        return None
+    digits = []
+    international = False
+    for char in raw:
+        if '0' <= char <= '9':
+            digits.append(char)
+        elif char == '+' and not digits:
+            international = True
+        elif char not in SEPARATORS:
+            return None
+    digits = ''.join(digits)
+    if not international and digits.startswith('00'):
+        international, digits = True, digits[2:]
+    if not international:
+        digits = _complete(digits, default_country)
+        if digits is None:
+            return None
+    if not MIN_DIGITS <= len(digits) <= MAX_DIGITS or digits[0] == '0':
+        return None
+    if digits[0] == '1' and len(digits) == 11 and (digits[1] < '2' or digits[4] < '2'):
+        return None
+    return '+' + digits
+
+
+# 每次处理的行数：各中间数组留在 CPU 缓存内，比整列一次处理快数倍
+CHUNK_ROWS = 1 << 16
+# 字节分类表：数字为其数值，其余为下列类别
+_SEPARATOR, _PLUS, _OTHER = 10, 11, 12
+
+
+def _byte_classes(np):
+    table = np.full(256, _OTHER, dtype=np.uint8)
+    for char in SEPARATORS:
+        table[ord(char)] = _SEPARATOR
+    # 0 为定长数组的填充字节
+    table[0] = _SEPARATOR
+    table[ord('+')] = _PLUS
+    table[48:58] = np.arange(10, dtype=np.uint8)
+    return table
+
+
+def _byte_chunks(raw, np):
+    """把一列字符串按行分块，每块拆成按字节位置的列：产出 (起始行, 列列表, 预先判定无效的行)"""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        pa = None
+    if pa is not None and isinstance(raw, (pa.Array, pa.ChunkedArray)):
+        if isinstance(raw, pa.ChunkedArray):
+            raw = raw.combine_chunks() if raw.num_chunks != 1 else raw.chunk(0)
+        if not pa.types.is_string(raw.type) and not pa.types.is_large_string(raw.type):
+            raw = raw.cast(pa.string())
+        n = len(raw)
+        # 直接读取 Arrow 的 offsets / data 缓冲区，不为每行创建 Python 字符串
+        _, offsets, data = raw.buffers()
+        offset_type = np.int64 if pa.types.is_large_string(raw.type) else np.int32
+        offsets = np.frombuffer(offsets, dtype=offset_type)[raw.offset:raw.offset + n + 1].astype(np.int64)
+        data = np.frombuffer(data, dtype=np.uint8) if data is not None and data.size else np.zeros(0, np.uint8)
+        data = np.append(data, np.uint8(0))
+        last = len(data) - 1
+        nulls = raw.is_null().to_numpy(zero_copy_only=False) if raw.null_count else None
+        for begin in range(0, n, CHUNK_ROWS):
+            starts = offsets[begin:begin + CHUNK_ROWS + 1]
+            lengths = starts[1:] - starts[:-1]
+            starts = starts[:-1]
+            invalid = lengths > MAX_WIDTH
+            if nulls is not None:
+                invalid |= nulls[begin:begin + CHUNK_ROWS]
+            width = int(min(lengths.max(), MAX_WIDTH)) if len(lengths) else 0
+            columns = []
+            for j in range(width):
+                column = data[np.minimum(starts + j, last)]
+                column[lengths <= j] = 0
+                columns.append(column)
+            yield begin, columns, invalid
+        return
+
+    if not isinstance(raw, np.ndarray) or raw.dtype.kind not in 'SU':
+        raw = [str(x).encode('utf-8') if x is not None else b'' for x in raw]
+        raw = np.array(raw, dtype=bytes) if raw else np.zeros(0, dtype='S1')
+    elif raw.dtype.kind == 'U':
+        raw = np.char.encode(raw, 'utf-8')
+    matrix = raw.view(np.uint8).reshape(len(raw), raw.dtype.itemsize)
+    for begin in range(0, len(raw), CHUNK_ROWS):
+        block = matrix[begin:begin + CHUNK_ROWS]
+        invalid = np.zeros(len(block), dtype=bool)
+        if block.shape[1] > MAX_WIDTH:
+            invalid |= block[:, MAX_WIDTH:].any(axis=1)
+            block = block[:, :MAX_WIDTH]
+        yield begin, [np.ascontiguousarray(block[:, j]) for j in range(block.shape[1])], invalid
+
+
+def _parse_chunk(columns, invalid, classes, np):
+    """逐列累加数字：返回 (数值, 数字位数, 前导 0 个数, 是否以 + 开头, 是否含非法字符)"""
+    n = len(invalid)
+    values = np.zeros(n, dtype=np.int64)
+    ndigits = np.zeros(n, dtype=np.int16)
+    zeros = np.zeros(n, dtype=np.int16)
+    plus = np.zeros(n, dtype=bool)
+    bad = invalid.copy()
+    for column in columns:
+        kind = classes[column]
+        is_digit = kind < 10
+        bad |= kind == _OTHER
+        is_plus = kind == _PLUS
+        started = ndigits > 0
+        plus |= is_plus
+        # 数字之后出现 + 为非法
+        bad |= is_plus & started
+        # 数值仍为 0 时读到的 0 是前导 0（用于识别 00 国际前缀与长途前缀 0）
+        zeros += is_digit & (kind == 0) & (values == 0)
+        # 超长的行已判为无效，溢出不影响结果
+        np.multiply(values, 10, out=values, where=is_digit)
+        np.add(values, kind, out=values, where=is_digit)
+        ndigits += is_digit
+    return values, ndigits, zeros, plus, bad
+
+
+def normalize(raw, default_country='1'):
+    """向量化规范化一列号码（list / numpy 字符串数组 / pyarrow 字符串列）
+
+    返回 (values, valid)：values 为 int64 的 E.164 数字（无效行为 0），valid 为布尔数组。
+    """
+    np = _import_numpy()
+    classes = _byte_classes(np)
+    country = int(default_country)
+    country_digits = len(default_country)
+    national = NATIONAL_DIGITS.get(default_country, 10)
+    scale = np.int64(10 ** national)
+    powers = np.array([10 ** k for k in range(19)], dtype=np.int64)
+
+    parts = []
+    for begin, columns, invalid in _byte_chunks(raw, np):
+        values, ndigits, zeros, plus, bad = _parse_chunk(columns, invalid, classes, np)
+        # 00 开头为国际格式，前导 0 不影响数值，只需扣减位数
+        double_zero = ~plus & (zeros >= 2)
+        ndigits -= np.int16(2) * double_zero
+        domestic = ~(plus | double_zero)
+        bare = domestic & (ndigits == national) & (zeros == 0)
+        prefixed = domestic & (ndigits == country_digits + national) & (values // scale == country) & (zeros == 0)
+        trunk = domestic & (ndigits == national + 1) & (zeros == 1)
+        completed = bare | trunk
+        values = np.where(completed, values + np.int64(country) * scale, values)
+        ndigits = np.where(completed, np.int16(country_digits + national), ndigits)
+        bad |= domestic & ~(completed | prefixed)
+        bad |= (ndigits < MIN_DIGITS) | (ndigits > MAX_DIGITS)
+        # 国家码不以 0 开头：数值不小于 10^(位数 - 1)
+        bad |= values < powers[np.clip(ndigits - 1, 0, 18)]
+        nanp = (ndigits == 11) & (values // powers[10] == 1)
+        bad |= nanp & (((values // powers[9]) % 10 < 2) | ((values // powers[6]) % 10 < 2))
+        values[bad] = 0
+        parts.append((values, ~bad))
+    if not parts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
+    return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+
+def to_e164(values):
+    """int64 号码数组转为 E.164 字符串列表"""
+    return ['+' + str(int(v)) for v in values]
+
+
+class SuppressionList:
+    """排序去重的号码集合（可附带最近联系时间），保存为目录下的 numbers.npy / last_contact.npy"""
+
+    def __init__(self, numbers, last_contact=None):
+        self.numbers = numbers
+        self.last_contact = last_contact
+
+    def __len__(self):
+        return len(self.numbers)
+
+    @classmethod
+    def build(cls, numbers, last_contact=None):
+        """由任意顺序、可能重复的号码构建；重复号码保留最近的联系时间"""
+        np = _import_numpy()
+        numbers = np.asarray(numbers, dtype=np.int64)
+        if last_contact is None:
+            return cls(np.unique(numbers))
+        last_contact = np.broadcast_to(np.asarray(last_contact, dtype=np.int64), numbers.shape)
+        order = np.lexsort((last_contact, numbers))
+        numbers, last_contact = numbers[order], last_contact[order]
+        keep = np.ones(len(numbers), dtype=bool)
+        keep[:-1] = numbers[1:] != numbers[:-1]
+        return cls(numbers[keep], last_contact[keep])
+
+    @classmethod
+    def open(cls, path):
+        """以内存映射方式打开已保存的屏蔽名单"""
+        np = _import_numpy()
+        numbers = np.load(os.path.join(path, 'numbers.npy'), mmap_mode='r')
+        last_path = os.path.join(path, 'last_contact.npy')
+        last_contact = np.load(last_path, mmap_mode='r') if os.path.exists(last_path) else None
+        return cls(numbers, last_contact)
+
+    def save(self, path):
+        np = _import_numpy()
+        os.makedirs(path, exist_ok=True)
+        # 先写临时文件再替换，避免清洗任务读到写了一半的名单
+        for name, array in (('numbers', self.numbers), ('last_contact', self.last_contact)):
+            target = os.path.join(path, f'{name}.npy')
+            if array is None:
+                if os.path.exists(target):
+                    os.remove(target)
+                continue
+            temp = target + '.tmp.npy'
+            np.save(temp, np.ascontiguousarray(array))
+            os.replace(temp, target)
+
+    def merge(self, other):
+        np = _import_numpy()
+        if self.last_contact is None and other.last_contact is None:
+            return SuppressionList.build(np.concatenate([self.numbers, other.numbers]))
+        stamps = [x.last_contact if x.last_contact is not None else np.zeros(len(x.numbers), np.int64) for x in (self, other)]
+        return SuppressionList.build(np.concatenate([self.numbers, other.numbers]), np.concatenate(stamps))
+
+    def _positions(self, values):
+        np = _import_numpy()
+        if not len(self.numbers):
+            return np.zeros(len(values), dtype=np.int64), np.zeros(len(values), dtype=bool)
+        positions = np.searchsorted(self.numbers, values)
+        np.minimum(positions, len(self.numbers) - 1, out=positions)
+        return positions, self.numbers[positions] == values
+
+    def contains(self, values):
+        return self._positions(values)[1]
+
+    def contacted_since(self, values, since):
+        """since（epoch 秒）之后联系过的号码；未记录联系时间的名单视为全部近期联系过"""
+        positions, found = self._positions(values)
+        if self.last_contact is None:
+            return found
+        return found & (self.last_contact[positions] >= since)
+
+
+class HygieneResult:
+    """清洗结果：values 为规范化后的号码，status 为每行的状态（KEPT / INVALID / ...）"""
+
+    __slots__ = ('values', 'status', 'timings')
+
+    def __init__(self, values, status, timings):
+        self.values = values
+        self.status = status
+        self.timings = timings
+
+    @property
+    def kept(self):
+        return self.status == KEPT
+
+    def counts(self):
+        np = _import_numpy()
+        counts = np.bincount(self.status, minlength=len(STATUS_NAMES))
+        return {name: int(count) for name, count in zip(STATUS_NAMES, counts)}
+
+
+def clean(raw, default_country='1', dnc=None, recent=None, recent_since=None):
+    """规范化、屏蔽并去重一列号码；同一号码只保留第一次出现的行"""
+    np = _import_numpy()
+    timings = {}
+    started = time.perf_counter()
+    values, valid = normalize(raw, default_country)
+    status = np.where(valid, KEPT, INVALID).astype(np.uint8)
+    timings['normalize'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    rows = np.flatnonzero(valid)
+    candidates = values[rows]
+    # 排序一次，去重与屏蔽名单查找共用
+    order = np.argsort(candidates)
+    ordered = candidates[order]
+    heads = np.ones(len(ordered), dtype=bool)
+    heads[1:] = ordered[1:] != ordered[:-1]
+    starts = np.flatnonzero(heads)
+    unique = ordered[starts]
+    group = np.cumsum(heads) - 1
+    timings['dedupe'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    # 用排序后的唯一号码二分查找，内存映射的名单基本按顺序读取
+    blocked = np.full(len(unique), KEPT, dtype=np.uint8)
+    if dnc is not None:
+        blocked[dnc.contains(unique)] = DNC
+    if recent is not None:
+        blocked[(blocked == KEPT) & recent.contacted_since(unique, recent_since or 0)] = RECENT
+    # 被屏蔽号码的所有行均标为屏蔽原因；其余号码保留行号最小（最先出现）的一行，其他为重复
+    row_status = blocked[group]
+    first = np.minimum.reduceat(order, starts) if len(starts) else order
+    row_status[(row_status == KEPT) & (order != first[group])] = DUPLICATE
+    status[rows[order]] = row_status
+    timings['suppress'] = time.perf_counter() - started
+    return HygieneResult(values, status, timings)
+
+
+def _read_table(path):
+    pa, _ = _import_pyarrow()
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.read_table(path)
+    if path.endswith('.jsonl') or path.endswith('.json'):
+        import pyarrow.json as pj
+        return pj.read_json(path)
+    import pyarrow.csv as pcsv
+    with open(path, 'r', encoding='utf-8') as f:
+        header = next(csv.reader(f), [])
+    # 所有列按字符串读取，避免号码被推断为整数丢失 + 号与前导 0
+    return pcsv.read_csv(path, convert_options=pcsv.ConvertOptions(
+        column_types={name: pa.string() for name in header}, strings_can_be_null=True))
+
+
+def _phone_column(table, name=None):
+    if name:
+        return name
+    from voice_outbound.dialer import PHONE_FIELDS
+    for field in PHONE_FIELDS:
+        if field in table.column_names:
+            return field
+    raise ValueError(f"联系人文件缺少号码列（{' / '.join(PHONE_FIELDS)}）")
+
+
+def _write_table(table, path):
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    else:
+        import pyarrow.csv as pcsv
+        pcsv.write_csv(table, path)
+
+
+def _parse_time(text):
+    if text == 'now':
+        return int(time.time())
+    try:
+        return int(float(text))
+    except ValueError:
+        moment = datetime.fromisoformat(text)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return int(moment.timestamp())
+
+
+def _build(args):
+    np = _import_numpy()
+    pa, pc = _import_pyarrow()
+    started = time.perf_counter()
+    table = _read_table(args.input)
+    column = _phone_column(table, args.phone_column)
+    values, valid = normalize(table.column(column), args.country)
+    last_contact = None
+    if args.time_column:
+        stamps = table.column(args.time_column)
+        if pa.types.is_string(stamps.type):
+            try:
+                stamps = pc.cast(stamps, pa.float64())
+            except pa.ArrowInvalid:
+                stamps = pc.cast(pc.cast(stamps, pa.timestamp('s', tz='UTC')), pa.int64())
+        elif pa.types.is_timestamp(stamps.type):
+            stamps = pc.cast(pc.cast(stamps, pa.timestamp('s', tz='UTC')), pa.int64())
+        last_contact = np.asarray(stamps.to_numpy(zero_copy_only=False), dtype=np.int64)[valid]
+    elif args.contacted_at:
+        last_contact = np.full(int(valid.sum()), _parse_time(args.contacted_at), dtype=np.int64)
+    suppression = SuppressionList.build(values[valid], last_contact)
+    if args.append and os.path.exists(os.path.join(args.output, 'numbers.npy')):
+        existing = SuppressionList.open(args.output)
+        suppression = SuppressionList(np.array(existing.numbers), None if existing.last_contact is None else np.array(existing.last_contact)).merge(suppression)
+    suppression.save(args.output)
+    print(json.dumps({
+        'rows': len(values),
+        'invalid': int((~valid).sum()),
+        'numbers': len(suppression),
+        'elapsed_s': round(time.perf_counter() - started, 3),
+    }, ensure_ascii=False), file=sys.stderr)
+    return 0
+
+
+def _clean(args):
+    np = _import_numpy()
+    pa, pc = _import_pyarrow()
+    timings = {}
+    started = time.perf_counter()
+    table = _read_table(args.contacts)
+    timings['read'] = time.perf_counter() - started
+    column = _phone_column(table, args.phone_column)
+    dnc = SuppressionList.open(args.dnc) if args.dnc else None
+    recent = SuppressionList.open(args.recent) if args.recent else None
+    since = int(time.time() - args.recent_days * 86400)
+    result = clean(table.column(column), args.country, dnc, recent, since)
+    timings.update(result.timings)
+
+    started = time.perf_counter()
+    kept = result.kept
+    e164 = pc.binary_join_element_wise('+', pc.cast(pa.array(result.values[kept]), pa.string()), '')
+    output = table.filter(pa.array(kept))
+    output = output.set_column(output.schema.get_field_index(column), column, e164)
+    _write_table(output, args.output)
+    if args.rejected:
+        rejected = table.filter(pa.array(~kept))
+        reasons = np.array(STATUS_NAMES)[result.status[~kept]]
+        _write_table(rejected.append_column('reject_reason', pa.array(reasons)), args.rejected)
+    timings['write'] = time.perf_counter() - started
+
+    summary = {'rows': len(result.status)}
+    summary.update(result.counts())
+    summary['timings_s'] = {name: round(seconds, 3) for name, seconds in timings.items()}
+    print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='外呼名单清洗')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help='由号码文件构建免打扰 / 近期已联系屏蔽名单')
+    build.add_argument('input', help='号码文件 (CSV / JSONL / Parquet)，例如免打扰名单或批量外呼结果')
+    build.add_argument('--output', required=True, help='屏蔽名单目录')
+    build.add_argument('--phone-column', default=None, help='号码列名 (默认自动识别 phone / phone_number / DestinationPhoneNumber)')
+    build.add_argument('--time-column', default=None, help='最近联系时间列 (epoch 秒或 ISO 时间)')
+    build.add_argument('--contacted-at', default=None, help='所有号码的联系时间 (now、epoch 秒或 ISO 时间)，用于近期已联系名单')
+    build.add_argument('--append', action='store_true', help='与目录中已有的名单合并')
+    build.add_argument('--country', default='1', help='不带国家码的号码使用的缺省国家码')
+
+    clean_parser = subparsers.add_parser('clean', help='清洗联系人文件')
+    clean_parser.add_argument('contacts', help='联系人文件 (CSV / JSONL / Parquet)')
+    clean_parser.add_argument('--output', required=True, help='清洗后的联系人文件 (CSV 或 .parquet)')
+    clean_parser.add_argument('--rejected', default=None, help='被剔除的行及原因 (reject_reason 列)')
+    clean_parser.add_argument('--dnc', default=None, help='免打扰名单目录')
+    clean_parser.add_argument('--recent', default=None, help='近期已联系名单目录')
+    clean_parser.add_argument('--recent-days', type=float, default=7.0, help='近期已联系的天数')
+    clean_parser.add_argument('--phone-column', default=None, help='号码列名')
+    clean_parser.add_argument('--country', default='1', help='不带国家码的号码使用的缺省国家码')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        return _build(args)
+    return _clean(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""外呼任务日志：只追加的磁盘日志 + 紧凑索引，保证中断后秒级续拨且不重复外呼
+
+目录结构:
+    journal.log   每行一条 JSON 记录 {row, token, contact_id, status, offset}
+    index.json    定期写入的快照 {campaign_id, input, journal_offset, watermark, input_offset, done, targets}
+
+watermark 为「该行及之前所有行均已完成」的最大行号，input_offset 为联系人文件中该行之后的
+字节位置；done 以区间 [起始行, 结束行, 结束行之后的字节位置] 保存 watermark 之后已完成的行。
+重试耗尽（RETRY）的行会让 watermark 停住，其后完成的行合并为少量区间，内存与快照大小只与未完成的行数有关。
+续拨时从 input_offset 处读取联系人文件，只重放快照之后的日志尾部，无需重新扫描整个输入或逐行 describe_contact。
+
+input 记录联系人文件的标识（大小与开头 1 MiB 的 SHA-256）。同一日志目录换用其他联系人文件时，
+行号与字节位置都不再对应，CampaignJournal 抛出 ValueError 拒绝续拨，需换用新的日志目录。
+
+ClientToken 由 campaign_id 与行号确定性生成，重试与续拨都使用同一个 token，
+Connect 会对相同 ClientToken 的请求去重，已发出但未记录结果的行重拨也不会产生第二通电话。
+多实例外呼时 pending 记录带有所选目标（targets 保存未完成行的目标），续拨时发往同一实例，去重依然有效。
+"""
+import bisect
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+PENDING = 'pending'
+DIALED = 'dialed'
+FAILED = 'failed'
+RETRY = 'retry'
+
+# 终态：续拨时跳过
+DONE_STATUSES = {DIALED, FAILED}
+
+JOURNAL_FILE = 'journal.log'
+INDEX_FILE = 'index.json'
+
+# 联系人文件标识只哈希开头部分，大文件也能立即打开
+IDENTITY_BYTES = 1 << 20
+
+
+def input_identity(path):
+    """联系人文件的标识 {path, size, sha256}；path 只用于提示，比较时只看大小与内容"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        digest.update(f.read(IDENTITY_BYTES))
+    return {'path': os.path.abspath(path), 'size': os.path.getsize(path), 'sha256': digest.hexdigest()}
+
+
+def _same_input(a, b):
+    return a['size'] == b['size'] and a['sha256'] == b['sha256']
+
+
+class CampaignJournal:
+    """线程安全的外呼任务日志；input_path 为联系人文件，与日志记录的文件不同时抛出 ValueError"""
+
+    def __init__(self, directory, snapshot_every=1000, sync=True, input_path=None):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.sync = sync
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._journal_path = os.path.join(directory, JOURNAL_FILE)
+        self._index_path = os.path.join(directory, INDEX_FILE)
+
+        self.campaign_id = None
+        self.input = None
+        self.watermark = -1
+        self.input_offset = None
+        # watermark 之后已完成的行: 按起始行排序的 [起始行, 结束行, 结束行之后的输入字节位置]
+        self._done = []
+        # 未完成的行: 行号 -> 多实例外呼时选中的目标名
+        self._targets = {}
+        self._since_snapshot = 0
+        self._load()
+        identity = input_identity(input_path) if input_path else None
+        if identity and self.input and not _same_input(identity, self.input):
+            raise ValueError(
+                f"任务日志 {directory} 属于另一个联系人文件 {self.input['path']}，"
+                f"与 {identity['path']} 的行号和字节位置不对应，请换用新的日志目录"
+            )
+        self._file = open(self._journal_path, 'ab')
+        if identity and self.input is None:
+            self.input = identity
+            self._snapshot()
+        elif not os.path.exists(self._index_path):
+            # 立即落盘 campaign_id，否则崩溃后续拨会生成不同的 ClientToken
+            self._snapshot()
+
+    def _load(self):
+        journal_offset = 0
+        if os.path.exists(self._index_path):
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self.campaign_id = index['campaign_id']
+            self.input = index.get('input')
+            self.watermark = index['watermark']
+            self.input_offset = index.get('input_offset')
+            self._done = [list(span) for span in index.get('done', [])]
+            self._targets = {row_id: target for row_id, target in index.get('targets', [])}
+            journal_offset = index['journal_offset']
+        if self.campaign_id is None:
+            self.campaign_id = str(uuid.uuid4())
+
+        # 只重放快照之后的日志尾部
+        if os.path.exists(self._journal_path):
+            with open(self._journal_path, 'rb') as f:
+                f.seek(journal_offset)
+                valid_end = journal_offset
+                for line in iter(f.readline, b''):
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 崩溃时写了一半的最后一行，截断丢弃
+                        break
+                    valid_end = f.tell()
+                    self._apply(entry)
+            if valid_end < os.path.getsize(self._journal_path):
+                with open(self._journal_path, 'r+b') as f:
+                    f.truncate(valid_end)
+
+    def _apply(self, entry):
+        row_id = entry['row']
+        if entry['status'] not in DONE_STATUSES:
+            if entry.get('target'):
+                self._targets[row_id] = entry['target']
+            return
+        self._targets.pop(row_id, None)
+        if row_id <= self.watermark:
+            return
+        self._add_done(row_id, entry.get('offset'))
+        # 推进连续完成的水位线
+        done = self._done
+        if done and done[0][0] == self.watermark + 1:
+            _, self.watermark, offset = done.pop(0)
+            if offset is not None:
+                self.input_offset = offset
+
+    def _find(self, row_id):
+        """起始行不大于 row_id 的最后一个区间的下标（没有时为 -1）"""
+        return bisect.bisect_right(self._done, [row_id, float('inf')]) - 1
+
+    def _add_done(self, row_id, offset):
+        done = self._done
+        i = self._find(row_id)
+        left = done[i] if i >= 0 else None
+        if left is not None and row_id <= left[1]:
+            return
+        right = done[i + 1] if i + 1 < len(done) else None
+        joins_left = left is not None and left[1] == row_id - 1
+        joins_right = right is not None and right[0] == row_id + 1
+        if joins_left and joins_right:
+            left[1], left[2] = right[1], right[2]
+            del done[i + 1]
+        elif joins_left:
+            left[1] = row_id
+            if offset is not None:
+                left[2] = offset
+        elif joins_right:
+            right[0] = row_id
+        else:
+            done.insert(i + 1, [row_id, row_id, offset])
+
+    def client_token(self, row_id):
+        """同一任务同一行始终得到相同的 ClientToken"""
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{self.campaign_id}/{row_id}"))
+
+    def is_done(self, row_id):
+        with self._lock:
+            if row_id <= self.watermark:
+                return True
+            i = self._find(row_id)
+            return i >= 0 and row_id <= self._done[i][1]
+
+    def target(self, row_id):
+        """未完成的行上次发往的目标名；没有时为 None"""
+        with self._lock:
+            return self._targets.get(row_id)
+
+    def resume_point(self):
+        """返回 (起始行号, 联系人文件字节位置)；尚无进度时字节位置为 None"""
+        with self._lock:
+            return self.watermark + 1, self.input_offset
+
+    def record(self, row_id, status, contact_id=None, offset=None, error=None, target=None):
+        """追加一条记录；终态记录写入后即使进程崩溃也不会被重拨"""
+        entry = {'row': row_id, 'token': self.client_token(row_id), 'contact_id': contact_id, 'status': status}
+        if offset is not None:
+            entry['offset'] = offset
+        if target:
+            entry['target'] = target
+        if error:
+            entry['error'] = error
+        line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if self.sync:
+                os.fsync(self._file.fileno())
+            self._apply(entry)
+            self._since_snapshot += 1
+            if self._since_snapshot >= self.snapshot_every:
+                self._snapshot()
+
+    def _snapshot(self):
+        index = {
+            'campaign_id': self.campaign_id,
+            'input': self.input,
+            'journal_offset': self._file.tell(),
+            'watermark': self.watermark,
+            'input_offset': self.input_offset,
+            'done': self._done,
+            'targets': sorted(self._targets.items()),
+        }
+        tmp_path = self._index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+            f.flush()
+            os.fsync(f.fileno())
+        # 原子替换，崩溃时要么是旧索引要么是新索引
+        os.replace(tmp_path, self._index_path)
+        self._since_snapshot = 0
+
+    def entries(self):
+        """遍历全部日志记录（用于导出与对账，续拨不需要）"""
+        with open(self._journal_path, 'rb') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    break
+
+    def close(self):
+        with self._lock:
+            self._file.flush()
+            self._snapshot()
+            self._file.close()
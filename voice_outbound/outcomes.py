@@ -0,0 +1,170 @@
+"""外呼结果的紧凑内存存储
+
+每个联系只保存一个 __slots__ 对象（时间戳为 epoch 秒），不保留原始 describe_contact 响应，
+联系属性只提取 amd_result 与显式指定的 attribute_keys，数万通外呼的状态可常驻内存。
+"""
+import threading
+from datetime import datetime
+
+INITIATED = 'INITIATED'
+CONNECTED = 'CONNECTED'
+DISCONNECTED = 'DISCONNECTED'
+
+# 导出/展示时的字段顺序，与 lex/voice_outbound_lex_voicemail.py 页面一致
+TIMESTAMP_FIELDS = (
+    ('initiated', 'InitiationTimestamp'),
+    ('connected_to_system', 'ConnectedToSystemTimestamp'),
+    ('connected_to_agent', 'ConnectedToAgentTimestamp'),
+    ('disconnected', 'DisconnectTimestamp'),
+)
+
+
+def to_epoch(value):
+    """datetime / ISO 8601 字符串 / 数字统一转为 epoch 秒"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    return float(value)
+
+
+def format_local(epoch_seconds):
+    """epoch 秒转为本地时间字符串"""
+    return datetime.fromtimestamp(epoch_seconds).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class ContactOutcome:
+    __slots__ = (
+        'contact_id',
+        'initiated',
+        'connected_to_system',
+        'enqueued',
+        'connected_to_agent',
+        'disconnected',
+        'disconnect_reason',
+        'amd_result',
+        'attributes',
+    )
+
+    def __init__(self, contact_id):
+        self.contact_id = contact_id
+        self.initiated = None
+        self.connected_to_system = None
+        # 进入坐席队列（转人工）的时间
+        self.enqueued = None
+        self.connected_to_agent = None
+        self.disconnected = None
+        self.disconnect_reason = None
+        self.amd_result = None
+        # 仅保存 OutcomeStore.attribute_keys 指定的属性，默认不保存
+        self.attributes = None
+
+    @property
+    def state(self):
+        if self.disconnected is not None:
+            return DISCONNECTED
+        if self.connected_to_system is not None or self.connected_to_agent is not None:
+            return CONNECTED
+        return INITIATED
+
+    @property
+    def terminal(self):
+        return self.disconnected is not None
+
+    def rows(self):
+        """返回 (名称, 值) 列表，时间戳转为本地时间，未出现的字段不返回"""
+        rows = []
+        for slot, name in TIMESTAMP_FIELDS:
+            value = getattr(self, slot)
+            if value is not None:
+                rows.append((name, format_local(value)))
+        if self.disconnect_reason:
+            rows.append(('DisconnectReason', self.disconnect_reason))
+        if self.amd_result:
+            rows.append(('amd_result', self.amd_result))
+        return rows
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+def pick_attributes(outcome, attributes, keys):
+    """从联系属性中提取 amd_result，并只把 keys 中的属性合并进 outcome.attributes"""
+    if not attributes:
+        return
+    if attributes.get('amd_result'):
+        outcome.amd_result = attributes['amd_result']
+    kept = {key: attributes[key] for key in keys if key in attributes}
+    if kept:
+        outcome.attributes = dict(outcome.attributes or {}, **kept)
+
+
+def parse_contact(contact, outcome=None, attribute_keys=()):
+    """将 describe_contact 返回的 Contact 合并进 ContactOutcome"""
+    outcome = outcome or ContactOutcome(contact.get('Id'))
+    if 'InitiationTimestamp' in contact:
+        outcome.initiated = to_epoch(contact['InitiationTimestamp'])
+    if 'ConnectedToSystemTimestamp' in contact:
+        outcome.connected_to_system = to_epoch(contact['ConnectedToSystemTimestamp'])
+    queue_info = contact.get('QueueInfo') or {}
+    if 'EnqueueTimestamp' in queue_info:
+        outcome.enqueued = to_epoch(queue_info['EnqueueTimestamp'])
+    agent_info = contact.get('AgentInfo') or {}
+    if 'ConnectedToAgentTimestamp' in agent_info:
+        outcome.connected_to_agent = to_epoch(agent_info['ConnectedToAgentTimestamp'])
+    if 'DisconnectTimestamp' in contact:
+        outcome.disconnected = to_epoch(contact['DisconnectTimestamp'])
+    if contact.get('DisconnectReason'):
+        outcome.disconnect_reason = contact['DisconnectReason']
+    pick_attributes(outcome, contact.get('Attributes'), attribute_keys)
+    return outcome
+
+
+class OutcomeStore:
+    """线程安全的 ContactId -> ContactOutcome 存储；联系进入终态时回调 on_terminal 一次
+
+    attribute_keys 为需要随结果导出的联系属性名，其余属性不保存。
+    """
+
+    def __init__(self, on_terminal=None, attribute_keys=()):
+        self._lock = threading.Lock()
+        self._outcomes = {}
+        self.on_terminal = on_terminal
+        self.attribute_keys = tuple(attribute_keys)
+
+    def get(self, contact_id):
+        with self._lock:
+            return self._outcomes.get(contact_id)
+
+    def merge(self, contact_id, update):
+        """update(outcome) 原地修改结果；返回更新后的 outcome"""
+        with self._lock:
+            outcome = self._outcomes.get(contact_id)
+            if outcome is None:
+                outcome = self._outcomes[contact_id] = ContactOutcome(contact_id)
+            was_terminal = outcome.terminal
+            update(outcome)
+            became_terminal = outcome.terminal and not was_terminal
+        if became_terminal and self.on_terminal:
+            self.on_terminal(outcome)
+        return outcome
+
+    def merge_contact(self, contact):
+        return self.merge(contact['Id'], lambda outcome: parse_contact(contact, outcome, self.attribute_keys))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._outcomes)
+
+    def values(self):
+        with self._lock:
+            return list(self._outcomes.values())
+
+    def counts(self):
+        """按状态计数"""
+        counts = {INITIATED: 0, CONNECTED: 0, DISCONNECTED: 0}
+        for outcome in self.values():
+            counts[outcome.state] += 1
+        return counts
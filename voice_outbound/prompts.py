@@ -0,0 +1,82 @@
+"""版本化提示词注册表（SSM Parameter Store）
+
+提示词保存在 /voice-outbound/prompts/<prompt_id>，每次内容变化生成新的参数版本。
+外呼时把 PromptId / PromptVersion 作为联系流属性传入，Lambda 按 (id, version) 读取并在
+进程内 LRU 缓存；不再在每次外呼前改写 Lambda 环境变量（那会触发冷启动，且多人同时外呼时互相覆盖）。
+
+外呼发起后可调用 request_pregeneration，让 Lambda 在振铃期间预生成开场白与首轮回复。
+"""
+import hashlib
+import json
+import threading
+
+from voice_outbound.clients import get_client
+
+PROMPT_PARAMETER_PREFIX = '/voice-outbound/prompts/'
+
+
+def parameter_name(prompt_id):
+    return PROMPT_PARAMETER_PREFIX + prompt_id
+
+
+class PromptRegistry:
+    """发布提示词并返回版本号；内容未变时不调用 SSM"""
+
+    def __init__(self, ssm_client=None):
+        self._ssm_client = ssm_client
+        self._lock = threading.Lock()
+        # prompt_id -> (内容摘要, 版本号)
+        self._published = {}
+
+    @property
+    def ssm_client(self):
+        if self._ssm_client is None:
+            self._ssm_client = get_client('ssm')
+        return self._ssm_client
+
+    def publish(self, prompt_id, content):
+        """发布提示词，返回其版本号（字符串，可直接作为联系流属性）"""
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        with self._lock:
+            cached = self._published.get(prompt_id)
+            if cached and cached[0] == digest:
+                return cached[1]
+
+            name = parameter_name(prompt_id)
+            version = None
+            if cached is None:
+                # 进程首次发布该 id 时，与线上最新版本比较，避免重复生成版本
+                try:
+                    current = self.ssm_client.get_parameter(Name=name)['Parameter']
+                    if current['Value'] == content:
+                        version = current['Version']
+                except self.ssm_client.exceptions.ParameterNotFound:
+                    pass
+            if version is None:
+                response = self.ssm_client.put_parameter(
+                    Name=name,
+                    Value=content,
+                    Type='String',
+                    Overwrite=True,
+                    # 中文提示词超过 4KB 时自动使用高级参数
+                    Tier='Intelligent-Tiering'
+                )
+                version = response['Version']
+
+            version = str(version)
+            self._published[prompt_id] = (digest, version)
+            return version
+
+    def attributes(self, prompt_id, content):
+        """发布提示词并返回需要附加到外呼的联系流属性"""
+        return {'PromptId': prompt_id, 'PromptVersion': self.publish(prompt_id, content)}
+
+
+def request_pregeneration(function_name, contact_id, attributes, lambda_client=None):
+    """异步调用 LLM Lambda，按 ContactId 预生成开场白与首轮回复（不等待结果）"""
+    lambda_client = lambda_client or get_client('lambda')
+    lambda_client.invoke(
+        FunctionName=function_name,
+        InvocationType='Event',
+        Payload=json.dumps({'Pregenerate': {'ContactId': contact_id, 'Attributes': attributes}}, ensure_ascii=False).encode('utf-8')
+    )
@@ -0,0 +1,207 @@
+"""多实例外呼路由：把联系分散到多个 (Connect 实例, 联系流, 主叫号码池) 目标上
+
+- 按容量权重做平滑加权轮询（smooth weighted round-robin），每个目标独立限速，
+  限流时该目标的 AIMD 速率下降，其分到的份额随之按比例减少
+- 连续失败达到阈值的目标熔断 cooldown 秒，期间不再分配（全部熔断时选最先恢复的）
+- 主叫号码按目标号码的最长匹配前缀（国家码 / 号段，* 为缺省）选号码池，池内轮换，避免单个号码被标记为骚扰
+
+目标配置文件 (JSON):
+    {"targets": [
+        {"name": "us-east-1", "instance_id": "...", "contact_flow_id": "...", "region": "us-east-1",
+         "tps": 5, "concurrent_calls": 100, "weight": 1,
+         "source_numbers": {"+1": ["+13072633584", "+13072633585"], "*": ["+13072633586"]}},
+        ...
+    ]}
+
+用法:
+    python -m voice_outbound.dialer contacts.csv --targets targets.json --avg-call-seconds 60
+"""
+import itertools
+import json
+import sys
+import threading
+import time
+
+from voice_outbound.clients import get_client
+from voice_outbound.dialer import TokenBucket, sustainable_rate
+from voice_outbound.throttle import FATAL, THROTTLE, AdaptiveRateController
+
+DEFAULT_POOL = '*'
+
+
+class DialTarget:
+    """一个外呼目标：Connect 客户端、实例、联系流、主叫号码池与独立的限速 / 健康状态"""
+
+    def __init__(
+        self,
+        name,
+        connect_client,
+        instance_id,
+        contact_flow_id,
+        source_numbers=None,
+        rate=1.0,
+        max_rate=None,
+        weight=None,
+        failure_threshold=5,
+        cooldown=30.0,
+        clock=time.monotonic
+    ):
+        self.name = name
+        self.connect_client = connect_client
+        self.instance_id = instance_id
+        self.contact_flow_id = contact_flow_id
+        self.limiter = TokenBucket(rate)
+        self.controller = AdaptiveRateController(self.limiter, max_rate=max_rate or rate)
+        # 缺省按速率分配份额
+        self.weight = float(weight or rate)
+        # 前缀 -> 号码列表；匹配时按前缀长度从长到短
+        if isinstance(source_numbers, (list, tuple)):
+            source_numbers = {DEFAULT_POOL: source_numbers}
+        self.pools = {prefix: list(numbers) for prefix, numbers in (source_numbers or {}).items() if numbers}
+        self._prefixes = sorted((p for p in self.pools if p != DEFAULT_POOL), key=len, reverse=True)
+        self._rotation = {prefix: itertools.count() for prefix in self.pools}
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+        self.dialed = 0
+        self.failed = 0
+
+    def pool_for(self, phone_number):
+        """目标号码对应的号码池前缀；没有可用号码池时返回 None"""
+        for prefix in self._prefixes:
+            if phone_number.startswith(prefix):
+                return prefix
+        return DEFAULT_POOL if DEFAULT_POOL in self.pools else None
+
+    def accepts(self, phone_number):
+        # 未配置号码池的目标使用联系流 / 实例的缺省主叫号码，接受所有目标号码
+        return not self.pools or self.pool_for(phone_number) is not None
+
+    def source_number(self, phone_number):
+        prefix = self.pool_for(phone_number)
+        if prefix is None:
+            return None
+        numbers = self.pools[prefix]
+        return numbers[next(self._rotation[prefix]) % len(numbers)]
+
+    def healthy(self, now=None):
+        return (now if now is not None else self.clock()) >= self.unhealthy_until
+
+    def effective_weight(self, now=None):
+        """熔断中为 0；限流降速后按当前速率占上限的比例缩小"""
+        if not self.healthy(now):
+            return 0.0
+        controller = self.controller
+        return self.weight * controller.rate / controller.max_rate
+
+    def report(self, ok, kind=None):
+        """记录一次外呼的最终结果；限流由 AIMD 处理，参数错误与目标健康无关，均不计入熔断"""
+        with self._lock:
+            if ok:
+                self.dialed += 1
+                self.consecutive_failures = 0
+                return
+            self.failed += 1
+            if kind in (THROTTLE, FATAL):
+                return
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                self.consecutive_failures = 0
+                self.unhealthy_until = self.clock() + self.cooldown
+                print(f"外呼目标 {self.name} 连续失败，熔断 {self.cooldown:.0f} 秒", file=sys.stderr)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'dialed': self.dialed,
+                'failed': self.failed,
+                'healthy': self.healthy(),
+                'weight': round(self.effective_weight(), 3),
+                'rate_control': self.controller.snapshot(),
+            }
+
+
+class DialRouter:
+    """在多个 DialTarget 之间做平滑加权轮询"""
+
+    def __init__(self, targets, clock=time.monotonic):
+        if not targets:
+            raise ValueError("至少需要一个外呼目标")
+        self.targets = list(targets)
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._current = {target.name: 0.0 for target in self.targets}
+
+    def get(self, name):
+        for target in self.targets:
+            if target.name == name:
+                return target
+        return None
+
+    def route(self, phone_number, target_name=None):
+        """为目标号码选择 (外呼目标, 主叫号码)；主叫号码为 None 时使用实例的缺省号码
+
+        target_name 为续拨时 journal 记录的目标，存在时沿用，保证 ClientToken 去重在同一实例上生效。
+        """
+        pinned = self.get(target_name) if target_name else None
+        if pinned is not None:
+            return pinned, pinned.source_number(phone_number)
+        now = self.clock()
+        with self._lock:
+            candidates = [t for t in self.targets if t.accepts(phone_number)]
+            if not candidates:
+                raise ValueError(f"没有可外呼 {phone_number} 的目标（号码池不匹配）")
+            weighted = [(t, t.effective_weight(now)) for t in candidates]
+            weighted = [(t, w) for t, w in weighted if w > 0]
+            if not weighted:
+                # 全部熔断：选最先恢复的目标，不丢弃联系
+                target = min(candidates, key=lambda t: t.unhealthy_until)
+            else:
+                total = 0.0
+                target, best = None, None
+                for t, w in weighted:
+                    self._current[t.name] += w
+                    total += w
+                    if best is None or self._current[t.name] > best:
+                        target, best = t, self._current[t.name]
+                self._current[target.name] -= total
+        return target, target.source_number(phone_number)
+
+    @property
+    def total_rate(self):
+        return sum(t.controller.rate for t in self.targets)
+
+    def snapshot(self):
+        return {target.name: target.snapshot() for target in self.targets}
+
+
+def load_targets(path, avg_call_seconds=None, max_workers=16, endpoint_url=None):
+    """从 JSON 配置创建 DialRouter；每个目标的速率按其 TPS 与并发通话配额计算"""
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    targets = []
+    for i, spec in enumerate(config['targets']):
+        client = get_client(
+            'connect',
+            region_name=spec.get('region'),
+            endpoint_url=spec.get('endpoint_url') or endpoint_url,
+            max_pool_connections=max_workers,
+            max_attempts=1
+        )
+        rate = sustainable_rate(spec.get('tps', 5.0), spec.get('concurrent_calls'), avg_call_seconds)
+        targets.append(DialTarget(
+            spec.get('name') or f"target-{i}",
+            client,
+            spec['instance_id'],
+            spec['contact_flow_id'],
+            source_numbers=spec.get('source_numbers'),
+            rate=rate,
+            max_rate=spec.get('max_tps') or rate,
+            weight=spec.get('weight'),
+            failure_threshold=spec.get('failure_threshold', 5),
+            cooldown=spec.get('cooldown', 30.0)
+        ))
+    return DialRouter(targets)
@@ -0,0 +1,446 @@
+"""按接通率安排重拨：从历史外呼结果学习各号码、各时段的真人接通率，把语音信箱 / 未接听的联系排到期望接通率最高的时段
+
+接通率分三层平滑估计（样本少时向上一层收缩）:
+    全局         所有外呼的真人接通率
+    时段         本地时间的「星期 × 小时」（168 个时段）
+    号码 × 小时   该号码在本地各小时的接通情况
+重拨时在 horizon_days 天内、号码本地的允许外呼时段（calling_hours）中逐小时打分，
+得分 = 期望接通率 × DAILY_DECAY^天数（同等接通率下优先更早的时段），并执行每号码的总次数与每日次数上限。
+待重拨的联系保存在按到期时间排序的堆中，可容纳数百万条。
+
+每次 plan 只读取本轮的外呼结果，以往轮次的外呼记录保存在外呼历史文件（AttemptHistory，只追加的 JSONL）中：
+plan 先载入历史再合并本轮结果，次数上限与接通率都按全部轮次计算，本轮新增的记录追加写入历史。
+计划文件已存在时合并写回（按号码去重）：以往轮次尚未到期的重拨保留原安排，本轮外呼过的号码以本轮结果为准。
+
+用法:
+    # 由外呼结果（dialer 输出）与通话结果（tracker / events 输出）生成重拨计划
+    python -m voice_outbound.scheduler plan results.jsonl outcomes.jsonl --contacts contacts.csv --output retries.jsonl
+    # 下一轮：同一个历史文件（缺省为计划文件旁的 attempts.jsonl），合并到同一个计划文件
+    python -m voice_outbound.scheduler plan results2.jsonl outcomes2.jsonl --output retries.jsonl --history attempts.jsonl
+    # 取出已到期的联系，作为 dialer 的联系人文件；未到期的写回计划
+    python -m voice_outbound.scheduler due retries.jsonl --output due.jsonl
+"""
+import argparse
+import heapq
+import itertools
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from voice_outbound.dialer import PHONE_FIELDS, load_contacts
+
+LIVE = 'live'
+VOICEMAIL = 'voicemail'
+NO_ANSWER = 'no_answer'
+BUSY = 'busy'
+INVALID = 'invalid'
+
+# 各结果的最短重拨间隔（秒）；LIVE 与 INVALID 不重拨
+RETRY_DELAYS = {
+    VOICEMAIL: 4 * 3600,
+    NO_ANSWER: 2 * 3600,
+    BUSY: 15 * 60,
+}
+
+# Connect AnsweringMachineDetectionStatus / amd_result 属性
+AMD_CLASSES = {
+    'ANSWERED': LIVE,
+    'HUMAN': LIVE,
+    'VOICEMAIL_BEEP': VOICEMAIL,
+    'VOICEMAIL_NO_BEEP': VOICEMAIL,
+    'VOICEMAIL': VOICEMAIL,
+    'AMD_UNANSWERED': NO_ANSWER,
+    'SIT_TONE_BUSY': BUSY,
+    'SIT_TONE_INVALID_NUMBER': INVALID,
+    'SIT_TONE_DETECTED': INVALID,
+    'FAX_MACHINE_DETECTED': INVALID,
+}
+# 未接通时的 DisconnectReason
+INVALID_REASONS = {'OUTBOUND_DESTINATION_ENDPOINT_ERROR'}
+
+SLOTS = 7 * 24
+DAILY_DECAY = 0.97
+# 平滑强度：相当于从上一层借用的样本数
+SLOT_PRIOR = 20.0
+NUMBER_PRIOR = 3.0
+DEFAULT_RATE = 0.3
+
+
+def classify_outcome(outcome):
+    """由 ContactOutcome.to_dict() 形式的结果判断外呼结果类别"""
+    amd = (outcome.get('amd_result') or '').upper()
+    if amd in AMD_CLASSES:
+        return AMD_CLASSES[amd]
+    if outcome.get('disconnect_reason') in INVALID_REASONS:
+        return INVALID
+    if outcome.get('connected_to_system') or outcome.get('connected_to_agent'):
+        return LIVE
+    return NO_ANSWER
+
+
+@lru_cache(maxsize=64)
+def _zone(name):
+    return ZoneInfo(name)
+
+
+class _Counts:
+    __slots__ = ('attempts', 'connects')
+
+    def __init__(self):
+        self.attempts = 0
+        self.connects = 0
+
+    def rate(self, prior_rate, prior_weight):
+        return (self.connects + prior_rate * prior_weight) / (self.attempts + prior_weight)
+
+
+class _NumberHistory:
+    """单个号码的历史：本地各小时的接通计数与每日外呼次数"""
+
+    __slots__ = ('attempts', 'hours', 'days')
+
+    def __init__(self):
+        self.attempts = 0
+        # 本地小时 -> _Counts，只为出现过的小时分配
+        self.hours = {}
+        # 本地日期序号 -> 当日外呼次数
+        self.days = {}
+
+
+class RetryScheduler:
+    """学习接通率并安排重拨；clock 返回 epoch 秒，便于模拟"""
+
+    def __init__(
+        self,
+        max_attempts=3,
+        max_daily_attempts=1,
+        calling_hours=(9, 20),
+        timezone='UTC',
+        horizon_days=3,
+        retry_delays=None,
+        clock=time.time
+    ):
+        self.max_attempts = max_attempts
+        self.max_daily_attempts = max_daily_attempts
+        # 本地时间 [开始小时, 结束小时) 内允许外呼
+        self.calling_hours = calling_hours
+        self.timezone = timezone
+        self.horizon_days = horizon_days
+        self.retry_delays = dict(RETRY_DELAYS, **(retry_delays or {}))
+        self.clock = clock
+        self.overall = _Counts()
+        self.slots = [_Counts() for _ in range(SLOTS)]
+        self.numbers = {}
+        self._heap = []
+        self._seq = itertools.count()
+        # 号码 -> (到期时间, 序号, 行数据)；堆中序号不一致的条目已失效
+        self._pending = {}
+        # 各时段平滑后的接通率，学习数据变化后重新计算
+        self._rates = None
+        # (时区, 最早时间的分钟数) -> 候选时段表
+        self._tables = {}
+
+    # 学习
+
+    def _local(self, epoch, timezone):
+        return datetime.fromtimestamp(epoch, _zone(timezone or self.timezone))
+
+    def observe(self, phone, epoch, result, timezone=None):
+        """记录一次外呼（epoch 为发起时间）及其结果类别"""
+        local = self._local(epoch, timezone)
+        slot = local.weekday() * 24 + local.hour
+        connected = result == LIVE
+        for counts in (self.overall, self.slots[slot]):
+            counts.attempts += 1
+            counts.connects += connected
+        history = self.numbers.get(phone)
+        if history is None:
+            history = self.numbers[phone] = _NumberHistory()
+        history.attempts += 1
+        counts = history.hours.get(local.hour)
+        if counts is None:
+            counts = history.hours[local.hour] = _Counts()
+        counts.attempts += 1
+        counts.connects += connected
+        day = local.toordinal()
+        history.days[day] = history.days.get(day, 0) + 1
+        self._rates = None
+
+    def slot_rates(self):
+        if self._rates is None:
+            overall = self.overall.rate(DEFAULT_RATE, 1.0)
+            self._rates = [counts.rate(overall, SLOT_PRIOR) for counts in self.slots]
+        return self._rates
+
+    def expected_rate(self, phone, epoch, timezone=None):
+        """号码在 epoch 时刻的期望真人接通率"""
+        local = self._local(epoch, timezone)
+        rate = self.slot_rates()[local.weekday() * 24 + local.hour]
+        history = self.numbers.get(phone)
+        counts = history.hours.get(local.hour) if history else None
+        return counts.rate(rate, NUMBER_PRIOR) if counts else rate
+
+    # 安排
+
+    def _candidates(self, earliest, timezone):
+        """earliest 之后 horizon 内、允许外呼时段中的各小时起点: [(epoch, 时段, 本地小时, 衰减系数)]"""
+        key = (timezone, int(earliest) // 60)
+        table = self._tables.get(key)
+        if table is not None:
+            return table
+        start_hour, end_hour = self.calling_hours
+        earliest = key[1] * 60
+        local = self._local(earliest, timezone)
+        end = local + timedelta(days=self.horizon_days)
+        table = []
+        while local < end:
+            if start_hour <= local.hour < end_hour:
+                epoch = local.timestamp()
+                decay = DAILY_DECAY ** ((epoch - earliest) / 86400)
+                table.append((epoch, local.weekday() * 24 + local.hour, local.hour, decay))
+            local = (local + timedelta(hours=1)).replace(minute=0, second=0, microsecond=0)
+        if len(self._tables) >= 65536:
+            self._tables.clear()
+        self._tables[key] = table
+        return table
+
+    def best_time(self, phone, earliest, timezone=None):
+        """earliest 之后期望接通率（按天衰减）最高的外呼时间；horizon 内没有允许时段时返回 None"""
+        rates = self.slot_rates()
+        history = self.numbers.get(phone)
+        hours = history.hours if history is not None else None
+        best, best_score = None, -1.0
+        for epoch, slot, hour, decay in self._candidates(earliest, timezone or self.timezone):
+            rate = rates[slot]
+            if hours:
+                counts = hours.get(hour)
+                if counts is not None:
+                    rate = counts.rate(rate, NUMBER_PRIOR)
+            score = rate * decay
+            if score > best_score:
+                best, best_score = epoch, score
+        return best
+
+    def schedule(self, phone, result, last_epoch=None, row=None, timezone=None):
+        """按最近一次外呼结果安排重拨，返回到期时间；不重拨时返回 None 并移出队列"""
+        delay = self.retry_delays.get(result)
+        history = self.numbers.get(phone)
+        attempts = history.attempts if history else 0
+        if delay is None or attempts >= self.max_attempts:
+            self._pending.pop(phone, None)
+            return None
+        earliest = max(self.clock(), (last_epoch or self.clock()) + delay)
+        if history and self.max_daily_attempts:
+            # 当日次数已满时从次日开始
+            local = self._local(earliest, timezone)
+            if history.days.get(local.toordinal(), 0) >= self.max_daily_attempts:
+                earliest = (local + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+        due = self.best_time(phone, earliest, timezone)
+        if due is None:
+            self._pending.pop(phone, None)
+            return None
+        self.add(phone, due, row)
+        return due
+
+    def add(self, phone, due, row=None):
+        """按给定到期时间加入待重拨联系，替换该号码已有的安排"""
+        seq = next(self._seq)
+        self._pending[phone] = (due, seq, row)
+        heapq.heappush(self._heap, (due, seq, phone))
+
+    def pop_due(self, now=None, limit=None):
+        """取出已到期的联系 [(号码, 行数据)]，按到期时间排序"""
+        now = self.clock() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now and (limit is None or len(due) < limit):
+            _, seq, phone = heapq.heappop(self._heap)
+            entry = self._pending.get(phone)
+            if entry is None or entry[1] != seq:
+                continue
+            del self._pending[phone]
+            due.append((phone, entry[2]))
+        return due
+
+    def next_due(self):
+        """最近的到期时间；队列为空时为 None"""
+        while self._heap:
+            due, seq, phone = self._heap[0]
+            entry = self._pending.get(phone)
+            if entry is not None and entry[1] == seq:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def pending(self):
+        """全部待重拨 [(到期时间, 号码, 行数据)]，按到期时间排序"""
+        return sorted((due, phone, row) for phone, (due, _, row) in self._pending.items())
+
+    def __len__(self):
+        return len(self._pending)
+
+
+def _read_jsonl(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _phone(row):
+    for key in PHONE_FIELDS:
+        if row.get(key):
+            return str(row[key]).strip()
+    return None
+
+
+class AttemptHistory:
+    """跨轮次的外呼记录 {contact_id, phone, initiated, result, timezone}，只追加的 JSONL"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def records(self):
+        if not os.path.exists(self.path):
+            return
+        yield from _read_jsonl(self.path)
+
+    def append(self, records):
+        if not records:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def plan(scheduler, results_path, outcomes_path, contacts_path=None, timezone_field='TimeZone', history=None, existing=None):
+    """合并外呼结果与通话结果：逐个学习，再按每个号码最近一次结果安排重拨；返回各类别计数
+
+    history 为 AttemptHistory 时先载入以往轮次的记录，次数上限按全部轮次计算；本轮新增的记录追加写入。
+    只为本轮外呼过的号码安排重拨，同一个结果文件重复 plan 不会重复计数。
+    existing 为已有重拨计划的行（含 due_at）：本轮未外呼的号码沿用原到期时间，本轮外呼过的号码以本轮结果为准。
+    """
+    seen = set()
+    last_attempt = {}
+    if history is not None:
+        for record in history.records():
+            seen.add(record['contact_id'])
+            scheduler.observe(record['phone'], record['initiated'], record['result'], record.get('timezone'))
+            if last_attempt.get(record['phone'], (0,))[0] < record['initiated']:
+                last_attempt[record['phone']] = (record['initiated'], record['result'], record.get('timezone'))
+    outcomes = {o['contact_id']: o for o in _read_jsonl(outcomes_path)}
+    rows = {}
+    if contacts_path:
+        for _, row, _ in load_contacts(contacts_path):
+            phone = _phone(row)
+            if phone:
+                rows[phone] = row
+    latest = {}
+    counts = {}
+    added = []
+    for result in _read_jsonl(results_path):
+        contact_id = result.get('contact_id')
+        outcome = outcomes.get(contact_id)
+        phone = result.get('phone')
+        if not phone or outcome is None or not outcome.get('initiated'):
+            continue
+        timezone = (rows.get(phone) or {}).get(timezone_field)
+        category = classify_outcome(outcome)
+        counts[category] = counts.get(category, 0) + 1
+        if contact_id not in seen:
+            seen.add(contact_id)
+            scheduler.observe(phone, outcome['initiated'], category, timezone)
+            added.append({'contact_id': contact_id, 'phone': phone, 'initiated': outcome['initiated'],
+                          'result': category, 'timezone': timezone})
+        if phone not in latest or latest[phone][0] < outcome['initiated']:
+            latest[phone] = (outcome['initiated'], category, timezone)
+    for phone, (epoch, category, timezone) in latest.items():
+        # 历史中可能有晚于本轮结果的外呼（例如同一结果文件在下一轮之后重新 plan）
+        previous = last_attempt.get(phone)
+        if previous and previous[0] > epoch:
+            epoch, category, timezone = previous
+        scheduler.schedule(phone, category, epoch, rows.get(phone) or {'phone': phone}, timezone)
+    for row in existing or ():
+        phone = _phone(row)
+        if phone and phone not in latest:
+            scheduler.add(phone, row['due_at'], {k: v for k, v in row.items() if k != 'due_at'})
+    if history is not None:
+        history.append(added)
+    return counts
+
+
+def _write_rows(path, entries):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for due, phone, row in entries:
+            f.write(json.dumps(dict(row, due_at=due), ensure_ascii=False) + '\n')
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='按接通率安排重拨')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    plan_parser = commands.add_parser('plan', help='由历史结果生成重拨计划')
+    plan_parser.add_argument('results', help='dialer 输出的外呼结果 JSONL（含 phone 与 contact_id）')
+    plan_parser.add_argument('outcomes', help='tracker / events 输出的通话结果 JSONL')
+    plan_parser.add_argument('--contacts', default=None, help='原联系人文件，重拨时沿用其中的属性列')
+    plan_parser.add_argument('--output', required=True, help='重拨计划 JSONL（按 due_at 排序）；已存在时合并，本轮未外呼的号码保留原安排')
+    plan_parser.add_argument('--history', default=None,
+                             help='跨轮次的外呼历史 JSONL（缺省为计划文件旁的 attempts.jsonl）；次数上限按其中全部轮次计算')
+    plan_parser.add_argument('--max-attempts', type=int, default=3, help='每个号码的最大外呼次数')
+    plan_parser.add_argument('--max-daily-attempts', type=int, default=1, help='每个号码每天的最大外呼次数')
+    plan_parser.add_argument('--calling-hours', default='9-20', help='号码本地的允许外呼时段，例如 9-20')
+    plan_parser.add_argument('--timezone', default='UTC', help='联系人没有 TimeZone 列时使用的时区')
+    plan_parser.add_argument('--horizon-days', type=int, default=3, help='在多少天内寻找最佳时段')
+
+    due_parser = commands.add_parser('due', help='取出已到期的联系')
+    due_parser.add_argument('plan', help='重拨计划 JSONL，未到期的部分写回')
+    due_parser.add_argument('--output', required=True, help='到期联系 JSONL，可直接作为 dialer 的联系人文件')
+    due_parser.add_argument('--limit', type=int, default=None, help='最多取出的条数')
+    args = parser.parse_args(argv)
+
+    if args.command == 'plan':
+        start_hour, end_hour = (int(v) for v in args.calling_hours.split('-'))
+        scheduler = RetryScheduler(
+            max_attempts=args.max_attempts,
+            max_daily_attempts=args.max_daily_attempts,
+            calling_hours=(start_hour, end_hour),
+            timezone=args.timezone,
+            horizon_days=args.horizon_days
+        )
+        history_path = args.history or os.path.join(os.path.dirname(os.path.abspath(args.output)), 'attempts.jsonl')
+        existing = list(_read_jsonl(args.output)) if os.path.exists(args.output) else []
+        counts = plan(
+            scheduler, args.results, args.outcomes, args.contacts,
+            history=AttemptHistory(history_path), existing=existing
+        )
+        _write_rows(args.output, scheduler.pending())
+        summary = {'outcomes': counts, 'retries': len(scheduler), 'history': history_path}
+        print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+        return 0
+
+    # 计划已按 due_at 排序，到期部分在前
+    now = time.time()
+    due, remaining = [], []
+    for row in _read_jsonl(args.plan):
+        if row['due_at'] <= now and (args.limit is None or len(due) < args.limit):
+            due.append(row)
+        else:
+            remaining.append((row['due_at'], _phone(row), row))
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for row in due:
+            row = {k: v for k, v in row.items() if k != 'due_at'}
+            f.write(json.dumps(row, ensure_ascii=False) + '\n')
+    _write_rows(args.plan, [(d, p, {k: v for k, v in r.items() if k != 'due_at'}) for d, p, r in remaining])
+    print(json.dumps({'due': len(due), 'remaining': len(remaining)}, ensure_ascii=False), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
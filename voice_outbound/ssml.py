@@ -0,0 +1,193 @@
+"""SSML 模板：预编译一次，属性值统一转义，金额 / 日期 / 数字串按 say-as 渲染
+
+模板语法:
+    {字段}          插入转义后的文本
+    {字段:amount}   金额  -> <say-as interpret-as="cardinal">4478.67</say-as>
+    {字段:date}     日期  -> <say-as interpret-as="date" format="yyyymmdd">20250701</say-as>
+                   （接受 2025-07-01 / 2025/07/01 / 20250701 / 07-01，缺年份时以 ???? 代替）
+    {字段:digits}   逐位朗读 -> <say-as interpret-as="digits">8778422670</say-as>
+    {{ / }}         字面的花括号
+
+渲染结果作为联系流属性 Message 传入，联系流以 $.Attributes.Message 播放。批量渲染:
+    python -m voice_outbound.ssml contacts.csv --output contacts_with_message.jsonl
+"""
+import argparse
+import json
+import re
+import sys
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+MESSAGE_ATTRIBUTE = 'Message'
+
+# ivr/voice_outbound_ivr_flow.json 原先内嵌的还款提醒话术
+IVR_REMINDER_TEMPLATE = (
+    '<speak><break time="3s"/>尊敬的{UserName}，您好，您于{LoanDate:date}在某某金融申请的贷款总金额为'
+    '{LoanAmount:amount}元。第一期还款日{DueDate:date}已经逾期，还款金额{DueAmount:amount}元，'
+    '最低还款金额为{MinimumPayment:amount}元。请问您是否可以在今天晚上8点之前还款？'
+    '有任何问题可以回拨我们的热线号码{Hotline:digits}</speak>'
+)
+# 原固定话术中的示例值，只用于演示页面；批量外呼缺少字段时该行失败，不会用示例值代替
+IVR_REMINDER_DEFAULTS = {
+    'LoanDate': '2025-07-01',
+    'LoanAmount': '50000',
+    'DueDate': '08-01',
+    'DueAmount': '4478.67',
+    'MinimumPayment': '447.87',
+    'Hotline': '8778422670',
+}
+
+_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&apos;'})
+_PLACEHOLDER = re.compile(r'\{\{|\}\}|\{(\w+)(?::(\w+))?\}')
+_DATE = re.compile(r'^(?:(\d{4})[-/]?)?(\d{1,2})[-/]?(\d{1,2})$')
+
+
+def escape(value):
+    """转义 XML 特殊字符，属性值中的 < & 等不会破坏 SSML"""
+    return str(value).translate(_ESCAPES)
+
+
+# 批量渲染时金额、日期大量重复，缓存格式化结果
+@lru_cache(maxsize=8192)
+def say_amount(value):
+    try:
+        amount = Decimal(str(value).replace(',', '').strip())
+    except InvalidOperation:
+        raise ValueError(f"无效的金额: {value!r}")
+    if not amount.is_finite():
+        raise ValueError(f"无效的金额: {value!r}")
+    return f'<say-as interpret-as="cardinal">{amount:f}</say-as>'
+
+
+@lru_cache(maxsize=8192)
+def say_date(value):
+    if isinstance(value, (date, datetime)):
+        digits = value.strftime('%Y%m%d')
+    else:
+        match = _DATE.match(str(value).strip())
+        if not match:
+            raise ValueError(f"无效的日期: {value!r}")
+        year, month, day = match.groups()
+        if not (1 <= int(month) <= 12 and 1 <= int(day) <= 31):
+            raise ValueError(f"无效的日期: {value!r}")
+        digits = f"{year or '????'}{int(month):02d}{int(day):02d}"
+    return f'<say-as interpret-as="date" format="yyyymmdd">{digits}</say-as>'
+
+
+@lru_cache(maxsize=8192)
+def say_digits(value):
+    digits = ''.join(ch for ch in str(value) if ch.isdigit())
+    if not digits:
+        raise ValueError(f"无效的数字串: {value!r}")
+    return f'<say-as interpret-as="digits">{digits}</say-as>'
+
+
+FORMATTERS = {
+    None: escape,
+    'amount': say_amount,
+    'date': say_date,
+    'digits': say_digits,
+}
+
+
+class SSMLTemplate:
+    """编译后的 SSML 模板：字面部分视为可信 SSML，字段值一律经过转义或 say-as 格式化"""
+
+    def __init__(self, source, defaults=None):
+        self.source = source
+        self.defaults = dict(defaults or {})
+        self.fields = []
+        pieces = []
+        position = 0
+        for match in _PLACEHOLDER.finditer(source):
+            pieces.append(source[position:match.start()].replace('{', '{{').replace('}', '}}'))
+            position = match.end()
+            token = match.group(0)
+            if token in ('{{', '}}'):
+                pieces.append(token)
+                continue
+            name, kind = match.group(1), match.group(2)
+            if kind not in FORMATTERS:
+                raise ValueError(f"未知的格式 {kind!r}（字段 {name}）")
+            pieces.append('{%d}' % len(self.fields))
+            self.fields.append((name, FORMATTERS[kind]))
+        pieces.append(source[position:].replace('{', '{{').replace('}', '}}'))
+        # 编译为 str.format 模式串，渲染时只做一次格式化
+        self._pattern = ''.join(pieces)
+
+    def render(self, values):
+        defaults = self.defaults
+        args = []
+        for name, formatter in self.fields:
+            value = values.get(name)
+            if value is None or value == '':
+                value = defaults.get(name)
+                if value is None:
+                    raise ValueError(f"缺少字段 {name}")
+            args.append(formatter(value))
+        return self._pattern.format(*args)
+
+    def render_many(self, rows):
+        """批量渲染，返回与 rows 对应的 SSML 列表"""
+        render = self.render
+        return [render(row) for row in rows]
+
+
+@lru_cache(maxsize=64)
+def _compile(source, defaults):
+    return SSMLTemplate(source, dict(defaults))
+
+
+def compile_template(source, defaults=None):
+    """按 (模板, 默认值) 缓存编译结果"""
+    return _compile(source, tuple(sorted((defaults or {}).items())))
+
+
+def ivr_reminder_template():
+    """还款提醒模板，不带默认值：任一字段缺失时 render 抛出 ValueError"""
+    return compile_template(IVR_REMINDER_TEMPLATE)
+
+
+def ivr_demo_template():
+    """演示页面用的还款提醒模板，缺失字段以原固定话术中的示例值补齐"""
+    return compile_template(IVR_REMINDER_TEMPLATE, IVR_REMINDER_DEFAULTS)
+
+
+def main(argv=None):
+    # 延迟导入，避免 dialer 导入本模块时形成循环
+    from voice_outbound.dialer import load_contacts
+
+    parser = argparse.ArgumentParser(description='批量渲染每位客户的 SSML 话术，附加为 Message 列')
+    parser.add_argument('contacts', help='联系人文件 (CSV 或 JSONL)')
+    parser.add_argument('--template', default=None, help='SSML 模板文件 (默认使用 IVR 还款提醒话术)')
+    parser.add_argument('--output', default=None, help='输出 JSONL 文件 (默认标准输出)，可直接作为 dialer 的联系人文件')
+    args = parser.parse_args(argv)
+
+    if args.template:
+        with open(args.template, 'r', encoding='utf-8') as f:
+            template = compile_template(f.read().strip())
+    else:
+        template = ivr_reminder_template()
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    rendered = failed = 0
+    try:
+        for row_id, row, _ in load_contacts(args.contacts):
+            try:
+                row[MESSAGE_ATTRIBUTE] = template.render(row)
+            except ValueError as e:
+                failed += 1
+                print(f"第 {row_id} 行: {e}", file=sys.stderr)
+                continue
+            out.write(json.dumps(row, ensure_ascii=False) + '\n')
+            rendered += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"已渲染 {rendered} 条，失败 {failed} 条", file=sys.stderr)
+    return 0 if failed == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""延迟与吞吐统计"""
+import math
+import threading
+import time
+
+
+def percentile(sorted_values, q):
+    """最近秩法计算百分位数，sorted_values 需已排序"""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+class LatencyStats:
+    """线程安全地记录每次调用的耗时与成功/失败数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.succeeded = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self.finished = None
+
+    def record(self, seconds, ok=True):
+        self.observe(seconds)
+        self.count(ok)
+
+    def observe(self, seconds):
+        """只记录一次 API 调用耗时（重试时每次尝试各记一次）"""
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def count(self, ok=True):
+        """只累计最终成功/失败数"""
+        with self._lock:
+            if ok:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+    def stop(self):
+        self.finished = time.monotonic()
+
+    def summary(self):
+        """返回吞吐 (calls/s) 与延迟百分位 (毫秒)"""
+        with self._lock:
+            values = sorted(self.latencies)
+            succeeded, failed = self.succeeded, self.failed
+        elapsed = (self.finished or time.monotonic()) - self.started
+        total = succeeded + failed
+        return {
+            'total': total,
+            'succeeded': succeeded,
+            'failed': failed,
+            'elapsed_s': round(elapsed, 3),
+            'calls_per_second': round(total / elapsed, 2) if elapsed > 0 else 0.0,
+            'latency_ms': {
+                'p50': round(percentile(values, 50) * 1000, 1),
+                'p95': round(percentile(values, 95) * 1000, 1),
+                'p99': round(percentile(values, 99) * 1000, 1),
+                'max': round(values[-1] * 1000, 1) if values else 0.0,
+            },
+        }
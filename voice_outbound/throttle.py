@@ -0,0 +1,175 @@
+"""Connect API 错误分类、抖动指数退避重试与 AIMD 自适应速率控制"""
+import random
+import socket
+import sys
+import threading
+import time
+
+THROTTLE = 'throttle'
+RETRYABLE = 'retryable'
+FATAL = 'fatal'
+
+# 限流/配额类错误：重试并降低拨号速率
+THROTTLE_CODES = {
+    'ThrottlingException',
+    'Throttling',
+    'TooManyRequestsException',
+    'LimitExceededException',
+    'RequestLimitExceeded',
+    'ServiceQuotaExceededException',
+    'SlowDown',
+}
+
+# 服务端临时错误：重试但不调整速率
+RETRYABLE_CODES = {
+    'InternalServiceException',
+    'InternalFailure',
+    'InternalServerError',
+    'ServiceUnavailableException',
+    'ServiceUnavailable',
+    'RequestTimeout',
+    'RequestTimeoutException',
+}
+
+# 网络层异常（botocore.exceptions 中的类名），按名称匹配以免强依赖 botocore
+NETWORK_ERRORS = {
+    'EndpointConnectionError',
+    'ConnectionClosedError',
+    'ConnectTimeoutError',
+    'ReadTimeoutError',
+    'ConnectionError',
+}
+
+
+def error_code(exc):
+    """取出 botocore ClientError 中的错误码，非 ClientError 返回 None"""
+    response = getattr(exc, 'response', None)
+    if isinstance(response, dict):
+        return response.get('Error', {}).get('Code')
+    return None
+
+
+def classify_error(exc):
+    """将异常归类为 THROTTLE / RETRYABLE / FATAL"""
+    code = error_code(exc)
+    if code in THROTTLE_CODES:
+        return THROTTLE
+    if code in RETRYABLE_CODES:
+        return RETRYABLE
+    if code is None:
+        # 标准库 socket 超时与连接错误（connect_lite 等不经 botocore 的客户端）
+        if isinstance(exc, (socket.timeout, ConnectionError)):
+            return RETRYABLE
+        if any(cls.__name__ in NETWORK_ERRORS for cls in type(exc).__mro__):
+            return RETRYABLE
+        return FATAL
+    status = exc.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+    if status == 429:
+        return THROTTLE
+    if status >= 500:
+        return RETRYABLE
+    return FATAL
+
+
+def backoff_delay(attempt, base_delay=0.2, max_delay=10.0):
+    """Full Jitter 指数退避: 在 [0, min(max_delay, base_delay * 2^attempt)] 内均匀取值"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+class AdaptiveRateController:
+    """AIMD 速率控制：无限流时按步长加性增加，出现限流时乘性减小
+
+    limiter 需提供 acquire() 与 set_rate(rate)，例如 dialer.TokenBucket。
+    """
+
+    def __init__(
+        self,
+        limiter,
+        min_rate=0.1,
+        max_rate=None,
+        increase_step=0.5,
+        increase_interval=2.0,
+        decrease_factor=0.5,
+        decrease_cooldown=1.0
+    ):
+        self._lock = threading.Lock()
+        self.limiter = limiter
+        self.rate = float(limiter.rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate or limiter.rate)
+        self.increase_step = float(increase_step)
+        self.increase_interval = float(increase_interval)
+        self.decrease_factor = float(decrease_factor)
+        self.decrease_cooldown = float(decrease_cooldown)
+        self._last_increase = time.monotonic()
+        self._last_decrease = 0.0
+        self.throttles = 0
+        self.retries = 0
+
+    def acquire(self):
+        self.limiter.acquire()
+
+    def _apply(self, rate):
+        self.rate = max(self.min_rate, min(self.max_rate, rate))
+        self.limiter.set_rate(self.rate)
+
+    def on_success(self):
+        with self._lock:
+            now = time.monotonic()
+            if self.rate < self.max_rate and now - self._last_increase >= self.increase_interval:
+                self._last_increase = now
+                self._apply(self.rate + self.increase_step)
+
+    def on_throttle(self):
+        with self._lock:
+            self.throttles += 1
+            now = time.monotonic()
+            # 同一波并发请求的多个限流只降速一次
+            if now - self._last_decrease >= self.decrease_cooldown:
+                self._last_decrease = now
+                self._last_increase = now
+                self._apply(self.rate * self.decrease_factor)
+
+    def on_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def set_max_rate(self, max_rate):
+        """外部调整速率上限（例如预测式节奏）；最近没有限流时直接调到新上限，否则仅在上限以下继续 AIMD"""
+        with self._lock:
+            self.max_rate = max(self.min_rate, float(max_rate))
+            if time.monotonic() - self._last_decrease >= self.increase_interval:
+                self._apply(self.max_rate)
+            else:
+                self._apply(self.rate)
+
+    def snapshot(self):
+        with self._lock:
+            return {'rate': round(self.rate, 3), 'throttles': self.throttles, 'retries': self.retries}
+
+
+def call_with_retry(fn, controller=None, max_attempts=5, base_delay=0.2, max_delay=10.0, sleep=time.sleep):
+    """调用 fn()，对限流与临时错误做抖动指数退避重试；FATAL 错误与重试耗尽时抛出最后一次异常"""
+    attempt = 0
+    while True:
+        if controller:
+            controller.acquire()
+        try:
+            result = fn()
+        except Exception as e:
+            kind = classify_error(e)
+            attempt += 1
+            # 最后一次仍被限流也要降速，否则后续调用继续以原速率撞上配额
+            if controller and kind == THROTTLE:
+                controller.on_throttle()
+            if kind == FATAL or attempt >= max_attempts:
+                raise
+            if controller:
+                controller.on_retry()
+            # 输出到标准错误，不与写到标准输出的结果 JSONL 混在一起
+            print(f"调用失败 ({kind})，第 {attempt} 次重试: {str(e)}", file=sys.stderr)
+            sleep(backoff_delay(attempt, base_delay, max_delay))
+            continue
+        if controller:
+            controller.on_success()
+        return result
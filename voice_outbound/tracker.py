@@ -0,0 +1,224 @@
+"""批量跟踪在途外呼的状态，替代逐个点击「更新」调用 describe_contact
+
+每个联系按当前状态以退避间隔轮询：振铃中间隔短，已接通后间隔逐步拉长，
+挂断（终态）后不再轮询。API 调用次数只与在途通话数成正比，与总外呼数无关。
+
+用法:
+    python -m voice_outbound.tracker results.jsonl --instance-id ... --output outcomes.jsonl
+"""
+import argparse
+import heapq
+import itertools
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from voice_outbound.clients import get_client
+from voice_outbound.dialer import DEFAULT_INSTANCE_ID, TokenBucket
+from voice_outbound.export import ResultsSink
+from voice_outbound.outcomes import CONNECTED, INITIATED, OutcomeStore
+from voice_outbound.throttle import AdaptiveRateController, call_with_retry, error_code
+
+# 各状态的 (首次轮询间隔, 退避倍数, 最大间隔)，单位秒
+POLL_SCHEDULE = {
+    INITIATED: (3.0, 1.5, 10.0),
+    CONNECTED: (10.0, 2.0, 60.0),
+}
+
+# 刚发起的联系可能短暂查不到
+NOT_FOUND_CODES = {'ResourceNotFoundException'}
+
+
+class ContactTracker:
+    """按状态退避轮询在途联系，结果写入 OutcomeStore"""
+
+    def __init__(
+        self,
+        connect_client,
+        connect_instance_id,
+        store=None,
+        rate=5.0,
+        max_workers=8,
+        max_not_found=5,
+        clock=time.monotonic
+    ):
+        self.connect_client = connect_client
+        self.connect_instance_id = connect_instance_id
+        self.store = store if store is not None else OutcomeStore()
+        # DescribeContact 配额较低，与外呼分开限速
+        self.controller = AdaptiveRateController(TokenBucket(rate), max_rate=rate)
+        self.max_workers = max_workers
+        self.max_not_found = max_not_found
+        self.clock = clock
+        self.api_calls = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._heap = []
+        self._seq = itertools.count()
+        # 在途联系: contact_id -> [当前状态, 当前间隔, 连续查不到次数]
+        self._active = {}
+        self._inflight = 0
+        self._closed = False
+
+    def add(self, contact_id):
+        """开始跟踪一个联系，首次轮询在振铃间隔之后"""
+        with self._lock:
+            if contact_id in self._active:
+                return
+            first, _, _ = POLL_SCHEDULE[INITIATED]
+            self._active[contact_id] = [INITIATED, first, 0]
+            heapq.heappush(self._heap, (self.clock() + first, next(self._seq), contact_id))
+            self._wakeup.notify()
+
+    def close(self):
+        """不再有新的联系加入，跟踪完剩余在途联系后 run() 返回"""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+
+    def stop(self):
+        """放弃剩余在途联系，run() 在进行中的查询完成后返回"""
+        with self._lock:
+            self._active.clear()
+            self._closed = True
+            self._wakeup.notify()
+
+    @property
+    def active_count(self):
+        with self._lock:
+            return len(self._active)
+
+    def _reschedule(self, contact_id, state):
+        entry = self._active[contact_id]
+        first, factor, ceiling = POLL_SCHEDULE[state]
+        if entry[0] != state:
+            # 状态变化后间隔重置
+            entry[0], entry[1] = state, first
+        else:
+            entry[1] = min(ceiling, entry[1] * factor)
+        heapq.heappush(self._heap, (self.clock() + entry[1], next(self._seq), contact_id))
+
+    def _poll(self, contact_id):
+        try:
+            response = call_with_retry(
+                lambda: self.connect_client.describe_contact(
+                    InstanceId=self.connect_instance_id,
+                    ContactId=contact_id
+                ),
+                self.controller
+            )
+            outcome = self.store.merge_contact(response['Contact'])
+            error = None
+        except Exception as e:
+            outcome = None
+            error = e
+
+        with self._lock:
+            self.api_calls += 1
+            self._inflight -= 1
+            entry = self._active.get(contact_id)
+            if entry is not None:
+                if outcome is not None and outcome.terminal:
+                    del self._active[contact_id]
+                elif outcome is not None:
+                    entry[2] = 0
+                    self._reschedule(contact_id, outcome.state)
+                elif error_code(error) in NOT_FOUND_CODES and entry[2] < self.max_not_found:
+                    entry[2] += 1
+                    self._reschedule(contact_id, entry[0])
+                else:
+                    print(f"跟踪 {contact_id} 失败: {str(error)}", file=sys.stderr)
+                    del self._active[contact_id]
+            self._wakeup.notify()
+
+    def run(self, until_idle=True):
+        """轮询直到没有在途联系；until_idle=False 时还需等待 close()"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                with self._lock:
+                    idle = not self._active and self._inflight == 0
+                    if idle and (until_idle or self._closed):
+                        break
+                    now = self.clock()
+                    due = []
+                    while self._heap and self._heap[0][0] <= now:
+                        _, _, contact_id = heapq.heappop(self._heap)
+                        if contact_id not in self._active:
+                            continue
+                        # 已由事件流（events.ContactEventConsumer）更新为终态的联系不再轮询
+                        outcome = self.store.get(contact_id)
+                        if outcome is not None and outcome.terminal:
+                            del self._active[contact_id]
+                        else:
+                            due.append(contact_id)
+                    self._inflight += len(due)
+                    if not due:
+                        timeout = self._heap[0][0] - now if self._heap else 1.0
+                        self._wakeup.wait(min(timeout, 1.0))
+                for contact_id in due:
+                    executor.submit(self._poll, contact_id)
+        return self.store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='批量跟踪外呼状态')
+    parser.add_argument('results', help='dialer 输出的结果 JSONL（含 contact_id）')
+    parser.add_argument('--instance-id', default=DEFAULT_INSTANCE_ID, help='Amazon Connect 实例 ID')
+    parser.add_argument('--region', default=None, help='AWS 区域')
+    parser.add_argument('--endpoint-url', default=None, help='自定义 Connect endpoint')
+    parser.add_argument('--rate', type=float, default=5.0, help='DescribeContact 调用速率上限 (次/秒)')
+    parser.add_argument('--workers', type=int, default=8, help='并发线程数')
+    parser.add_argument('--output', default=None, help='终态结果输出 JSONL 文件 (默认标准输出)')
+    parser.add_argument('--parquet-dir', default=None, help='同时将终态结果流式写入按天分区的 Parquet 目录')
+    parser.add_argument('--keep-attribute', action='append', default=[], metavar='NAME',
+                        help='随结果输出的联系属性名，可重复指定（默认只保留 amd_result）')
+    args = parser.parse_args(argv)
+
+    connect_client = get_client(
+        'connect',
+        region_name=args.region,
+        endpoint_url=args.endpoint_url,
+        max_pool_connections=args.workers,
+        max_attempts=1
+    )
+    out = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+    out_lock = threading.Lock()
+    sink = ResultsSink(args.parquet_dir) if args.parquet_dir else None
+
+    def on_terminal(outcome):
+        with out_lock:
+            out.write(json.dumps(outcome.to_dict(), ensure_ascii=False) + '\n')
+        if sink:
+            sink.add(outcome)
+
+    tracker = ContactTracker(
+        connect_client,
+        args.instance_id,
+        store=OutcomeStore(on_terminal=on_terminal, attribute_keys=args.keep_attribute),
+        rate=args.rate,
+        max_workers=args.workers
+    )
+    with open(args.results, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                contact_id = json.loads(line).get('contact_id')
+                if contact_id:
+                    tracker.add(contact_id)
+
+    try:
+        store = tracker.run()
+    finally:
+        if sink:
+            sink.close()
+        if out is not sys.stdout:
+            out.close()
+    summary = {'contacts': len(store), 'api_calls': tracker.api_calls, 'states': store.counts()}
+    print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())